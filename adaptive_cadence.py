@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+관찰된 변화율 기반 적응형 촬영 간격
+- 식물마다 연속한 분석 결과의 지표 변화량(녹색 비율, 밝기 등)을 지표별 목표 변화량으로 나눠 변화율을 추적
+- 다음 촬영 간격 = 목표 변화량 하나가 쌓일 것으로 예상되는 시간
+  (설정한 최소~최대 간격 안, 한 번에 max_step 배까지만 조정)
+  → 빠르게 자라는 모종은 자주, 변화 없는 휴면 식물은 드물게 촬영
+- 공유 카메라 뷰는 속한 식물 중 가장 짧은 간격으로 한 번에 촬영
+- 같은 활성 시간 동안 고정 간격으로 촬영했을 때와 비교해 줄인 촬영 수·저장 용량·CPU 시간 보고
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "min_interval_minutes": 15,
+    "max_interval_minutes": 240,
+    # 촬영 간격마다 목표로 하는 지표 변화량 (growth_stats 지표 이름 → 변화량)
+    "change_targets": {"green_coverage": 0.5, "brightness": 10.0},
+    "max_step": 2.0,  # 한 번에 간격을 늘리거나 줄이는 최대 배율
+    "smoothing": 0.5,  # 변화율 지수 평활 (이전 값의 비중)
+}
+
+# 스케줄러 틱 간격 (분) - 적응형 모드는 틱마다 간격이 지난 대상만 촬영
+TICK_MINUTES = 1
+
+# 틱 사이가 이보다 길면 (비활성 시간대, 중지 등) 고정 간격 비교용 활성 시간에 넣지 않음
+MAX_TICK_GAP = 5 * 60
+
+# 촬영 대상: (종류 "plant"/"view", 대상 ID, 포함된 식물 ID 목록)
+CaptureGroup = Tuple[str, Optional[str], List[str]]
+
+
+def group_key(group: CaptureGroup) -> str:
+    """촬영 대상 키 (상태 파일·보고서용)"""
+    kind, target, _ = group
+    return f"{kind}:{target or 'general'}"
+
+
+class PlantCadence:
+    """한 식물의 촬영 간격과 변화율"""
+
+    def __init__(self, interval: float, state: Dict = None):
+        state = state or {}
+        self.interval = state.get("interval", interval)  # 초
+        self.rate = state.get("rate")  # 초당 목표 변화량 단위 (평활)
+        self.last_time = state.get("last_time")
+        self.last_values: Dict[str, float] = state.get("last_values", {})
+
+    def observe(self, ts: float, values: Dict[str, float], settings: Dict) -> bool:
+        """
+        새 분석 결과 반영 → 간격 조정
+
+        Args:
+            ts: 샘플 시각 (epoch 초)
+            values: 지표 이름 → 값
+            settings: 적응형 간격 설정
+
+        Returns:
+            adjusted: 간격을 다시 계산했는지 (첫 샘플·이미 본 샘플이면 False)
+        """
+        if self.last_time is not None and ts <= self.last_time:
+            return False
+        previous_time, previous = self.last_time, self.last_values
+        self.last_time, self.last_values = ts, dict(values)
+        if previous_time is None:
+            return False
+
+        # 지표별 변화량을 목표 변화량 단위로 → 가장 빠르게 변하는 지표 기준
+        change, compared = 0.0, False
+        for metric, target in settings["change_targets"].items():
+            if metric in values and metric in previous and target > 0:
+                change = max(change, abs(values[metric] - previous[metric]) / target)
+                compared = True
+        if not compared:
+            return False
+
+        rate = change / (ts - previous_time)
+        smoothing = settings["smoothing"]
+        self.rate = rate if self.rate is None else smoothing * self.rate + (1 - smoothing) * rate
+
+        desired = 1.0 / self.rate if self.rate > 0 else math.inf
+        step = settings["max_step"]
+        interval = min(max(desired, self.interval / step), self.interval * step)
+        self.interval = min(max(interval, settings["min_interval_minutes"] * 60),
+                            settings["max_interval_minutes"] * 60)
+        return True
+
+    def to_dict(self) -> Dict:
+        return {"interval": self.interval, "rate": self.rate, "last_time": self.last_time,
+                "last_values": self.last_values}
+
+
+class CadenceController:
+    """식물별 적응형 촬영 간격과 고정 간격 대비 사용량 (state_file 에 저장)"""
+
+    def __init__(self, state_file: Path, fixed_interval_minutes: float, settings: Dict = None):
+        """
+        컨트롤러 초기화
+
+        Args:
+            state_file: 상태 파일 (재시작해도 식물별 간격·사용량 유지)
+            fixed_interval_minutes: 비교 기준 고정 촬영 간격 (새 식물의 시작 간격)
+            settings: 적응형 간격 설정 (없는 항목은 기본값)
+        """
+        self.state_file = Path(state_file)
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.settings.update(settings or {})
+        self.fixed_interval = fixed_interval_minutes * 60
+
+        state = {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+        self.since: Optional[float] = state.get("since")
+        self.last_tick: Optional[float] = state.get("last_tick")
+        self.plants: Dict[str, PlantCadence] = {
+            plant_id: PlantCadence(self._start_interval(), saved)
+            for plant_id, saved in state.get("plants", {}).items()
+        }
+        # 대상 키 → 마지막 촬영·시도 시각, 촬영 수, 이미지 바이트, CPU 초, 활성 시간(초)
+        self.targets: Dict[str, Dict] = state.get("targets", {})
+
+    def _start_interval(self) -> float:
+        """처음 보는 식물의 간격 (고정 간격을 설정 범위로 자름)"""
+        return min(max(self.fixed_interval, self.settings["min_interval_minutes"] * 60),
+                   self.settings["max_interval_minutes"] * 60)
+
+    def _plant(self, plant_id: str) -> PlantCadence:
+        cadence = self.plants.get(plant_id)
+        if cadence is None:
+            cadence = self.plants[plant_id] = PlantCadence(self._start_interval())
+        return cadence
+
+    def _usage(self, key: str) -> Dict:
+        return self.targets.setdefault(key, {"last_capture": None, "last_attempt": None, "captures": 0,
+                                             "size_bytes": 0, "cpu_seconds": 0.0, "active_seconds": 0.0})
+
+    def interval(self, group: CaptureGroup) -> float:
+        """대상의 촬영 간격 (초, 뷰는 속한 식물 중 가장 짧은 간격)"""
+        plant_ids = group[2]
+        if not plant_ids:
+            return self._start_interval()
+        return min(self._plant(plant_id).interval for plant_id in plant_ids)
+
+    def tick(self, now: float, groups: Iterable[CaptureGroup]) -> List[CaptureGroup]:
+        """
+        스케줄러 틱 (활성 시간대에만 호출) → 지금 촬영할 대상
+
+        틱 사이 경과 시간을 대상별 활성 시간에 더해 고정 간격 촬영 수를 추정한다.
+
+        Args:
+            now: 현재 시각 (epoch 초)
+            groups: 모니터링 대상 목록
+
+        Returns:
+            due: 마지막 촬영 후 간격이 지난 대상 (처음 보는 대상 포함)
+        """
+        if self.since is None:
+            self.since = now
+        elapsed = now - self.last_tick if self.last_tick is not None else 0.0
+        if not 0 < elapsed <= MAX_TICK_GAP:
+            elapsed = 0.0
+        self.last_tick = now
+
+        retry = self.settings["min_interval_minutes"] * 60
+        due = []
+        for group in groups:
+            usage = self._usage(group_key(group))
+            usage["active_seconds"] += elapsed
+            last_capture, last_attempt = usage["last_capture"], usage["last_attempt"]
+            if last_attempt is not None and now < last_attempt + retry and last_attempt != last_capture:
+                continue  # 실패 직후에는 최소 간격 뒤 재시도
+            if last_capture is None or now >= last_capture + self.interval(group):
+                due.append(group)
+        return due
+
+    def record_capture(self, group: CaptureGroup, now: float, result: Optional[Dict], cpu_seconds: float = 0.0):
+        """
+        촬영 결과 기록
+
+        Args:
+            group: 촬영 대상
+            now: 촬영 시각 (epoch 초)
+            result: 촬영 결과 (실패면 None)
+            cpu_seconds: 이 촬영의 획득·인코딩·저장·분석 CPU 시간 추정
+        """
+        usage = self._usage(group_key(group))
+        usage["last_attempt"] = now
+        if result is None:
+            return
+        usage["last_capture"] = now
+        usage["captures"] += 1
+        usage["size_bytes"] += result.get("image_properties", {}).get("size_bytes", 0)
+        usage["cpu_seconds"] += cpu_seconds
+
+    def observe(self, plant_id: str, ts: float, values: Dict[str, float]) -> Optional[Tuple[float, float]]:
+        """
+        식물의 새 분석 결과 반영
+
+        Args:
+            plant_id: 식물 ID
+            ts: 샘플 시각 (epoch 초)
+            values: 지표 이름 → 값
+
+        Returns:
+            (before, after): 간격이 바뀌었으면 이전·새 간격 (초), 아니면 None
+        """
+        cadence = self._plant(plant_id)
+        before = cadence.interval
+        if not cadence.observe(ts, values, self.settings) or abs(cadence.interval - before) < 1:
+            return None
+        return before, cadence.interval
+
+    def report(self) -> Dict:
+        """
+        고정 간격 대비 사용량
+
+        고정 간격 촬영 수는 대상별로 관찰한 활성 시간 / 고정 간격으로 추정하고,
+        줄인 저장 용량·CPU 시간은 대상별 실측 평균(촬영당 이미지 크기, CPU 시간)을 곱해 계산한다.
+        음수면 고정 간격보다 더 자주 촬영한 것 (빠르게 자라는 식물).
+
+        Returns:
+            report: 전체 합계, 대상별 사용량, 식물별 현재 간격
+        """
+        captures = fixed = saved_bytes = saved_cpu = 0.0
+        targets = {}
+        for key, usage in sorted(self.targets.items()):
+            count = usage["captures"]
+            expected = usage["active_seconds"] / self.fixed_interval if self.fixed_interval > 0 else 0.0
+            bytes_per_capture = usage["size_bytes"] / count if count else 0.0
+            cpu_per_capture = usage["cpu_seconds"] / count if count else 0.0
+            captures += count
+            fixed += expected
+            saved_bytes += (expected - count) * bytes_per_capture
+            saved_cpu += (expected - count) * cpu_per_capture
+            targets[key] = {
+                "captures": count,
+                "fixed_captures": round(expected, 1),
+                "mb_per_capture": round(bytes_per_capture / 1024 / 1024, 3),
+                "cpu_seconds_per_capture": round(cpu_per_capture, 3),
+            }
+        return {
+            "since": datetime.fromtimestamp(self.since).isoformat() if self.since else None,
+            "fixed_interval_minutes": self.fixed_interval / 60,
+            "captures": int(captures),
+            "fixed_captures": round(fixed, 1),
+            "saved_captures": round(fixed - captures, 1),
+            "saved_percent": round((fixed - captures) / fixed * 100, 1) if fixed else 0.0,
+            "saved_mb": round(saved_bytes / 1024 / 1024, 1),
+            "saved_cpu_seconds": round(saved_cpu, 1),
+            "plants": {plant_id: {"interval_minutes": round(cadence.interval / 60, 1),
+                                  "change_per_hour": round(cadence.rate * 3600, 3) if cadence.rate is not None else None}
+                       for plant_id, cadence in sorted(self.plants.items())},
+            "targets": targets,
+        }
+
+    def save(self):
+        """상태 저장 (임시 파일 후 교체)"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.state_file.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"since": self.since, "last_tick": self.last_tick,
+                       "plants": {plant_id: cadence.to_dict() for plant_id, cadence in self.plants.items()},
+                       "targets": self.targets}, f, separators=(",", ":"))
+        os.replace(temp_path, self.state_file)
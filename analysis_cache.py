@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+내용 주소 기반 분석 결과 캐시
+- 키: (원본 이미지 내용 해시, 분석 지문)
+- 캐시 적중 시 이미지 디코딩 없이 결과 반환
+- 용량 상한 초과 시 가장 오래 사용하지 않은 항목부터 삭제
+- 원본 이미지로 분석 결과 조회
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# 해시 계산 시 한 번에 읽을 크기
+HASH_CHUNK_BYTES = 1 << 20
+# 내용 해시 메모 최대 항목 수 (조회 후 저장처럼 같은 이미지를 곧바로 다시 해시하는 경우만 덮으면 충분)
+HASH_MEMO_SIZE = 256
+
+
+class AnalysisCache:
+    """분석 결과 캐시 (cache_dir/<해시 앞 2자리>/<해시>/<지문>.json)"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 64 * 1024 * 1024):
+        """
+        캐시 초기화
+
+        Args:
+            cache_dir: 캐시 저장 디렉토리
+            max_bytes: 캐시 용량 상한 (바이트)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (경로, 크기, 수정 시각) → 내용 해시 (원본은 수정되지 않으므로 재해시 방지)
+        self._hash_memo: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()  # LRU, HASH_MEMO_SIZE 개까지
+        self.total_bytes = sum(entry.stat().st_size for entry in self._entries())
+        self.hits = 0
+        self.misses = 0
+
+    def _entries(self):
+        return self.cache_dir.glob("??/*/*.json")
+
+    def content_hash(self, image_path: str) -> str:
+        """원본 이미지 파일 내용의 SHA-256 (디코딩 없음)"""
+        stat = os.stat(image_path)
+        memo_key = (str(image_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hash_memo.get(memo_key)
+            if cached:
+                self._hash_memo.move_to_end(memo_key)
+                return cached
+
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+        with self._lock:
+            self._hash_memo[memo_key] = content_hash
+            if len(self._hash_memo) > HASH_MEMO_SIZE:
+                self._hash_memo.popitem(last=False)
+        return content_hash
+
+    def _source_dir(self, content_hash: str) -> Path:
+        return self.cache_dir / content_hash[:2] / content_hash
+
+    def get(self, image_path: str, fingerprint: str) -> Optional[Dict]:
+        """
+        캐시된 분석 결과 조회
+
+        Args:
+            image_path: 원본 이미지 경로
+            fingerprint: 분석 지문
+
+        Returns:
+            analysis_result: 캐시된 결과 (없으면 None)
+        """
+        try:
+            entry = self._source_dir(self.content_hash(image_path)) / f"{fingerprint}.json"
+            with open(entry, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+
+        # 접근 시각 갱신 (LRU 삭제 기준)
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        self.hits += 1
+        return result
+
+    def put(self, image_path: str, fingerprint: str, result: Dict):
+        """분석 결과 저장 (원자적 교체 후 용량 초과 시 정리)"""
+        content_hash = self.content_hash(image_path)
+        source_dir = self._source_dir(content_hash)
+        source_dir.mkdir(parents=True, exist_ok=True)
+        entry = source_dir / f"{fingerprint}.json"
+
+        payload = dict(result, source_hash=content_hash)
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        # 임시 파일 이름은 호출마다 고유 (같은 이미지·지문을 동시에 저장해도 내용이 섞이지 않음)
+        with tempfile.NamedTemporaryFile(dir=source_dir, prefix=f"{fingerprint}.", suffix=".tmp",
+                                         delete=False) as f:
+            f.write(data)
+            temp_path = f.name
+
+        with self._lock:
+            previous = entry.stat().st_size if entry.exists() else 0
+            os.replace(temp_path, entry)
+            self.total_bytes += len(data) - previous
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def lookup(self, image_path: str) -> Dict[str, Dict]:
+        """
+        원본 이미지의 모든 분석 결과 조회
+
+        Args:
+            image_path: 원본 이미지 경로
+
+        Returns:
+            results: 분석 지문 → 분석 결과
+        """
+        results = {}
+        source_dir = self._source_dir(self.content_hash(image_path))
+        for entry in sorted(source_dir.glob("*.json")):
+            try:
+                with open(entry, 'r', encoding='utf-8') as f:
+                    results[entry.stem] = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+        return results
+
+    def _evict(self):
+        """오래 사용하지 않은 항목부터 상한의 90% 이하가 될 때까지 삭제 (잠금 보유 상태에서 호출)"""
+        target = int(self.max_bytes * 0.9)
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        entries.sort()
+
+        for _, size, entry in entries:
+            if self.total_bytes <= target:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            self.total_bytes -= size
+            try:
+                entry.parent.rmdir()  # 비어 있을 때만 삭제됨
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict:
+        """캐시 통계"""
+        return {
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
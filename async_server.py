@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+비동기(asyncio) 웹 서버 모드
+- 스트림 연결(MJPEG, SSE)은 OS 스레드 대신 코루틴 하나 → 시청자가 늘어도 연결당 메모리 일정
+- 미리보기 JPEG 는 공유 프레임 소스의 스레드 하나가 프레임마다 한 번만 만들고 모든 시청자가 같은 bytes 를 전송
+- 느린 시청자는 전송 버퍼가 빠질 때까지 중간 프레임을 건너뜀 (연결당 버퍼는 쓰기 상한으로 제한)
+- 등록한 경로만 비동기 처리기로, 나머지는 기존 WSGI 앱(Flask)을 작은 스레드 풀에서 호출 → 라우트 정의 공유
+- 파일 응답은 loop.sendfile (평문 소켓이면 os.sendfile)
+"""
+
+import asyncio
+import io
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import unquote
+
+from event_logging import get_logger, log_event
+
+# 요청 헤더·본문 상한
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+# 연결당 전송 버퍼 상한 (넘으면 drain 에서 대기, 스트림은 그동안 프레임을 건너뜀)
+DEFAULT_WRITE_LIMIT = 256 * 1024
+
+# keep-alive 연결의 다음 요청 대기 시간
+KEEPALIVE_TIMEOUT = 15.0
+
+MJPEG_BOUNDARY = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
+MJPEG_HEADERS = {"Content-Type": "multipart/x-mixed-replace; boundary=frame", "Cache-Control": "no-cache"}
+SSE_HEADERS = {"Content-Type": "text/event-stream", "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+Chunk = Union[bytes, List[bytes]]
+
+
+class Headers(dict):
+    """대소문자 무관 요청 헤더"""
+
+    def __getitem__(self, key: str) -> str:
+        return super().__getitem__(key.lower())
+
+    def __contains__(self, key) -> bool:
+        return super().__contains__(key.lower())
+
+    def get(self, key: str, default=None):
+        return super().get(key.lower(), default)
+
+
+class Request:
+    """HTTP 요청"""
+
+    def __init__(self, method: str, target: str, version: str, headers: Headers, body: bytes,
+                 remote: Optional[Tuple] = None):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self.remote = remote
+        raw_path, _, self.query = target.partition("?")
+        self.raw_path = raw_path
+        self.path = unquote(raw_path)
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = (self.headers.get("Connection") or "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+class Response:
+    """HTTP 응답 (본문은 bytes, 비동기 스트림, 파일 구간 중 하나)"""
+
+    def __init__(self, status: int = 200, headers: Union[Dict[str, str], List[Tuple[str, str]]] = None,
+                 body: bytes = b"", stream: AsyncIterator[Chunk] = None,
+                 file: Tuple[str, int, int] = None):
+        """
+        Args:
+            status: 상태 코드
+            headers: 응답 헤더 (같은 이름이 여러 번이면 (이름, 값) 목록)
+            body: 본문
+            stream: 청크를 내보내는 비동기 생성기 (연결 종료로 본문 끝 표시)
+            file: (경로, 오프셋, 길이) 파일 구간 → sendfile
+        """
+        self.status = status
+        self.headers = list(headers.items()) if isinstance(headers, dict) else list(headers or [])
+        self.body = body
+        self.stream = stream
+        self.file = file
+
+
+class SharedFrameSource:
+    """스레드 하나가 만든 최신 프레임(JPEG bytes)을 이벤트 루프의 모든 시청자에게 공유"""
+
+    def __init__(self, produce: Callable[[int], Tuple[int, Optional[bytes]]],
+                 on_start: Callable[[], None] = None, on_stop: Callable[[], None] = None,
+                 name: str = "frame-source"):
+        """
+        Args:
+            produce: 이전 순번 → (새 순번, JPEG bytes), 새 프레임까지 대기 (시간 초과면 bytes 는 None)
+            on_start: 생산 스레드 시작 시 호출 (원본 스트림 구독 등)
+            on_stop: 시청자가 모두 나가 생산 스레드가 끝날 때 호출
+            name: 생산 스레드 이름
+        """
+        self._produce = produce
+        self._on_start = on_start
+        self._on_stop = on_stop
+        self.name = name
+        self.seq = 0
+        self.frame: Optional[bytes] = None
+        self.viewers = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+
+    def _run(self):
+        if self._on_start:
+            self._on_start()
+        source_seq = 0
+        try:
+            while True:
+                with self._lock:
+                    if self.viewers == 0:
+                        self._thread = None
+                        return
+                try:
+                    source_seq, frame = self._produce(source_seq)
+                except Exception as e:
+                    log_event(get_logger("web"), "web.frame_source_error", f"❌ 프레임 소스 오류 ({self.name}): {e}",
+                              logging.ERROR, source=self.name, error=str(e))
+                    continue
+                if frame is not None:
+                    try:
+                        self._loop.call_soon_threadsafe(self._publish, frame)
+                    except RuntimeError:  # 서버 종료로 루프가 닫힘
+                        return
+        finally:
+            if self._on_stop:
+                self._on_stop()
+
+    def _publish(self, frame: bytes):
+        """새 프레임 게시 (루프 스레드에서 실행)"""
+        self.seq += 1
+        self.frame = frame
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        """
+        새 프레임이 나올 때마다 최신 프레임 (느린 시청자는 그 사이 프레임을 건너뜀)
+
+        Yields:
+            frame: 모든 시청자가 공유하는 JPEG bytes
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._changed = asyncio.Event()
+        with self._lock:
+            self.viewers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        seen = self.seq
+        try:
+            while True:
+                if self.seq == seen:
+                    await self._changed.wait()
+                    continue
+                seen = self.seq
+                yield self.frame
+        finally:
+            with self._lock:
+                self.viewers -= 1
+
+
+async def mjpeg_stream(source: SharedFrameSource) -> AsyncIterator[List[bytes]]:
+    """MJPEG 본문 (경계·프레임·줄바꿈을 합치지 않고 그대로 전송 → 시청자별 프레임 복사 없음)"""
+    async for frame in source.frames():
+        yield [MJPEG_BOUNDARY, frame, b"\r\n"]
+
+
+class AsyncWebServer:
+    """asyncio HTTP/1.1 서버 (비동기 경로 + WSGI 대체 처리)"""
+
+    def __init__(self, wsgi_app: Callable = None, wsgi_workers: int = 4,
+                 write_limit: int = DEFAULT_WRITE_LIMIT):
+        """
+        Args:
+            wsgi_app: 등록되지 않은 경로를 처리할 WSGI 앱 (Flask app 등)
+            wsgi_workers: WSGI 호출 스레드 수
+            write_limit: 연결당 전송 버퍼 상한 (바이트)
+        """
+        self.wsgi_app = wsgi_app
+        self.write_limit = write_limit
+        self.logger = get_logger("web")
+        self._routes: List[Tuple[str, bool, Callable[[Request], Awaitable[Response]]]] = []
+        self._executor = ThreadPoolExecutor(max_workers=max(1, wsgi_workers), thread_name_prefix="wsgi")
+        self.connections = 0
+        self.streams = 0
+        self.host = None
+        self.port = None
+
+    def route(self, path: str, handler: Callable[[Request], Awaitable[Response]], prefix: bool = False):
+        """
+        비동기 처리기 등록
+
+        Args:
+            path: 경로 (prefix=True 면 이 경로로 시작하는 모든 요청)
+            handler: async def handler(request) -> Response
+            prefix: 접두사 일치 여부
+        """
+        self._routes.append((path, prefix, handler))
+
+    def run_blocking(self, function: Callable, *args):
+        """블로킹 함수를 WSGI 스레드 풀에서 실행 (처리기 안에서 await)"""
+        return asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def start(self, host: str = "0.0.0.0", port: int = 5000) -> asyncio.AbstractServer:
+        """서버 시작 (port=0 이면 빈 포트, 실제 포트는 self.port)"""
+        server = await asyncio.start_server(self._handle, host, port, limit=MAX_HEADER_BYTES)
+        self.host, self.port = server.sockets[0].getsockname()[:2]
+        log_event(self.logger, "web.async_start", f"⚡ 비동기 웹 서버 시작: http://{self.host}:{self.port}",
+                  host=self.host, port=self.port, routes=[path for path, _, _ in self._routes])
+        return server
+
+    def run(self, host: str = "0.0.0.0", port: int = 5000):
+        """서버 실행 (Ctrl+C 까지)"""
+        async def main():
+            server = await self.start(host, port)
+            async with server:
+                await server.serve_forever()
+
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def _match(self, path: str) -> Optional[Callable[[Request], Awaitable[Response]]]:
+        for route, prefix, handler in self._routes:
+            if path == route or (prefix and path.startswith(route)):
+                return handler
+        return None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """연결 하나 (keep-alive 면 여러 요청)"""
+        self.connections += 1
+        writer.transport.set_write_buffer_limits(high=self.write_limit)
+        try:
+            while True:
+                request = await self._read_request(reader, writer)
+                if request is None:
+                    break
+                if not await self._respond(request, writer):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Optional[Request]:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+        except asyncio.IncompleteReadError:
+            return None  # 요청 사이에 연결 종료
+        except asyncio.LimitOverrunError:
+            await self._send(None, Response(431, body=b"Request Header Fields Too Large"), writer)
+            return None
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            await self._send(None, Response(400, body=b"Bad Request"), writer)
+            return None
+        headers = Headers()
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                key = name.strip().lower()
+                headers[key] = f"{headers[key]}, {value.strip()}" if key in headers else value.strip()
+
+        if "transfer-encoding" in headers:
+            await self._send(None, Response(501, body=b"Chunked request bodies are not supported"), writer)
+            return None
+        try:
+            length = int(headers.get("Content-Length") or 0)
+        except ValueError:
+            await self._send(None, Response(400, body=b"Bad Request"), writer)
+            return None
+        if length > MAX_BODY_BYTES:
+            await self._send(None, Response(413, body=b"Payload Too Large"), writer)
+            return None
+        body = await reader.readexactly(length) if length else b""
+        return Request(method, target, version, headers, body, writer.get_extra_info("peername"))
+
+    async def _respond(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        handler = self._match(request.path)
+        try:
+            if handler is not None:
+                response = await handler(request)
+            elif self.wsgi_app is not None:
+                response = await self.run_blocking(self._call_wsgi, request)
+            else:
+                response = Response(404, body=b"Not Found")
+        except Exception as e:
+            log_event(self.logger, "web.handler_error", f"❌ 요청 처리 오류: {request.method} {request.path} - {e}",
+                      logging.ERROR, method=request.method, path=request.path, error=str(e))
+            response = Response(500, body=b"Internal Server Error")
+        return await self._send(request, response, writer)
+
+    async def _send(self, request: Optional[Request], response: Response, writer: asyncio.StreamWriter) -> bool:
+        """응답 전송 → 연결 유지 여부"""
+        keep_alive = request is not None and request.keep_alive and response.stream is None
+        headers = [(k, v) for k, v in response.headers if k.lower() not in ("connection", "content-length")]
+        if response.stream is None:
+            length = response.file[2] if response.file else len(response.body)
+            headers.append(("Content-Length", str(length)))
+        headers.append(("Connection", "keep-alive" if keep_alive else "close"))
+        try:
+            reason = HTTPStatus(response.status).phrase
+        except ValueError:
+            reason = ""
+        head = f"HTTP/1.1 {response.status} {reason}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers) + "\r\n"
+        writer.write(head.encode("latin-1"))
+
+        if request is not None and request.method == "HEAD":
+            if response.stream is not None:
+                await response.stream.aclose()
+        elif response.file is not None:
+            path, offset, count = response.file
+            await writer.drain()
+            with open(path, 'rb') as f:
+                await asyncio.get_running_loop().sendfile(writer.transport, f, offset, count)
+        elif response.stream is not None:
+            self.streams += 1
+            try:
+                async for chunk in response.stream:
+                    if isinstance(chunk, list):
+                        writer.writelines(chunk)
+                    else:
+                        writer.write(chunk)
+                    await writer.drain()
+            finally:
+                self.streams -= 1
+                await response.stream.aclose()
+        else:
+            writer.write(response.body)
+        await writer.drain()
+        return keep_alive
+
+    def _call_wsgi(self, request: Request) -> Response:
+        """WSGI 앱 호출 (스레드 풀에서 실행, 본문은 끝까지 모아 반환 → 무한 스트림 경로는 비동기로 등록)"""
+        host, _, port = (request.headers.get("Host") or f"{self.host}:{self.port}").partition(":")
+        environ = {
+            "REQUEST_METHOD": request.method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": request.path.encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": request.query,
+            "SERVER_NAME": host,
+            "SERVER_PORT": port or str(self.port),
+            "SERVER_PROTOCOL": request.version,
+            "REMOTE_ADDR": request.remote[0] if request.remote else "",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(request.body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for key, value in request.headers.items():
+            name = key.upper().replace("-", "_")
+            if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[name] = value
+            else:
+                environ[f"HTTP_{name}"] = value
+
+        started = {}
+        chunks = []
+
+        def start_response(status, response_headers, exc_info=None):
+            started["status"], started["headers"] = status, response_headers
+            return chunks.append
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for data in result:
+                chunks.append(data)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return Response(int(started["status"].split(" ", 1)[0]), started["headers"], b"".join(chunks))
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 자동화된 식물 모니터링 스케줄러
-- 정기적 이미지 촬영
+- 정기적 이미지 촬영 (고정 간격 또는 변화율 기반 적응형 간격)
 - 자동 분석 및 데이터 정리
 - 원본 이미지 보존 중심
 """
@@ -9,22 +9,32 @@
 import schedule
 import time
 import threading
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from plant_monitoring_system import PlantMonitoringSystem
+from event_logging import elapsed_ms, get_logger, log_event
+from event_bus import publish
+from adaptive_cadence import DEFAULT_SETTINGS as CADENCE_DEFAULTS, TICK_MINUTES, CadenceController, CaptureGroup
+from offload import run_offload
+from packfile import PackCompactor
 import logging
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 class AutomatedPlantMonitor:
     """자동화 식물 모니터링 클래스"""
     
-    def __init__(self, config_override: dict = None):
+    def __init__(self, config_override: dict = None, quiet: bool = False,
+                 monitoring_system: PlantMonitoringSystem = None):
         """
         자동 모니터링 시스템 초기화
         
         Args:
             config_override: 설정 오버라이드
+            quiet: 콘솔에는 경고 이상만 출력 (로그 파일은 그대로 기록)
+            monitoring_system: 공유할 모니터링 시스템 (웹 인터페이스 등, 없으면 새로 생성)
         """
-        self.monitoring_system = PlantMonitoringSystem()
+        self.monitoring_system = monitoring_system or PlantMonitoringSystem(quiet=quiet)
         self.is_running = False
         self.setup_logging()
         
@@ -35,39 +45,42 @@ class AutomatedPlantMonitor:
             "plants_to_monitor": [],  # 빈 리스트면 모든 등록된 식물
             "max_daily_captures": 10,  # 하루 최대 촬영 횟수
             "cleanup_days": 30,  # 30일 이후 정리
+            "adaptive_cadence": {},  # 적응형 간격 (enabled, min/max_interval_minutes, change_targets 등)
         }
         
         if config_override:
             self.auto_config.update(config_override)
+        cadence = dict(CADENCE_DEFAULTS)
+        cadence.update(self.auto_config["adaptive_cadence"] or {})
+        self.auto_config["adaptive_cadence"] = cadence
+        
+        # 적응형 간격: 식물별 변화율로 다음 촬영 시점 결정 (interval_minutes 는 비교 기준·시작 간격)
+        self.cadence: Optional[CadenceController] = None
+        if cadence["enabled"]:
+            self.cadence = CadenceController(self.monitoring_system.base_path / "analysis" / "cadence.json",
+                                             self.auto_config["interval_minutes"], cadence)
         
         self.daily_capture_count = {}
         self.setup_schedules()
     
     def setup_logging(self):
-        """로깅 설정"""
-        log_dir = self.monitoring_system.base_path / "logs"
-        log_dir.mkdir(exist_ok=True)
-        
-        # 일별 로그 파일
-        log_file = log_dir / f"monitoring_{datetime.now().strftime('%Y%m%d')}.log"
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
-        
-        self.logger = logging.getLogger(__name__)
+        """
+        로깅 설정
+        
+        큐 기반 로깅은 PlantMonitoringSystem 초기화 시 구성됨
+        (스케줄러 스레드는 큐에 넣기만 하고 파일 기록은 백그라운드 리스너가 담당)
+        """
+        self.logger = get_logger("scheduler")
     
     def setup_schedules(self):
         """스케줄 설정"""
         
-        # 정기 촬영 스케줄
+        # 정기 촬영 스케줄 (적응형이면 틱마다 간격이 지난 대상만)
         interval = self.auto_config["interval_minutes"]
-        schedule.every(interval).minutes.do(self.scheduled_capture)
+        if self.cadence is not None:
+            schedule.every(TICK_MINUTES).minutes.do(self.adaptive_capture)
+        else:
+            schedule.every(interval).minutes.do(self.scheduled_capture)
         
         # 일별 정리 작업 (매일 자정)
         schedule.every().day.at("00:00").do(self.daily_cleanup)
@@ -75,7 +88,17 @@ class AutomatedPlantMonitor:
         # 주간 시스템 점검 (매주 일요일 오전 6시)
         schedule.every().sunday.at("06:00").do(self.weekly_maintenance)
         
-        self.logger.info(f"📅 스케줄 설정 완료 - {interval}분마다 촬영, 활성 시간: {self.auto_config['active_hours']}")
+        # 오브젝트 스토리지 오프로드
+        offload_config = self.monitoring_system.config["offload"]
+        if offload_config["enabled"]:
+            schedule.every(offload_config["interval_minutes"]).minutes.do(self.scheduled_offload)
+        
+        if self.cadence is not None:
+            cadence = self.auto_config["adaptive_cadence"]
+            self.logger.info(f"📅 스케줄 설정 완료 - 적응형 간격 {cadence['min_interval_minutes']}~"
+                             f"{cadence['max_interval_minutes']}분, 활성 시간: {self.auto_config['active_hours']}")
+        else:
+            self.logger.info(f"📅 스케줄 설정 완료 - {interval}분마다 촬영, 활성 시간: {self.auto_config['active_hours']}")
     
     def is_active_time(self) -> bool:
         """현재 활성 시간인지 확인"""
@@ -104,47 +127,163 @@ class AutomatedPlantMonitor:
             return
         
         self.logger.info("🚀 자동 촬영 시작")
+        start = time.perf_counter()
         
         # 모니터링 대상 식물 결정
-        target_plants = self.auto_config["plants_to_monitor"]
-        if not target_plants:
-            target_plants = list(self.monitoring_system.config["plants"].keys())
-        
+        target_plants = self._target_plants()
         if not target_plants:
             self.logger.warning("🌱 등록된 식물이 없습니다 - 일반 촬영 실행")
             self._capture_single(None, "자동 촬영 - 일반")
             return
         
-        # 각 식물별 촬영
+        # 뷰·식물 촬영을 모두 파이프라인에 제출 (카메라 속도로 연속 획득, 인코딩·저장은 뒤에서 진행)
+        submitted = [(len(plant_ids), self._submit(kind, target, "자동 촬영"))
+                     for kind, target, plant_ids in self._capture_groups(target_plants)]
+        
         successful_captures = 0
-        for plant_id in target_plants:
-            try:
-                result = self._capture_single(plant_id, "자동 촬영")
-                if result:
-                    successful_captures += 1
-                    time.sleep(2)  # 촬영간 간격
-            except Exception as e:
-                self.logger.error(f"❌ {plant_id} 촬영 실패: {e}")
+        for count, capture in submitted:
+            if self._wait_capture(*capture):
+                successful_captures += count
         
         # 일일 카운트 업데이트
         today = datetime.now().strftime("%Y%m%d")
         self.daily_capture_count[today] = self.daily_capture_count.get(today, 0) + successful_captures
         
-        self.logger.info(f"✅ 자동 촬영 완료 - {successful_captures}/{len(target_plants)} 성공")
+        log_event(self.logger, "schedule.capture_done",
+                  f"✅ 자동 촬영 완료 - {successful_captures}/{len(target_plants)} 성공",
+                  successful=successful_captures, targets=len(target_plants),
+                  duration_ms=elapsed_ms(start))
+        publish("schedule", dict(self.get_monitoring_status(), last_run={
+            "successful": successful_captures,
+            "targets": len(target_plants),
+            "finished": datetime.now().isoformat()
+        }))
     
-    def _capture_single(self, plant_id: str, notes: str) -> bool:
-        """단일 촬영 수행"""
+    def adaptive_capture(self):
+        """적응형 간격 촬영 (스케줄러 틱마다 마지막 촬영 후 간격이 지난 식물·뷰만 촬영)"""
+        if not self.is_active_time():
+            return
+        target_plants = self._target_plants()
+        groups = self._capture_groups(target_plants) or [("plant", None, [])]  # 등록된 식물이 없으면 일반 촬영
+        due = self.cadence.tick(time.time(), groups)
+        if not due:
+            return
+        if not self.can_capture_today():
+            self.logger.warning("📵 일일 촬영 제한 초과 - 촬영 건너뜀")
+            return
+        
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        submitted = [(group, self._submit(group[0], group[1], "자동 촬영 (적응형)")) for group in due]
+        results = [(group, self._wait_capture(*capture)) for group, capture in submitted]
+        
+        # 자동 분석까지 끝나야 성장 통계에 새 값이 반영됨 → 변화율로 다음 간격 결정
+        self.monitoring_system.wait_for_captures()
+        cpu_per_capture = (time.process_time() - cpu_start) / len(results)
+        now = time.time()
+        successful_captures = 0
+        for group, result in results:
+            self.cadence.record_capture(group, now, result, cpu_per_capture)
+            if result is None:
+                continue
+            successful_captures += max(1, len(group[2]))
+            for plant_id in group[2]:
+                self._observe_growth(plant_id)
+        self.cadence.save()
+        
+        today = datetime.now().strftime("%Y%m%d")
+        self.daily_capture_count[today] = self.daily_capture_count.get(today, 0) + successful_captures
+        
+        log_event(self.logger, "schedule.capture_done",
+                  f"✅ 적응형 촬영 완료 - {successful_captures}개 식물 ({len(due)}/{len(target_plants)} 대상)",
+                  successful=successful_captures, due=len(due), targets=len(target_plants),
+                  duration_ms=elapsed_ms(start))
+        publish("schedule", dict(self.get_monitoring_status(), last_run={
+            "successful": successful_captures,
+            "targets": len(due),
+            "finished": datetime.now().isoformat()
+        }))
+    
+    def _observe_growth(self, plant_id: str):
+        """식물의 최신 성장 지표를 적응형 간격에 반영 (간격이 바뀌면 기록)"""
+        growth = self.monitoring_system.get_growth_stats(plant_id)
+        if not growth or not growth["last_sample"]:
+            return
+        values = {metric: summary["latest"] for metric, summary in growth["metrics"].items()
+                  if summary["latest"] is not None}
+        sample_time = datetime.fromisoformat(growth["last_sample"]).timestamp()
+        changed = self.cadence.observe(plant_id, sample_time, values)
+        if changed:
+            before, after = changed
+            log_event(self.logger, "schedule.cadence",
+                      f"⏱️ 촬영 간격 조정: {plant_id} {before / 60:.0f}분 → {after / 60:.0f}분",
+                      plant_id=plant_id, before_minutes=round(before / 60, 1), after_minutes=round(after / 60, 1))
+    
+    def _target_plants(self) -> List[str]:
+        """모니터링 대상 식물 (설정이 비어 있으면 등록된 전체)"""
+        return self.auto_config["plants_to_monitor"] or list(self.monitoring_system.config["plants"].keys())
+    
+    def _capture_groups(self, target_plants: List[str]) -> List[CaptureGroup]:
+        """대상 식물 → 촬영 단위 (공유 카메라 뷰에 속한 식물은 뷰 단위로 한 번만 촬영)"""
+        plants = self.monitoring_system.config["plants"]
+        views: Dict[str, List[str]] = {}
+        single_plants = []
+        for plant_id in target_plants:
+            view_id = plants.get(plant_id, {}).get("view_id")
+            if view_id:
+                views.setdefault(view_id, []).append(plant_id)
+            else:
+                single_plants.append(plant_id)
+        return ([("view", view_id, plant_ids) for view_id, plant_ids in views.items()] +
+                [("plant", plant_id, [plant_id]) for plant_id in single_plants])
+    
+    def _submit(self, kind: str, target: Optional[str], notes: str) -> Tuple[str, Optional[str], float, Future]:
+        """촬영 제출 → (종류, 대상, 제출 시각, 저장 완료 future)"""
+        start = time.perf_counter()
         try:
-            result = self.monitoring_system.capture_image(plant_id, notes)
-            if result:
-                self.logger.info(f"📸 촬영 성공: {plant_id or 'general'} - {result['filename']}")
-                return True
+            if kind == "view":
+                future = self.monitoring_system.submit_view_capture(target, notes)
             else:
-                self.logger.error(f"❌ 촬영 실패: {plant_id or 'general'}")
-                return False
+                future = self.monitoring_system.submit_capture(target, notes)
         except Exception as e:
-            self.logger.error(f"❌ 촬영 오류: {plant_id or 'general'} - {e}")
-            return False
+            future = Future()
+            future.set_exception(e)
+        return kind, target, start, future
+    
+    def _wait_capture(self, kind: str, target: Optional[str], start: float, future: Future) -> Optional[Dict]:
+        """제출한 촬영의 저장 완료 대기 및 결과 기록 (실패면 None)"""
+        fields = {"view_id": target} if kind == "view" else {"plant_id": target}
+        label = f"뷰 {target}" if kind == "view" else (target or 'general')
+        try:
+            result = future.result()
+        except Exception as e:
+            log_event(self.logger, "schedule.capture_error", f"❌ 촬영 오류: {label} - {e}", logging.ERROR,
+                      error=str(e), duration_ms=elapsed_ms(start), **fields)
+            return None
+        if not result:
+            log_event(self.logger, "schedule.capture_failed", f"❌ 촬영 실패: {label}", logging.ERROR,
+                      duration_ms=elapsed_ms(start), **fields)
+            return None
+        if kind == "view":
+            message = f"📸 뷰 촬영 성공: {target} ({len(result['plants'])}개 식물) - {result['filename']}"
+        else:
+            message = f"📸 촬영 성공: {label} - {result['filename']}"
+        log_event(self.logger, "schedule.capture_ok", message,
+                  filename=result['filename'], duration_ms=elapsed_ms(start), **fields)
+        return result
+    
+    def _capture_single(self, plant_id: str, notes: str) -> bool:
+        """단일 촬영 수행"""
+        return self._wait_capture(*self._submit("plant", plant_id, notes)) is not None
+    
+    def _capture_view(self, view_id: str, notes: str) -> bool:
+        """공유 카메라 뷰 촬영 수행 (뷰의 모든 식물 ROI 분석)"""
+        return self._wait_capture(*self._submit("view", view_id, notes)) is not None
+    
+    def scheduled_offload(self):
+        """오프로드 실행 (촬영 스케줄을 막지 않도록 별도 스레드, 실행 중이면 건너뜀)"""
+        threading.Thread(target=run_offload, args=(self.monitoring_system,),
+                         name="offload", daemon=True).start()
     
     def daily_cleanup(self):
         """일일 정리 작업"""
@@ -191,6 +330,11 @@ class AutomatedPlantMonitor:
             # 실제 정리는 안전상 수동으로 확인 후 실행하도록 권장
             self.logger.info("💡 수동 정리 권장: python3 -c \"from plant_monitoring_system import PlantMonitoringSystem; PlantMonitoringSystem().cleanup_old_files()\"")
         
+        # 오래된 촬영 팩 파일 압축 (작은 파일·inode 수 감소)
+        pack_after_days = self.monitoring_system.config["archive"]["pack_after_days"]
+        if pack_after_days > 0:
+            PackCompactor(self.monitoring_system.base_path, self.monitoring_system.packs).run(pack_after_days)
+        
         self.logger.info("✅ 주간 점검 완료")
     
     def start_monitoring(self):
@@ -199,6 +343,10 @@ class AutomatedPlantMonitor:
             self.logger.warning("⚠️ 모니터링이 이미 실행 중입니다")
             return
         
+        # 이전 중지 시 schedule.clear() 로 지워진 작업 복원
+        if not schedule.get_jobs():
+            self.setup_schedules()
+        
         self.is_running = True
         self.logger.info("🚀 자동 식물 모니터링 시작")
         
@@ -216,6 +364,7 @@ class AutomatedPlantMonitor:
         self.scheduler_thread.start()
         
         self.logger.info("✅ 백그라운드 모니터링 시작됨")
+        publish("schedule", self.get_monitoring_status())
     
     def stop_monitoring(self):
         """모니터링 중지"""
@@ -226,9 +375,11 @@ class AutomatedPlantMonitor:
         self.is_running = False
         self.logger.info("🛑 자동 식물 모니터링 중지")
         
-        # 스케줄 정리
+        # 스케줄 정리, 진행 중인 촬영 저장·분석 마무리
         schedule.clear()
+        self.monitoring_system.wait_for_captures()
         self.logger.info("✅ 모니터링 중지 완료")
+        publish("schedule", self.get_monitoring_status())
     
     def get_monitoring_status(self) -> dict:
         """모니터링 상태 조회"""
@@ -244,6 +395,8 @@ class AutomatedPlantMonitor:
             "active_hours": self.auto_config["active_hours"],
             "next_scheduled": self._get_next_scheduled_time()
         }
+        if self.cadence is not None:
+            status["adaptive_cadence"] = self.cadence.report()
         
         return status
     
@@ -294,6 +447,12 @@ def main():
             print(f"  촬영 간격: {status['interval_minutes']}분")
             print(f"  활성 시간대: {status['active_hours'][0]}시 ~ {status['active_hours'][1]}시")
             print(f"  다음 예정: {status['next_scheduled']}")
+            cadence = status.get("adaptive_cadence")
+            if cadence:
+                print(f"  적응형 간격: 촬영 {cadence['captures']}회 (고정 간격이면 약 {cadence['fixed_captures']:.0f}회), "
+                      f"절약 {cadence['saved_percent']}% · {cadence['saved_mb']}MB · CPU {cadence['saved_cpu_seconds']}초")
+                for plant_id, plant in cadence["plants"].items():
+                    print(f"    {plant_id}: {plant['interval_minutes']}분")
             
         elif choice == "4":
             print("\n⚙️ 설정 조정:")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+버스트 촬영 프레임 스택
+- 연속 프레임을 미리 할당한 링 버퍼에 기록 (프레임마다 새 배열을 만들지 않음)
+- 평균/중앙값 시간축 스택으로 저조도 노이즈 감소 (NumPy 벡터 연산, 결과 버퍼도 재사용)
+- 프레임 수는 메모리 상한 안에서만 허용
+"""
+
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+STACK_MODES = ("mean", "median")
+# uint16 합계에 반올림 보정(n // 2)까지 더해도 넘치지 않는 최대 프레임 수 (255 * 256 + 128 < 65536)
+MAX_STACK_FRAMES = 256
+
+
+def frames_within_budget(frames: int, shape: Tuple[int, int, int], max_bytes: int) -> int:
+    """
+    메모리 상한 안에서 가능한 버스트 프레임 수
+
+    Args:
+        frames: 요청한 프레임 수
+        shape: 프레임 크기 (높이, 너비, 채널)
+        max_bytes: 버스트 버퍼 전체 상한 (링 + 합계 + 결과)
+
+    Returns:
+        frames: 상한을 넘지 않도록 줄인 프레임 수 (최소 1)
+    """
+    frame_bytes = int(np.prod(shape))
+    # 합계 버퍼(uint16, 2바이트) + 결과 버퍼(1바이트) = 프레임 3장 분량
+    return max(1, min(frames, max_bytes // frame_bytes - 3))
+
+
+class BurstStack:
+    """버스트 프레임 링과 스택 결과 버퍼 (같은 크기의 버스트에 재사용)"""
+
+    def __init__(self, frames: int, shape: Tuple[int, int, int]):
+        """
+        버퍼 할당
+
+        Args:
+            frames: 링 슬롯 수 (최대 MAX_STACK_FRAMES, uint16 합계 범위)
+            shape: 프레임 크기 (높이, 너비, 채널)
+        """
+        if not 1 <= frames <= MAX_STACK_FRAMES:
+            raise ValueError(f"버스트 프레임 수는 1~{MAX_STACK_FRAMES} 이어야 합니다: {frames}")
+        self.shape = tuple(shape)
+        self.frames = np.empty((frames,) + self.shape, dtype=np.uint8)
+        self._sum = np.empty(self.shape, dtype=np.uint16)
+        self.result = np.empty(self.shape, dtype=np.uint8)
+        self.count = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.frames.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.frames.nbytes + self._sum.nbytes + self.result.nbytes
+
+    def fits(self, frames: int, shape: Tuple[int, int, int]) -> bool:
+        """같은 버퍼를 재사용할 수 있는지"""
+        return self.capacity == frames and self.shape == tuple(shape)
+
+    def reset(self):
+        self.count = 0
+
+    def next_slot(self) -> np.ndarray:
+        """다음 기록 슬롯 (cap.read(slot) 처럼 직접 기록 후 commit)"""
+        return self.frames[self.count]
+
+    def commit(self):
+        self.count += 1
+
+    def discard(self):
+        """마지막 프레임 취소 (읽는 도중 덮어써진 경우)"""
+        self.count = max(0, self.count - 1)
+
+    def add(self, frame: np.ndarray):
+        """프레임을 다음 슬롯에 복사 (크기가 다르면 슬롯 크기로 축소/확대)"""
+        slot = self.next_slot()
+        if frame.shape == slot.shape:
+            np.copyto(slot, frame)
+        else:
+            cv2.resize(frame, (self.shape[1], self.shape[0]), dst=slot)
+        self.commit()
+
+    def stack(self, mode: str = "mean") -> np.ndarray:
+        """
+        기록된 프레임을 시간축으로 스택
+
+        Args:
+            mode: "mean" (반올림 정수 평균) 또는 "median" (이상치·움직임에 강함)
+
+        Returns:
+            result: 스택 결과 (재사용 버퍼, 다음 버스트에서 덮어써짐)
+        """
+        n = self.count
+        if n == 0:
+            raise ValueError("스택할 프레임이 없습니다")
+        frames = self.frames[:n]
+
+        if n == 1:
+            np.copyto(self.result, frames[0])
+        elif mode == "median":
+            # 링 안에서 제자리 부분 정렬 (스택 후 링 순서는 의미 없음)
+            k = n // 2
+            if n % 2:
+                frames.partition(k, axis=0)
+                np.copyto(self.result, frames[k])
+            else:
+                frames.partition((k - 1, k), axis=0)
+                np.add(frames[k - 1], frames[k], out=self._sum, dtype=np.uint16)
+                np.add(self._sum, 1, out=self._sum)
+                np.right_shift(self._sum, 1, out=self._sum)
+                np.copyto(self.result, self._sum, casting="unsafe")
+        elif mode == "mean":
+            np.sum(frames, axis=0, dtype=np.uint16, out=self._sum)
+            np.add(self._sum, n // 2, out=self._sum)
+            np.floor_divide(self._sum, n, out=self._sum)
+            np.copyto(self.result, self._sum, casting="unsafe")
+        else:
+            raise ValueError(f"알 수 없는 스택 방식: {mode} (가능: {', '.join(STACK_MODES)})")
+        return self.result
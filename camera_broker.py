@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+카메라 브로커
+- 카메라 장치(/dev/video0)를 한 프로세스만 소유
+- 미리보기 프레임은 공유 메모리 링 버퍼로 게시 (소비자는 복사 없이 뷰로 읽음)
+- 제어(정보 조회, 고해상도 정지 영상 요청)는 로컬 유닉스 소켓으로 처리
+- 고해상도 정지 영상 요청은 캡처 스레드에서 미리보기 사이에 중재
+- 정지 영상 링은 요청마다 대여되고, 클라이언트가 읽은 뒤 반납할 때까지 다른 요청이 건드리지 않음
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from burst_stack import BurstStack
+from event_logging import get_logger, log_event, setup_logging, shutdown_logging
+
+# 공유 메모리 레이아웃
+RING_MAGIC = b"PCAM"
+RING_HEADER = struct.Struct("<4sIIIIQ")  # magic, slots, width, height, channels, latest_seq
+SLOT_HEADER = struct.Struct("<Qd")       # seq (0 = 기록 중), 게시 시각
+HEADER_SIZE = 64
+SLOT_HEADER_SIZE = 64
+
+DEFAULT_RING_SLOTS = 4
+STILL_WARMUP_FRAMES = 3  # 해상도 전환 직후 버릴 프레임 수
+MAX_BURST_FRAMES = 32    # 버스트 요청 한 번의 최대 프레임 수 (정지 영상 링 크기 상한)
+REQUEST_TIMEOUT = 15.0
+STILL_LEASE_TIMEOUT = 60.0  # 반납되지 않은 정지 영상 링 회수 시간 (클라이언트 비정상 종료 대비)
+
+
+def default_socket_path(base_path) -> Path:
+    """브로커 제어 소켓 기본 경로"""
+    return Path(base_path) / "run" / "camera_broker.sock"
+
+
+_tracker_lock = threading.Lock()
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """기존 공유 메모리 연결 (소비자 종료 시 세그먼트가 해제되지 않도록 추적 제외)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    # Python 3.12 이하: 연결만 해도 resource_tracker 에 등록되어 소비자 종료 시 세그먼트가
+    # 삭제되므로, 연결하는 동안만 등록을 건너뜀 (해제 책임은 생성한 브로커에 있음)
+    from multiprocessing import resource_tracker
+    with _tracker_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class FrameRing:
+    """공유 메모리 프레임 링 버퍼 (단일 기록자, 다중 독자)"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        magic, self.slots, self.width, self.height, self.channels, _ = RING_HEADER.unpack_from(shm.buf, 0)
+        if magic != RING_MAGIC:
+            raise ValueError(f"프레임 링 형식이 아닙니다: {shm.name}")
+        self.frame_bytes = self.width * self.height * self.channels
+        self.slot_size = SLOT_HEADER_SIZE + self.frame_bytes
+        self._views = [
+            np.ndarray((self.height, self.width, self.channels), dtype=np.uint8, buffer=shm.buf,
+                       offset=HEADER_SIZE + i * self.slot_size + SLOT_HEADER_SIZE)
+            for i in range(self.slots)
+        ]
+
+    @classmethod
+    def create(cls, name: str, slots: int, width: int, height: int, channels: int = 3) -> "FrameRing":
+        """새 링 생성 (브로커 전용)"""
+        size = HEADER_SIZE + slots * (SLOT_HEADER_SIZE + width * height * channels)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        RING_HEADER.pack_into(shm.buf, 0, RING_MAGIC, slots, width, height, channels, 0)
+        for i in range(slots):
+            SLOT_HEADER.pack_into(shm.buf, HEADER_SIZE + i * (SLOT_HEADER_SIZE + width * height * channels), 0, 0.0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameRing":
+        """기존 링 연결 (소비자용)"""
+        return cls(_attach_shared_memory(name))
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return (self.height, self.width, self.channels)
+
+    def latest_seq(self) -> int:
+        return RING_HEADER.unpack_from(self.shm.buf, 0)[5]
+
+    def _slot_offset(self, seq: int) -> int:
+        return HEADER_SIZE + (seq % self.slots) * self.slot_size
+
+    def _slot_seq(self, seq: int) -> int:
+        return SLOT_HEADER.unpack_from(self.shm.buf, self._slot_offset(seq))[0]
+
+    def begin_write(self) -> Tuple[int, np.ndarray]:
+        """다음 슬롯을 기록 중으로 표시하고 (seq, 슬롯 뷰) 반환"""
+        seq = self.latest_seq() + 1
+        SLOT_HEADER.pack_into(self.shm.buf, self._slot_offset(seq), 0, 0.0)
+        return seq, self._views[seq % self.slots]
+
+    def commit(self, seq: int):
+        """슬롯 기록 완료 후 게시"""
+        SLOT_HEADER.pack_into(self.shm.buf, self._slot_offset(seq), seq, time.time())
+        struct.pack_into("<Q", self.shm.buf, RING_HEADER.size - 8, seq)
+
+    def is_valid(self, seq: int) -> bool:
+        """슬롯이 아직 seq 프레임을 담고 있는지 (뷰 사용 후 확인용)"""
+        return seq > 0 and self._slot_seq(seq) == seq
+
+    def read(self, seq: int = None, copy: bool = True) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        프레임 읽기
+
+        Args:
+            seq: 읽을 프레임 번호 (없으면 최신)
+            copy: False 이면 공유 메모리 뷰를 그대로 반환 (사용 후 is_valid 로 확인)
+
+        Returns:
+            (seq, frame): 프레임이 없거나 덮어써졌으면 (seq, None)
+        """
+        if seq is None:
+            seq = self.latest_seq()
+        if not self.is_valid(seq):
+            return seq, None
+        view = self._views[seq % self.slots]
+        if not copy:
+            return seq, view
+        frame = view.copy()
+        return (seq, frame) if self.is_valid(seq) else (seq, None)
+
+    def close(self):
+        self._views = []
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class _StillRequest:
+    def __init__(self, width: int, height: int, count: int = 1):
+        self.width = width
+        self.height = height
+        self.count = count
+        self.done = threading.Event()
+        self.result: Dict = {"ok": False, "error": "시간 초과"}
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """제어 소켓 요청 처리 (한 연결에 JSON 한 줄 요청/응답)"""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            response = self.server.broker.handle_command(request)
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CameraBroker:
+    """카메라 장치를 소유하고 프레임을 게시하는 브로커"""
+
+    def __init__(self, base_path, camera_settings: Dict, socket_path: Path = None):
+        """
+        브로커 초기화
+
+        Args:
+            base_path: 데이터 저장 기본 경로
+            camera_settings: config.json 의 camera_settings
+            socket_path: 제어 소켓 경로 (없으면 기본 경로)
+        """
+        self.base_path = Path(base_path)
+        self.settings = camera_settings
+        self.socket_path = Path(socket_path or default_socket_path(base_path))
+        self.logger = get_logger("camera_broker")
+        self.cap = None
+        self.preview: Optional[FrameRing] = None
+        self._still_idle: Optional[FrameRing] = None  # 반납되어 재사용 대기 중인 링
+        self._still_leases: Dict[str, Tuple[FrameRing, float]] = {}  # 링 이름 → (링, 대여 시각)
+        self._still_lock = threading.Lock()
+        self._still_generation = 0
+        self._still_requests: "queue.Queue[_StillRequest]" = queue.Queue()
+        self._stop = threading.Event()
+        self._server = None
+        self._capture_thread = None
+
+    def _ring_name(self, kind: str) -> str:
+        return f"plant_cam_{os.getpid()}_{kind}"
+
+    def _set_resolution(self, width: int, height: int):
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    def _set_preview_mode(self):
+        self._set_resolution(self.settings["preview_width"], self.settings["preview_height"])
+        self.cap.set(cv2.CAP_PROP_FPS, self.settings["preview_fps"])
+
+    def start(self) -> bool:
+        """장치 열기, 링 생성, 캡처 스레드와 제어 소켓 시작"""
+        self.cap = cv2.VideoCapture(self.settings.get("device", 0))
+        if not self.cap.isOpened():
+            log_event(self.logger, "broker.camera_error", "❌ 카메라 브로커: 카메라 연결 실패", logging.ERROR)
+            return False
+        self._set_preview_mode()
+
+        # 실제 미리보기 해상도는 첫 프레임으로 결정
+        ret, frame = self.cap.read()
+        if not ret:
+            log_event(self.logger, "broker.read_error", "❌ 카메라 브로커: 첫 프레임 읽기 실패", logging.ERROR)
+            self.cap.release()
+            return False
+        height, width = frame.shape[:2]
+        self.preview = FrameRing.create(self._ring_name("preview"), self.settings.get("ring_slots", DEFAULT_RING_SLOTS),
+                                        width, height)
+
+        # 이전 실행이 남긴 소켓 정리
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            if broker_available(self.socket_path):
+                log_event(self.logger, "broker.already_running", "⚠️ 카메라 브로커가 이미 실행 중입니다", logging.WARNING)
+                self.stop()
+                return False
+            self.socket_path.unlink()
+
+        self._server = _ControlServer(str(self.socket_path), _ControlHandler)
+        self._server.broker = self
+        threading.Thread(target=self._server.serve_forever, name="broker-control", daemon=True).start()
+
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="broker-capture", daemon=True)
+        self._capture_thread.start()
+
+        log_event(self.logger, "broker.started", f"📷 카메라 브로커 시작: {width}x{height}, 소켓 {self.socket_path}",
+                  width=width, height=height, socket=str(self.socket_path), ring=self.preview.shm.name)
+        return True
+
+    def _capture_loop(self):
+        """미리보기 프레임 게시 루프 (정지 영상 요청은 프레임 사이에 처리)"""
+        while not self._stop.is_set():
+            try:
+                request = self._still_requests.get_nowait()
+            except queue.Empty:
+                request = None
+            if request is not None:
+                self._serve_still(request)
+                continue
+
+            seq, view = self.preview.begin_write()
+            ret, frame = self.cap.read(view)
+            if not ret:
+                time.sleep(0.1)
+                continue
+            if frame.shape != view.shape:
+                cv2.resize(frame, (self.preview.width, self.preview.height), dst=view)
+            elif frame.__array_interface__["data"][0] != view.__array_interface__["data"][0]:
+                np.copyto(view, frame)
+            self.preview.commit(seq)
+
+    def _serve_still(self, request: _StillRequest):
+        """고해상도 정지 영상(또는 연속 버스트) 촬영 (미리보기는 그동안 일시 정지)"""
+        start = time.perf_counter()
+        self._set_resolution(request.width, request.height)
+        for _ in range(STILL_WARMUP_FRAMES):
+            self.cap.grab()
+        ret, frame = self.cap.read()
+
+        if not ret:
+            self._set_preview_mode()
+            request.result = {"ok": False, "error": "정지 영상 촬영 실패"}
+            request.done.set()
+            return
+
+        # 이 요청 전용 링 대여 (클라이언트가 반납할 때까지 다른 요청이 덮어쓰거나 해제하지 않음)
+        still = self._lease_still_ring(frame.shape, request.count)
+        seq, view = still.begin_write()
+        np.copyto(view, frame)
+        still.commit(seq)
+        seqs = [seq]
+
+        # 버스트 나머지 프레임은 링 슬롯에 직접 기록
+        while len(seqs) < request.count:
+            seq, view = still.begin_write()
+            ret, frame = self.cap.read(view)
+            if not ret:
+                break
+            if frame.__array_interface__["data"][0] != view.__array_interface__["data"][0]:
+                np.copyto(view, frame)
+            still.commit(seq)
+            seqs.append(seq)
+        self._set_preview_mode()
+
+        request.result = {"ok": True, "shm": still.shm.name, "seq": seqs[-1], "seqs": seqs,
+                          "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
+        request.done.set()
+
+    def _lease_still_ring(self, shape: Tuple[int, int, int], slots: int) -> FrameRing:
+        """정지 영상 링 대여 (반납된 링의 크기가 맞으면 재사용, 아니면 새 이름으로 생성)"""
+        now = time.monotonic()
+        with self._still_lock:
+            for name, (ring, leased_at) in list(self._still_leases.items()):
+                if now - leased_at > STILL_LEASE_TIMEOUT:
+                    del self._still_leases[name]
+                    ring.close()
+            ring = self._still_idle
+            self._still_idle = None
+            if ring is not None and (ring.shape != tuple(shape) or ring.slots != slots):
+                ring.close()
+                ring = None
+            if ring is None:
+                self._still_generation += 1
+                height, width, channels = shape
+                ring = FrameRing.create(self._ring_name(f"still{self._still_generation}"), slots,
+                                        width, height, channels)
+            self._still_leases[ring.shm.name] = (ring, now)
+        return ring
+
+    def _release_still_ring(self, name: str) -> bool:
+        """클라이언트가 읽기를 마친 정지 영상 링 반납 (하나만 재사용용으로 보관)"""
+        with self._still_lock:
+            lease = self._still_leases.pop(name, None)
+            if lease is None:
+                return False
+            if self._still_idle is not None:
+                self._still_idle.close()
+            self._still_idle = lease[0]
+        return True
+
+    def handle_command(self, request: Dict) -> Dict:
+        """제어 명령 처리"""
+        command = request.get("cmd")
+        if command == "ping":
+            return {"ok": True}
+        if command == "info":
+            return {"ok": True, "shm": self.preview.shm.name, "width": self.preview.width,
+                    "height": self.preview.height, "slots": self.preview.slots,
+                    "fps": self.settings["preview_fps"]}
+        if command == "still":
+            still_request = _StillRequest(int(request.get("width") or self.settings["width"]),
+                                          int(request.get("height") or self.settings["height"]),
+                                          max(1, min(int(request.get("count") or 1), MAX_BURST_FRAMES)))
+            self._still_requests.put(still_request)
+            still_request.done.wait(REQUEST_TIMEOUT)
+            return still_request.result
+        if command == "release":
+            return {"ok": self._release_still_ring(str(request.get("shm")))}
+        return {"ok": False, "error": f"알 수 없는 명령: {command}"}
+
+    def stop(self):
+        """브로커 종료 및 자원 해제"""
+        self._stop.set()
+        if self._capture_thread:
+            self._capture_thread.join(timeout=2)
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+        with self._still_lock:
+            rings = [self.preview, self._still_idle] + [ring for ring, _ in self._still_leases.values()]
+            self._still_idle = None
+            self._still_leases.clear()
+        for ring in rings:
+            if ring is not None:
+                ring.close()
+        if self.cap is not None:
+            self.cap.release()
+        log_event(self.logger, "broker.stopped", "🛑 카메라 브로커 종료")
+
+    def serve_forever(self):
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+def _send_command(socket_path, payload: Dict, timeout: float = REQUEST_TIMEOUT) -> Dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("브로커 응답 없음")
+    return json.loads(line.decode("utf-8"))
+
+
+def broker_available(socket_path) -> bool:
+    """브로커가 실행 중이고 응답하는지 확인"""
+    if not Path(socket_path).exists():
+        return False
+    try:
+        return _send_command(socket_path, {"cmd": "ping"}, timeout=1.0).get("ok", False)
+    except (OSError, ValueError):
+        return False
+
+
+class CameraClient:
+    """브로커 소비자 (미리보기 링 읽기, 정지 영상 요청)"""
+
+    def __init__(self, socket_path):
+        self.socket_path = Path(socket_path)
+        info = _send_command(self.socket_path, {"cmd": "info"}, timeout=2.0)
+        if not info.get("ok"):
+            raise ConnectionError(info.get("error", "브로커 정보 조회 실패"))
+        self.fps = info["fps"]
+        self.preview = FrameRing.attach(info["shm"])
+        self._still: Optional[FrameRing] = None
+
+    def read_latest(self, copy: bool = True) -> Tuple[int, Optional[np.ndarray]]:
+        """최신 미리보기 프레임 (copy=False 이면 공유 메모리 뷰, 사용 후 is_current 로 확인)"""
+        return self.preview.read(copy=copy)
+
+    def is_current(self, seq: int) -> bool:
+        return self.preview.is_valid(seq)
+
+    def wait_frame(self, after_seq: int = 0, timeout: float = 2.0, copy: bool = True) -> Tuple[int, Optional[np.ndarray]]:
+        """after_seq 이후의 새 프레임이 게시될 때까지 대기"""
+        deadline = time.monotonic() + timeout
+        poll_interval = 0.5 / max(self.fps, 1)
+        while time.monotonic() < deadline:
+            seq = self.preview.latest_seq()
+            if seq > after_seq:
+                seq, frame = self.preview.read(seq, copy=copy)
+                if frame is not None:
+                    return seq, frame
+            time.sleep(poll_interval)
+        return after_seq, None
+
+    def _attach_still(self, name: str) -> FrameRing:
+        if self._still is None or self._still.shm.name != name:
+            if self._still is not None:
+                self._still.close()
+            self._still = FrameRing.attach(name)
+        return self._still
+
+    def _release_still(self, name: str):
+        """대여받은 정지 영상 링 반납 (실패해도 브로커가 시간 초과 후 회수)"""
+        try:
+            _send_command(self.socket_path, {"cmd": "release", "shm": name}, timeout=2.0)
+        except (OSError, ValueError):
+            pass
+
+    def capture_still(self, width: int = None, height: int = None) -> Optional[np.ndarray]:
+        """고해상도 정지 영상 요청 (브로커가 미리보기와 중재하여 촬영)"""
+        response = _send_command(self.socket_path, {"cmd": "still", "width": width, "height": height})
+        if not response.get("ok"):
+            return None
+        try:
+            _, frame = self._attach_still(response["shm"]).read(response["seq"], copy=True)
+        finally:
+            self._release_still(response["shm"])
+        return frame
+
+    def capture_burst(self, stack: BurstStack, width: int = None, height: int = None) -> int:
+        """
+        연속 버스트 촬영 요청 (브로커 링의 프레임을 호출자의 미리 할당된 스택에 복사)
+
+        Args:
+            stack: 프레임을 받을 버스트 스택 (capacity 만큼 요청)
+            width: 촬영 너비
+            height: 촬영 높이
+
+        Returns:
+            frames: 스택에 추가된 프레임 수
+        """
+        stack.reset()
+        response = _send_command(self.socket_path, {"cmd": "still", "width": width, "height": height,
+                                                     "count": stack.capacity})
+        if not response.get("ok"):
+            return 0
+        try:
+            still = self._attach_still(response["shm"])
+            for seq in response.get("seqs", [response["seq"]]):
+                _, view = still.read(seq, copy=False)
+                if view is not None:
+                    stack.add(view)
+        finally:
+            self._release_still(response["shm"])
+        return stack.count
+
+    def close(self):
+        for ring in (self.preview, self._still):
+            if ring is not None:
+                ring.close()
+        self._still = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def request_still(socket_path, width: int = None, height: int = None) -> Optional[np.ndarray]:
+    """브로커에 정지 영상 한 장 요청"""
+    with CameraClient(socket_path) as client:
+        return client.capture_still(width, height)
+
+
+def request_burst(socket_path, stack: BurstStack, width: int = None, height: int = None) -> int:
+    """브로커에 버스트 촬영 요청 → 스택에 추가된 프레임 수"""
+    with CameraClient(socket_path) as client:
+        return client.capture_burst(stack, width, height)
+
+
+def run_broker(base_path, camera_settings: Dict, socket_path=None):
+    """브로커 실행 (별도 프로세스 진입점, fork 된 자식은 종료 시 atexit 이 돌지 않으므로 직접 로그 정리)"""
+    setup_logging(Path(base_path) / "logs")
+    try:
+        broker = CameraBroker(base_path, camera_settings, socket_path)
+        if broker.start():
+            broker.serve_forever()
+    finally:
+        shutdown_logging()
+
+
+def ensure_broker(base_path, camera_settings: Dict, socket_path=None, wait: float = 10.0) -> bool:
+    """
+    브로커가 없으면 자식 프로세스로 시작
+
+    Returns:
+        available: 브로커 사용 가능 여부
+    """
+    socket_path = Path(socket_path or default_socket_path(base_path))
+    if broker_available(socket_path):
+        return True
+
+    process = multiprocessing.Process(target=run_broker, args=(str(base_path), camera_settings, str(socket_path)),
+                                      name="camera-broker", daemon=True)
+    process.start()
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline and process.is_alive():
+        if broker_available(socket_path):
+            return True
+        time.sleep(0.2)
+    return broker_available(socket_path)
+
+
+def main():
+    """메인 함수 - 독립 실행 브로커"""
+    from plant_monitoring_system import PlantMonitoringSystem
+
+    parser = argparse.ArgumentParser(description="카메라 브로커")
+    parser.add_argument("--base-path", default="/home/pi/plant_monitoring", help="데이터 저장 기본 경로")
+    args = parser.parse_args()
+
+    system = PlantMonitoringSystem(args.base_path)
+    broker = CameraBroker(system.base_path, system.config["camera_settings"])
+    if broker.start():
+        broker.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+촬영 파이프라인
+- 획득(grab) → JPEG 인코딩 → 저장(persist) → 후처리(자동 분석) 단계를 작업 스레드로 분리
+- 단계 사이는 크기 제한 큐 (메모리에 쌓이는 프레임 수 상한, 가득 차면 앞 단계가 대기)
+- 저장 단계는 큐에 쌓인 작업을 묶어 디렉토리 생성·파일 동기화·설정 저장을 한 번에
+- 호출자에게는 완료 future 반환 (저장이 끝나면 결과 설정, 연속 촬영은 카메라 속도로 진행)
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from event_logging import get_logger, log_event
+
+_STOP = object()
+
+
+class CaptureJob:
+    """촬영 작업 하나 (단계마다 필드가 채워짐)"""
+
+    def __init__(self, kind: str, target: Optional[str], notes: str = ""):
+        self.kind = kind  # "plant" 또는 "view"
+        self.target = target  # 식물 ID / 뷰 ID (일반 촬영이면 None)
+        self.notes = notes
+        self.start = time.perf_counter()
+        self.future: Future = Future()
+        self.fields: Dict = {}  # 단계 간 전달 값 (프레임, 경로, 인코딩 결과 등)
+        self.result = None  # 저장 단계가 채우는 호출자 반환값
+
+
+class CapturePipeline:
+    """단계별 작업 스레드와 크기 제한 큐"""
+
+    def __init__(self, grab: Callable[[CaptureJob], bool], encode: Callable[[CaptureJob], None],
+                 persist: Callable[[List[CaptureJob]], None], finish: Callable[[CaptureJob], None] = None,
+                 queue_size: int = 2, encode_workers: int = 2, batch_size: int = 8):
+        """
+        파이프라인 시작
+
+        Args:
+            grab: 프레임 획득 (실패 시 False → 결과 None)
+            encode: JPEG 인코딩
+            persist: 작업 묶음 저장 (각 작업의 result 설정)
+            finish: 저장 후 처리 (자동 분석 등, 결과 반환 후 실행)
+            queue_size: 단계 사이 큐 크기 (대기 중인 프레임 수 상한)
+            encode_workers: 인코딩 스레드 수 (cv2.imencode 는 GIL 을 놓음)
+            batch_size: 저장 단계가 한 번에 묶는 최대 작업 수
+        """
+        self.logger = get_logger("pipeline")
+        self._grab = grab
+        self._encode = encode
+        self._persist = persist
+        self._finish = finish
+        self.batch_size = max(1, batch_size)
+
+        self._requests = queue.Queue(maxsize=max(1, queue_size))
+        self._encode_queue = queue.Queue(maxsize=max(1, queue_size))
+        self._persist_queue = queue.Queue(maxsize=max(1, queue_size) * 2)
+        self._finish_queue = queue.Queue(maxsize=max(1, queue_size) * 4)
+
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._closed = False
+        self._encoders_stopped = 0
+
+        self._threads = [threading.Thread(target=self._grab_loop, name="capture-grab", daemon=True)]
+        self._encoders = [threading.Thread(target=self._encode_loop, name=f"capture-encode-{i}", daemon=True)
+                          for i in range(max(1, encode_workers))]
+        self._threads += self._encoders
+        self._threads.append(threading.Thread(target=self._persist_loop, name="capture-persist", daemon=True))
+        self._threads.append(threading.Thread(target=self._finish_loop, name="capture-finish", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job: CaptureJob) -> Future:
+        """작업 제출 (획득 대기열이 가득 차면 빌 때까지 대기)"""
+        if self._closed:
+            raise RuntimeError("촬영 파이프라인이 종료되었습니다")
+        with self._idle:
+            self._pending += 1
+        self._requests.put(job)
+        return job.future
+
+    def drain(self, timeout: float = None) -> bool:
+        """
+        제출된 작업이 후처리까지 모두 끝날 때까지 대기
+
+        Returns:
+            drained: 시간 안에 끝났는지
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: float = None):
+        """남은 작업을 마치고 작업 스레드 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self.drain(timeout)
+        self._requests.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _done(self):
+        with self._idle:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _fail(self, jobs: List[CaptureJob], stage: str, error: Exception):
+        for job in jobs:
+            log_event(self.logger, "capture.pipeline_error",
+                      f"❌ 촬영 파이프라인 오류 ({stage}): {job.target or 'general'} - {error}", logging.ERROR,
+                      stage=stage, kind=job.kind, target=job.target, error=str(error))
+            if not job.future.done():
+                job.future.set_exception(error)
+            self._done()
+
+    def _grab_loop(self):
+        while True:
+            job = self._requests.get()
+            if job is _STOP:
+                for _ in self._encoders:
+                    self._encode_queue.put(_STOP)
+                return
+            try:
+                ok = self._grab(job)
+            except Exception as e:
+                self._fail([job], "grab", e)
+                continue
+            if not ok:
+                job.future.set_result(None)
+                self._done()
+                continue
+            self._encode_queue.put(job)
+
+    def _encode_loop(self):
+        while True:
+            job = self._encode_queue.get()
+            if job is _STOP:
+                # 마지막 인코더가 저장 단계에 종료 전달
+                with self._idle:
+                    self._encoders_stopped += 1
+                    last = self._encoders_stopped == len(self._encoders)
+                if last:
+                    self._persist_queue.put(_STOP)
+                return
+            try:
+                self._encode(job)
+            except Exception as e:
+                self._fail([job], "encode", e)
+                continue
+            self._persist_queue.put(job)
+
+    def _persist_loop(self):
+        stopping = False
+        while not stopping:
+            batch = [self._persist_queue.get()]
+            # 이미 쌓여 있는 작업은 기다리지 않고 함께 저장
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._persist_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [job for job in batch if job is not _STOP]
+            if not batch:
+                continue
+            try:
+                self._persist(batch)
+            except Exception as e:
+                self._fail(batch, "persist", e)
+                continue
+            for job in batch:
+                job.future.set_result(job.result)
+                self._finish_queue.put(job)
+        self._finish_queue.put(_STOP)
+
+    def _finish_loop(self):
+        while True:
+            job = self._finish_queue.get()
+            if job is _STOP:
+                return
+            try:
+                if self._finish is not None:
+                    self._finish(job)
+            except Exception as e:
+                log_event(self.logger, "capture.finish_error",
+                          f"❌ 촬영 후처리 오류: {job.target or 'general'} - {e}", logging.ERROR,
+                          kind=job.kind, target=job.target, error=str(e))
+            finally:
+                self._done()
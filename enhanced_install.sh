@@ -152,6 +152,9 @@ pip install requests
 log_info "PlantCV 설치 시도 중..."
 pip install plantcv || log_warning "PlantCV 설치 실패 (선택사항이므로 계속 진행)"
 
+# 오브젝트 스토리지 오프로드용 (선택사항)
+pip install boto3 || log_warning "boto3 설치 실패 (오프로드 기능 외에는 영향 없음)"
+
 # 프로젝트 디렉토리 생성
 log_info "프로젝트 디렉토리 설정 중..."
 mkdir -p $HOME/plant_monitoring/{data,logs,config,models}
@@ -167,6 +170,14 @@ if [ -f "automated_monitoring.py" ]; then
     log_success "automated_monitoring.py 복사 완료"
 fi
 
+# 보조 모듈 복사
+for module in event_logging.py event_bus.py vegetation_indices.py tiled_analysis.py burst_stack.py capture_pipeline.py analysis_cache.py growth_stats.py metric_rollups.py adaptive_cadence.py camera_broker.py reanalysis.py offload.py packfile.py frame_stack.py timelapse.py image_serving.py async_server.py stream_load_test.py fleet_simulator.py; do
+    if [ -f "$module" ]; then
+        cp "$module" $HOME/plant_monitoring/
+        log_success "$module 복사 완료"
+    fi
+done
+
 # 실시간 웹 인터페이스 복사 (강제 덮어쓰기)
 if [ -f "web_interface.py" ]; then
     cp web_interface.py $HOME/plant_monitoring/web_interface.py
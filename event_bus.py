@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+프로세스 내 이벤트 버스
+- 촬영, 분석, 스케줄러가 이벤트를 게시
+- 이벤트는 한 번만 직렬화하여 최근 기록에 보관, 모든 구독자가 같은 객체를 공유
+- 구독자는 조건 변수에서 대기하므로 유휴 연결은 CPU 를 쓰지 않음
+- Server-Sent Events 형식 지원 (Last-Event-ID 재연결 포함, ID 에 부팅별 에포크 접두어)
+- asyncio 구독 지원 (이벤트 루프마다 알림 하나 → 구독자 수와 무관하게 게시당 스레드 간 호출 한 번)
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+DEFAULT_HISTORY = 100
+DEFAULT_KEEPALIVE = 15.0
+
+
+class Event:
+    """게시된 이벤트 (SSE 프레임은 게시 시점에 한 번만 생성)"""
+
+    __slots__ = ("id", "type", "data", "time", "sse")
+
+    def __init__(self, event_id: int, event_type: str, data: Dict, epoch: str = ""):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self.time = time.time()
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        sse_id = f"{epoch}-{event_id}" if epoch else str(event_id)
+        self.sse = f"id: {sse_id}\nevent: {event_type}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class EventBus:
+    """최근 기록 링 + 조건 변수 기반 팬아웃 버스"""
+
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        self._events = deque(maxlen=history)
+        self._condition = threading.Condition()
+        self._next_id = 1
+        self.epoch = f"{int(time.time() * 1000):x}"  # 재시작하면 ID 가 1 부터 다시 시작하므로 부팅마다 구분
+        self.subscribers = 0
+        self._loop_signals: Dict[asyncio.AbstractEventLoop, asyncio.Event] = {}  # 비동기 구독자가 있는 루프
+        self._loop_subscribers: Dict[asyncio.AbstractEventLoop, int] = {}
+
+    def publish(self, event_type: str, data: Dict) -> Event:
+        """
+        이벤트 게시 (대기 중인 모든 구독자를 깨움)
+
+        Args:
+            event_type: 이벤트 종류 (capture, analysis, schedule, stats 등)
+            data: JSON 직렬화 가능한 이벤트 데이터
+
+        Returns:
+            event: 게시된 이벤트
+        """
+        with self._condition:
+            event = Event(self._next_id, event_type, data, self.epoch)
+            self._next_id += 1
+            self._events.append(event)
+            self._condition.notify_all()
+            loops = list(self._loop_signals)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._wake, loop)
+            except RuntimeError:  # 이미 닫힌 루프
+                pass
+        return event
+
+    def _wake(self, loop: asyncio.AbstractEventLoop):
+        """루프의 비동기 구독자 깨우기 (루프 스레드에서 실행, 다음 대기용 새 신호로 교체)"""
+        with self._condition:
+            signal = self._loop_signals.get(loop)
+            if signal is not None:
+                self._loop_signals[loop] = asyncio.Event()
+        if signal is not None:
+            signal.set()
+
+    def _cursor(self, last_event_id: Optional[str]) -> int:
+        """
+        Last-Event-ID 를 구독 커서로 변환 (조건 변수 잠금 안에서 호출)
+
+        다른 에포크(재시작 전)의 ID, 잘못된 값, 아직 발급되지 않은 ID 는
+        모두 현재 위치로 취급 → 재연결한 브라우저가 keepalive 만 받으며 멈추지 않음
+        """
+        current = self._next_id - 1
+        if not last_event_id:
+            return current
+        epoch, sep, number = str(last_event_id).rpartition("-")
+        if sep and epoch != self.epoch:
+            return current
+        try:
+            cursor = int(number)
+        except ValueError:
+            return current
+        return cursor if 0 <= cursor <= current else current
+
+    def _since(self, cursor: int) -> List[Event]:
+        return [event for event in self._events if event.id > cursor]
+
+    def recent(self, limit: int = 20, event_type: str = None) -> List[Event]:
+        """최근 이벤트 조회 (새 구독자 초기 화면용)"""
+        with self._condition:
+            events = [e for e in self._events if event_type is None or e.type == event_type]
+        return events[-limit:]
+
+    def listen(self, last_event_id: Optional[str] = None,
+               keepalive: float = DEFAULT_KEEPALIVE) -> Iterator[Optional[Event]]:
+        """
+        이벤트 구독
+
+        Args:
+            last_event_id: 재연결 시 마지막으로 받은 이벤트 ID (이후 이벤트부터 전달)
+            keepalive: 이 시간 동안 이벤트가 없으면 None 을 내보냄 (연결 유지용)
+
+        Yields:
+            event: 새 이벤트 (대기 시간 초과 시 None)
+        """
+        with self._condition:
+            cursor = self._cursor(last_event_id)
+            self.subscribers += 1
+
+        try:
+            while True:
+                with self._condition:
+                    events = self._since(cursor)
+                    if not events:
+                        self._condition.wait(keepalive)
+                        events = self._since(cursor)
+                if not events:
+                    yield None
+                    continue
+                for event in events:
+                    cursor = event.id
+                    yield event
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    async def alisten(self, last_event_id: Optional[str] = None,
+                      keepalive: float = DEFAULT_KEEPALIVE) -> AsyncIterator[Optional[Event]]:
+        """
+        이벤트 비동기 구독 (listen 과 같은 동작, 스레드 대신 코루틴으로 대기)
+
+        Args:
+            last_event_id: 재연결 시 마지막으로 받은 이벤트 ID
+            keepalive: 이 시간 동안 이벤트가 없으면 None 을 내보냄
+
+        Yields:
+            event: 새 이벤트 (대기 시간 초과 시 None)
+        """
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            cursor = self._cursor(last_event_id)
+            self.subscribers += 1
+            self._loop_signals.setdefault(loop, asyncio.Event())
+            self._loop_subscribers[loop] = self._loop_subscribers.get(loop, 0) + 1
+
+        try:
+            while True:
+                with self._condition:
+                    events = self._since(cursor)
+                    signal = self._loop_signals[loop]  # 확인 후 게시되면 이 신호가 켜짐
+                if not events:
+                    try:
+                        await asyncio.wait_for(signal.wait(), keepalive)
+                    except asyncio.TimeoutError:
+                        yield None
+                    continue
+                for event in events:
+                    cursor = event.id
+                    yield event
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+                self._loop_subscribers[loop] -= 1
+                if not self._loop_subscribers[loop]:
+                    del self._loop_subscribers[loop], self._loop_signals[loop]
+
+
+# 기본 버스 (같은 프로세스의 시스템, 스케줄러, 웹 인터페이스가 공유)
+default_bus = EventBus()
+
+
+def publish(event_type: str, data: Dict) -> Event:
+    """기본 버스에 이벤트 게시"""
+    return default_bus.publish(event_type, data)
+
+
+def sse_stream(bus: EventBus = None, last_event_id: Optional[str] = None,
+               keepalive: float = DEFAULT_KEEPALIVE) -> Iterator[bytes]:
+    """SSE 응답 본문 생성기"""
+    bus = bus or default_bus
+    yield b"retry: 5000\n\n"
+    for event in bus.listen(last_event_id, keepalive):
+        yield event.sse if event is not None else b": keepalive\n\n"
+
+
+async def sse_astream(bus: EventBus = None, last_event_id: Optional[str] = None,
+                      keepalive: float = DEFAULT_KEEPALIVE) -> AsyncIterator[bytes]:
+    """SSE 응답 본문 비동기 생성기"""
+    bus = bus or default_bus
+    yield b"retry: 5000\n\n"
+    async for event in bus.alisten(last_event_id, keepalive):
+        yield event.sse if event is not None else b": keepalive\n\n"
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+비차단 구조화 로깅
+- 호출 스레드는 큐에 기록만 하고, 파일 I/O 는 백그라운드 리스너가 처리
+- 로그 파일은 JSON Lines (이벤트 이름, 소요 시간 등 필드 포함)
+- 콘솔 출력은 사람이 읽는 메시지, quiet 모드에서는 경고 이상만 출력
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Optional
+
+# 시스템 전체 로거 이름 (하위 로거: plant_monitoring.system, plant_monitoring.scheduler 등)
+LOGGER_NAME = "plant_monitoring"
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None  # 리스너를 시작한 프로세스 (fork 한 자식에는 리스너 스레드가 없음)
+_console_handler: Optional[logging.Handler] = None
+_log_file: Optional[Path] = None
+_quiet = False
+
+
+class JsonLineFormatter(logging.Formatter):
+    """로그 레코드를 한 줄 JSON 으로 변환"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _stamp_quiet(record: logging.LogRecord) -> bool:
+    """큐에 넣는 시점의 quiet 설정을 레코드에 기록 (리스너 처리 시점과 무관하게 적용)"""
+    record.quiet = _quiet
+    return True
+
+
+def _console_filter(record: logging.LogRecord) -> bool:
+    return record.levelno >= logging.WARNING or not getattr(record, "quiet", False)
+
+
+def setup_logging(log_dir: Path, quiet: bool = False, level: int = logging.INFO) -> Path:
+    """
+    큐 기반 로깅 설정 (프로세스당 한 번 구성, 이후 호출은 quiet 설정만 갱신)
+
+    fork 로 만든 자식 프로세스는 부모의 리스너 상태만 물려받고 리스너 스레드는 없으므로,
+    다른 프로세스에서 호출되면 물려받은 큐 핸들러를 버리고 새로 구성
+
+    Args:
+        log_dir: 로그 파일 디렉토리
+        quiet: True 이면 콘솔에는 경고 이상만 출력 (배치 작업용)
+        level: 기록할 최소 로그 레벨
+
+    Returns:
+        log_file: JSON Lines 로그 파일 경로
+    """
+    global _listener, _listener_pid, _console_handler, _log_file, _quiet
+
+    with _lock:
+        if _listener is not None and _listener_pid != os.getpid():
+            _listener = None
+            _remove_queue_handlers()
+
+        if _listener is None:
+            log_dir = Path(log_dir)
+            log_dir.mkdir(parents=True, exist_ok=True)
+            _log_file = log_dir / f"monitoring_{datetime.now().strftime('%Y%m%d')}.jsonl"
+
+            file_handler = logging.FileHandler(_log_file, encoding='utf-8')
+            file_handler.setFormatter(JsonLineFormatter())
+
+            _console_handler = logging.StreamHandler(sys.stdout)
+            _console_handler.setFormatter(logging.Formatter('%(message)s'))
+            _console_handler.addFilter(_console_filter)
+
+            # 큐는 무제한 → 호출 스레드는 디스크 상태와 무관하게 즉시 반환
+            log_queue = queue.SimpleQueue()
+            _listener = QueueListener(log_queue, file_handler, _console_handler,
+                                      respect_handler_level=True)
+            _listener.start()
+            if _listener_pid is None:
+                atexit.register(shutdown_logging)
+            _listener_pid = os.getpid()
+
+            logger = logging.getLogger(LOGGER_NAME)
+            queue_handler = QueueHandler(log_queue)
+            queue_handler.addFilter(_stamp_quiet)
+            logger.addHandler(queue_handler)
+            logger.setLevel(level)
+            logger.propagate = False
+
+        _quiet = quiet
+        return _log_file
+
+
+def _remove_queue_handlers():
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        if isinstance(handler, QueueHandler):
+            logger.removeHandler(handler)
+
+
+def shutdown_logging():
+    """남은 로그를 모두 기록하고 리스너 종료"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            if _listener_pid == os.getpid():
+                _listener.stop()
+            _listener = None
+            _remove_queue_handlers()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """시스템 하위 로거 조회"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def log_event(logger: logging.Logger, event: str, message: str, level: int = logging.INFO, **fields):
+    """
+    구조화 이벤트 기록
+
+    Args:
+        logger: 대상 로거
+        event: 이벤트 이름 (예: capture.saved)
+        message: 사람이 읽는 메시지 (콘솔 출력용)
+        level: 로그 레벨
+        **fields: JSON 레코드에 추가할 필드 (duration_ms 등)
+    """
+    logger.log(level, message, extra={"event": event, "fields": fields})
+
+
+def elapsed_ms(start: float) -> float:
+    """time.perf_counter() 기준 경과 시간 (밀리초)"""
+    return round((time.perf_counter() - start) * 1000, 1)
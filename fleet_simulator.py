@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+대규모 식물 모니터링 부하 시뮬레이터
+- 가상 식물 수백 개를 register_plant 로 등록하고, 재생 이미지 세트를 카메라 대신 사용
+- AutomatedPlantMonitor 의 정기 촬영·정리·주간 점검을 가상 시계로 가속 실행
+  (대기 시간은 건너뛰고 실제 작업 시간만 흐름 → 작업이 밀리면 놓친 슬롯으로 집계)
+- --adaptive: 적응형 촬영 간격으로 실행해 고정 간격 대비 줄인 촬영·저장 용량·CPU 시간 보고
+  (합성 이미지는 가상 시각 기준으로 식물마다 다른 속도로 자람, 일부는 휴면)
+- 촬영 지연 백분위, 놓친 스케줄 슬롯, 디스크 쓰기량, 메모리 증가를 보고
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import time
+import types
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import schedule
+
+import automated_monitoring
+import growth_stats
+import packfile
+import plant_monitoring_system
+from adaptive_cadence import DEFAULT_SETTINGS as CADENCE_DEFAULTS, TICK_MINUTES
+from automated_monitoring import AutomatedPlantMonitor
+from event_logging import get_logger, log_event
+from plant_monitoring_system import PlantMonitoringSystem
+
+# 시뮬레이션 데이터 디렉토리 표시 (--fresh 는 이 파일이 있는 디렉토리만 삭제)
+SIMULATION_MARKER = ".fleet_simulation"
+
+# 재생 프레임마다 찍는 촬영 번호 (JPEG 블록 크기의 칸 STAMP_BITS 개)
+STAMP_BLOCK = 8
+STAMP_BITS = 32
+
+
+class VirtualClock:
+    """가상 시계 (실제 경과 시간 + 건너뛴 대기 시간)"""
+
+    def __init__(self, start: datetime):
+        self.offset = start.timestamp() - time.time()
+
+    def timestamp(self) -> float:
+        return time.time() + self.offset
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp())
+
+    def sleep(self, seconds: float):
+        """대기 대신 가상 시계만 진행"""
+        self.offset += max(0.0, seconds)
+
+    def advance_to(self, moment: datetime):
+        """moment 까지 대기한 것으로 처리 (이미 지났으면 그대로)"""
+        self.offset += max(0.0, moment.timestamp() - self.timestamp())
+
+
+class _PatchedClock:
+    """시스템·스케줄러 모듈의 datetime.now / time.sleep 을 가상 시계로 교체 (시뮬레이션 동안만)"""
+
+    MODULES = (plant_monitoring_system, automated_monitoring, growth_stats, packfile)
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self._saved = []
+
+    def __enter__(self):
+        clock = self.clock
+
+        class SimulatedDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now()
+
+        for module in self.MODULES:
+            self._saved.append((module, "datetime", module.datetime))
+            module.datetime = SimulatedDatetime
+        simulated_time = types.SimpleNamespace(perf_counter=time.perf_counter, process_time=time.process_time,
+                                               time=clock.timestamp, sleep=clock.sleep)
+        self._saved.append((automated_monitoring, "time", automated_monitoring.time))
+        automated_monitoring.time = simulated_time
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, value in reversed(self._saved):
+            setattr(module, name, value)
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+    array = np.asarray(values)
+    p50, p90, p99 = np.percentile(array, [50, 90, 99])
+    return {"count": len(values), "p50": round(float(p50), 1), "p90": round(float(p90), 1),
+            "p99": round(float(p99), 1), "max": round(float(array.max()), 1),
+            "mean": round(float(array.mean()), 1)}
+
+
+def _rss_mb() -> float:
+    """현재 상주 메모리 (MB)"""
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _written_bytes() -> Optional[int]:
+    """프로세스가 write 로 기록한 누적 바이트 (/proc/self/io, 없으면 None)"""
+    try:
+        with open("/proc/self/io", 'r') as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _storage_usage(base_path: Path) -> Tuple[int, int]:
+    """기본 경로 아래 (파일 수, 바이트)"""
+    files = total = 0
+    for root, _, names in os.walk(base_path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+                files += 1
+            except OSError:
+                continue
+    return files, total
+
+
+# 합성 식물의 성장 속도 (식물 순번 % 4 → 최대 크기까지 걸리는 일수, None 은 휴면)
+SYNTHETIC_GROWTH_DAYS = (2, 7, 30, None)
+
+
+class ReplayCamera:
+    """재생 이미지 세트 (식물마다 시작 위치가 다른 순환 재생)"""
+
+    def __init__(self, width: int, height: int, image_dir: Path = None, max_images: int = 16, seed: int = 0,
+                 origin: float = None):
+        """
+        이미지 세트 준비 (한 번만 디코딩·크기 조정)
+
+        Args:
+            width: 촬영 너비
+            height: 촬영 높이
+            image_dir: 재생할 JPEG 디렉토리 (없으면 합성 이미지)
+            max_images: 메모리에 올릴 최대 이미지 수
+            seed: 합성 이미지 난수 시드
+            origin: 합성 식물 성장 시작 시각 (epoch 초, 가상 시각 기준)
+        """
+        self.frames: List[np.ndarray] = []
+        self.synthetic = False
+        self.origin = origin
+        if image_dir:
+            for path in sorted(Path(image_dir).rglob("*.jpg"))[:max_images]:
+                img = cv2.imread(str(path))
+                if img is not None:
+                    self.frames.append(cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA))
+        if not self.frames:
+            # 배경 한 장 + 촬영 시각에 따라 커지는 녹색 원 (녹색 비율이 변하도록)
+            self.synthetic = True
+            rng = np.random.default_rng(seed)
+            self.frames.append(rng.integers(20, 90, (height, width, 3), dtype=np.uint8))
+        self._counter = 0
+
+    def _radius(self, plant_index: int, moment: float) -> int:
+        """합성 식물 크기 (식물마다 다른 속도로 최대 크기까지 자란 뒤 유지)"""
+        height, width = self.frames[0].shape[:2]
+        small, large = min(width, height) * 0.2, min(width, height) * 0.45
+        growth_days = SYNTHETIC_GROWTH_DAYS[plant_index % len(SYNTHETIC_GROWTH_DAYS)]
+        if growth_days is None or self.origin is None:
+            return int(small)
+        days = max(0.0, moment - self.origin) / 86400
+        return int(small + (large - small) * min(1.0, days / growth_days))
+
+    def read(self, plant_index: int, capture_index: int, moment: float = None) -> np.ndarray:
+        """
+        다음 프레임 (새 배열에 복사 후 촬영 번호를 찍어 인코딩 후에도 매번 내용이 다르게 함 → 분석 캐시 적중 방지)
+
+        촬영 파이프라인은 획득한 프레임을 나중에 인코딩하므로 실제 카메라처럼 매번 새 배열을 돌려준다
+        (버퍼를 재사용하면 인코딩 전에 다음 식물의 프레임으로 덮어써짐).
+
+        Args:
+            plant_index: 식물 순번
+            capture_index: 식물의 촬영 순번
+            moment: 촬영 시각 (epoch 초, 합성 식물 크기 결정)
+        """
+        if self.synthetic:
+            frame = self.frames[0].copy()
+            height, width = frame.shape[:2]
+            radius = self._radius(plant_index, moment if moment is not None else time.time())
+            cv2.circle(frame, (width // 2, height // 2), radius, (40, 160, 50), -1)
+        else:
+            frame = self.frames[(plant_index + capture_index) % len(self.frames)].copy()
+        self._counter += 1
+        # 촬영 번호의 비트를 JPEG 8x8 블록 단위 흑백 칸으로 찍음 (블록 평균값은 양자화 후에도 남음)
+        for bit in range(min(STAMP_BITS, frame.shape[1] // STAMP_BLOCK)):
+            x = bit * STAMP_BLOCK
+            frame[:STAMP_BLOCK, x:x + STAMP_BLOCK] = 255 if (self._counter >> bit) & 1 else 0
+        return frame
+
+
+class SimulatedMonitoringSystem(PlantMonitoringSystem):
+    """카메라 대신 재생 이미지를 쓰고 촬영 지연을 기록하는 모니터링 시스템"""
+
+    def __init__(self, base_path: str, camera: ReplayCamera, quiet: bool = True):
+        super().__init__(base_path, quiet=quiet)
+        self.camera = camera
+        self.capture_latencies_ms: List[float] = []
+        self.capture_failures = 0
+        self._plant_index: Dict[str, int] = {}
+        self._capture_counts: Dict[str, int] = {}
+
+    def _grab_frame(self, start: float, burst_frames: int = 1, burst_mode: str = "mean",
+                    **fields) -> Tuple[Optional[np.ndarray], bool, Optional[Dict]]:
+        owner = fields.get("plant_id") or fields.get("view_id") or "_general"
+        index = self._plant_index.setdefault(owner, len(self._plant_index))
+        count = self._capture_counts.get(owner, 0)
+        self._capture_counts[owner] = count + 1
+        moment = plant_monitoring_system.datetime.now().timestamp()  # 시뮬레이션 중에는 가상 시각
+        return self.camera.read(index, count, moment), False, None
+
+    def _timed(self, submit, *args) -> Future:
+        """제출부터 저장 완료까지의 지연 기록"""
+        start = time.perf_counter()
+        future = submit(*args)
+
+        def record(done: Future):
+            self.capture_latencies_ms.append((time.perf_counter() - start) * 1000)
+            if done.exception() is not None or done.result() is None:
+                self.capture_failures += 1
+
+        future.add_done_callback(record)
+        return future
+
+    def submit_capture(self, plant_id: str = None, notes: str = "") -> Future:
+        return self._timed(super().submit_capture, plant_id, notes)
+
+    def submit_view_capture(self, view_id: str, notes: str = "") -> Future:
+        return self._timed(super().submit_view_capture, view_id, notes)
+
+
+class FleetSimulator:
+    """가상 식물 집단으로 스케줄러·저장소 부하 측정"""
+
+    def __init__(self, base_path: str, plants: int = 200, days: int = 14, interval_minutes: int = 60,
+                 active_hours: Tuple[int, int] = (8, 18), width: int = 640, height: int = 480,
+                 view_size: int = 0, image_dir: str = None, start: datetime = None, adaptive: bool = False):
+        """
+        시뮬레이터 초기화
+
+        Args:
+            base_path: 시뮬레이션 데이터 경로 (실제 데이터와 분리)
+            plants: 가상 식물 수
+            days: 시뮬레이션 일수
+            interval_minutes: 정기 촬영 간격
+            active_hours: 촬영 시간대 (시작, 끝)
+            width: 재생 이미지 너비
+            height: 재생 이미지 높이
+            view_size: 공유 카메라 뷰 하나에 묶을 식물 수 (0 이면 식물마다 개별 촬영)
+            image_dir: 재생할 이미지 디렉토리 (없으면 합성 이미지)
+            start: 가상 시작 시각 (기본: 다음 자정)
+            adaptive: 적응형 촬영 간격 사용 (interval_minutes 는 비교 기준 고정 간격)
+        """
+        self.base_path = Path(base_path)
+        self.plants = plants
+        self.days = days
+        self.interval = timedelta(minutes=interval_minutes)
+        self.active_hours = tuple(active_hours)
+        self.width = width
+        self.height = height
+        self.view_size = view_size
+        self.image_dir = image_dir
+        tomorrow = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.start = start or tomorrow
+        self.adaptive = adaptive
+        # 스케줄 슬롯: 고정 간격이면 촬영 간격, 적응형이면 스케줄러 틱
+        self.slot_interval = timedelta(minutes=TICK_MINUTES) if adaptive else self.interval
+        self.logger = get_logger("simulator")
+
+    def _setup(self, clock: VirtualClock) -> Tuple[SimulatedMonitoringSystem, AutomatedPlantMonitor]:
+        camera = ReplayCamera(self.width, self.height, self.image_dir, origin=self.start.timestamp())
+        system = SimulatedMonitoringSystem(str(self.base_path), camera)
+        (self.base_path / SIMULATION_MARKER).touch()
+        system.config["camera_settings"].update(width=self.width, height=self.height)
+
+        existing = set(system.config["plants"])
+        grid = max(1, int(np.ceil(np.sqrt(self.view_size)))) if self.view_size else 0
+        for i in range(self.plants):
+            name = f"Sim Plant {i:04d}"
+            if name.lower().replace(' ', '_') in existing:
+                continue
+            if self.view_size:
+                slot = i % self.view_size
+                x, y = slot % grid, slot // grid
+                system.register_plant(name, {"simulated": True}, view_id=f"sim_view_{i // self.view_size:03d}",
+                                      roi=(x / grid, y / grid, 1 / grid, 1 / grid))
+            else:
+                system.register_plant(name, {"simulated": True})
+
+        shortest = CADENCE_DEFAULTS["min_interval_minutes"] if self.adaptive else self.interval.total_seconds() / 60
+        slots_per_day = max(1, int((self.active_hours[1] - self.active_hours[0]) * 60 // shortest))
+        monitor = AutomatedPlantMonitor(config_override={
+            "interval_minutes": int(self.interval.total_seconds() // 60),
+            "active_hours": self.active_hours,
+            # 식물 수 × 슬롯 수 (일일 제한이 부하 측정을 막지 않도록)
+            "max_daily_captures": self.plants * (slots_per_day + 1),
+            "adaptive_cadence": {"enabled": self.adaptive},
+        }, monitoring_system=system)
+        return system, monitor
+
+    def _slots(self) -> List[datetime]:
+        """활성 시간대의 정기 촬영 슬롯 (적응형이면 스케줄러 틱)"""
+        slots = []
+        moment = self.start
+        end = self.start + timedelta(days=self.days)
+        while moment < end:
+            if self.active_hours[0] <= moment.hour < self.active_hours[1]:
+                slots.append(moment)
+            moment += self.slot_interval
+        return slots
+
+    @staticmethod
+    def _cadence_summary(monitor: AutomatedPlantMonitor) -> Optional[Dict]:
+        """적응형 간격 보고 (식물별 항목 대신 간격 분포)"""
+        if monitor.cadence is None:
+            return None
+        report = monitor.cadence.report()
+        intervals = [plant["interval_minutes"] for plant in report.pop("plants").values()]
+        report.pop("targets")
+        report["interval_minutes"] = _percentiles(intervals)
+        return report
+
+    def run(self) -> Dict:
+        """
+        시뮬레이션 실행
+
+        Returns:
+            report: 촬영 지연 백분위, 놓친 슬롯, 디스크 쓰기량, 메모리 사용 추이
+        """
+        clock = VirtualClock(self.start)
+        real_start = time.perf_counter()
+        with _PatchedClock(clock):
+            system, monitor = self._setup(clock)
+            rss_start = _rss_mb()
+            written_start = _written_bytes()
+            log_event(self.logger, "simulator.start",
+                      f"🧪 시뮬레이션 시작: 식물 {self.plants}개, {self.days}일, {self.interval}마다 촬영",
+                      plants=self.plants, days=self.days, interval_minutes=self.interval.total_seconds() / 60)
+
+            missed = []
+            slot_durations = []
+            daily = []
+            day_marker = self.start.date()
+            day_written = written_start
+            day_captures = 0
+            next_weekly = self.start + timedelta(days=(6 - self.start.weekday()) % 7, hours=6)
+
+            for slot in self._slots() + [self.start + timedelta(days=self.days)]:
+                # 날짜가 바뀌면 자정 정리 작업과 일별 통계
+                while day_marker < slot.date():
+                    day_marker += timedelta(days=1)
+                    system.wait_for_captures()  # 전날 촬영의 자동 분석까지 반영
+                    clock.advance_to(datetime.combine(day_marker, datetime.min.time()))
+                    monitor.daily_cleanup()
+                    written = _written_bytes()
+                    captures = len(system.capture_latencies_ms)
+                    daily.append({
+                        "day": str(day_marker - timedelta(days=1)),
+                        "captures": captures - day_captures,
+                        "written_mb": round((written - day_written) / 1024 / 1024, 2) if written is not None else None,
+                        "rss_mb": round(_rss_mb(), 1)
+                    })
+                    day_written, day_captures = written, captures
+
+                if slot >= self.start + timedelta(days=self.days):
+                    break
+
+                if slot >= next_weekly:
+                    clock.advance_to(next_weekly)
+                    monitor.weekly_maintenance()
+                    next_weekly += timedelta(days=7)
+
+                # 이전 슬롯 작업이 이 슬롯 시각을 넘겼으면 놓친 슬롯 (schedule 도 밀린 작업은 한 번만 실행)
+                if clock.now() >= slot + self.slot_interval:
+                    missed.append(slot.isoformat())
+                    continue
+                clock.advance_to(slot)
+                slot_start = clock.timestamp()
+                if self.adaptive:
+                    monitor.adaptive_capture()
+                else:
+                    monitor.scheduled_capture()
+                slot_durations.append((clock.timestamp() - slot_start) * 1000)
+
+            system.close_capture_pipeline()
+            files, storage_bytes = _storage_usage(self.base_path)
+            written_end = _written_bytes()
+        schedule.clear()  # 스케줄러 생성 시 등록된 실시간 작업 제거
+
+        real_seconds = time.perf_counter() - real_start
+        total_slots = len(self._slots())
+        report = {
+            "config": {"plants": self.plants, "days": self.days,
+                       "interval_minutes": self.interval.total_seconds() / 60,
+                       "active_hours": list(self.active_hours), "resolution": [self.width, self.height],
+                       "view_size": self.view_size, "image_dir": self.image_dir, "adaptive": self.adaptive},
+            "capture_latency_ms": _percentiles(system.capture_latencies_ms),
+            "capture_failures": system.capture_failures,
+            "slots": {"scheduled": total_slots, "missed": len(missed), "missed_slots": missed[:50],
+                      "slot_duration_ms": _percentiles(slot_durations),
+                      "slot_budget_ms": self.slot_interval.total_seconds() * 1000},
+            "disk": {
+                "files": files,
+                "storage_mb": round(storage_bytes / 1024 / 1024, 1),
+                "written_mb": round((written_end - written_start) / 1024 / 1024, 1) if written_start is not None else None,
+                "storage_mb_per_day": round(storage_bytes / 1024 / 1024 / max(self.days, 1), 1),
+            },
+            "memory": {"rss_start_mb": round(rss_start, 1), "rss_end_mb": round(_rss_mb(), 1),
+                       "rss_growth_mb": round(_rss_mb() - rss_start, 1)},
+            "daily": daily,
+            "cadence": self._cadence_summary(monitor),
+            "real_seconds": round(real_seconds, 1),
+            "speedup": round(self.days * 86400 / max(real_seconds, 1e-6), 1),
+        }
+
+        report_file = self.base_path / f"simulation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        report["report_file"] = str(report_file)
+
+        latency = report["capture_latency_ms"]
+        log_event(self.logger, "simulator.done",
+                  f"✅ 시뮬레이션 완료 ({real_seconds:.0f}초, {report['speedup']}배속): "
+                  f"촬영 {latency['count']}회, 지연 p50 {latency['p50']}ms / p99 {latency['p99']}ms, "
+                  f"놓친 슬롯 {len(missed)}/{total_slots}, 저장 {report['disk']['storage_mb']}MB, "
+                  f"메모리 증가 {report['memory']['rss_growth_mb']}MB → {report_file}",
+                  **{k: report[k] for k in ("capture_latency_ms", "slots", "disk", "memory", "cadence")})
+        return report
+
+
+def main():
+    """메인 함수 - 명령줄 시뮬레이션"""
+    parser = argparse.ArgumentParser(description="가상 식물 집단으로 스케줄러·저장소 부하 시뮬레이션")
+    parser.add_argument("--base-path", default="/tmp/plant_fleet_sim", help="시뮬레이션 데이터 경로 (실제 데이터와 분리)")
+    parser.add_argument("--plants", type=int, default=200, help="가상 식물 수")
+    parser.add_argument("--days", type=int, default=14, help="시뮬레이션 일수")
+    parser.add_argument("--interval", type=int, default=60, help="정기 촬영 간격 (분, 적응형이면 비교 기준)")
+    parser.add_argument("--adaptive", action="store_true", help="적응형 촬영 간격으로 실행 (고정 간격 대비 절약량 보고)")
+    parser.add_argument("--active-hours", type=int, nargs=2, default=[8, 18], metavar=("START", "END"),
+                        help="촬영 시간대")
+    parser.add_argument("--width", type=int, default=640, help="재생 이미지 너비")
+    parser.add_argument("--height", type=int, default=480, help="재생 이미지 높이")
+    parser.add_argument("--view-size", type=int, default=0, help="공유 카메라 뷰 하나에 묶을 식물 수 (0 = 개별 촬영)")
+    parser.add_argument("--image-dir", help="재생할 JPEG 이미지 디렉토리 (없으면 합성 이미지)")
+    parser.add_argument("--fresh", action="store_true", help="기존 시뮬레이션 데이터 삭제 후 시작")
+    args = parser.parse_args()
+
+    base_path = Path(args.base_path)
+    if args.fresh and base_path.exists():
+        if not (base_path / SIMULATION_MARKER).exists():
+            print(f"❌ 시뮬레이션 데이터 디렉토리가 아닙니다: {base_path}")
+            return
+        shutil.rmtree(base_path)
+
+    simulator = FleetSimulator(args.base_path, plants=args.plants, days=args.days, interval_minutes=args.interval,
+                               active_hours=args.active_hours, width=args.width, height=args.height,
+                               view_size=args.view_size, image_dir=args.image_dir, adaptive=args.adaptive)
+    report = simulator.run()
+    print(json.dumps({k: report[k] for k in ("capture_latency_ms", "slots", "disk", "memory", "cadence", "speedup")},
+                     indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
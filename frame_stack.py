@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+식물 이력 프레임 스택 (Jupyter 분석용)
+- 식물의 촬영을 지정 해상도로 디코딩해 디스크의 (T, H, W, 3) uint8 배열에 저장, np.memmap 으로 열기
+- 다시 열 때는 디코딩 없이 바로 사용, 새 촬영만 끝에 이어 붙임
+- JPEG 축소 디코딩(1/2, 1/4, 1/8)과 스레드 병렬 디코딩, 공유 뷰 식물은 ROI 만 잘라 저장
+- 인덱스(JSON)가 확정 지점: 중단되어도 인덱스에 기록된 프레임까지만 유효
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from event_logging import elapsed_ms, get_logger, log_event
+
+STACK_VERSION = 1
+
+# 기본 프레임 크기 (너비, 높이)
+DEFAULT_STACK_SIZE = (320, 240)
+
+# 축소 배율 → 축소 디코딩 플래그 (큰 배율부터 시도)
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def _capture_key(capture: Dict) -> Tuple[str, str]:
+    return capture["capture_time"], capture["path"]
+
+
+def decode_capture(system, capture: Dict, size: Tuple[int, int], dst: np.ndarray = None) -> Optional[np.ndarray]:
+    """
+    촬영 하나를 지정 크기로 디코딩 (가능하면 JPEG 축소 디코딩, 공유 뷰 식물은 ROI 만 잘라서)
+
+    Args:
+        system: PlantMonitoringSystem (로컬 파일·팩 파일 이미지 읽기)
+        capture: 촬영 메타데이터 ("path", 선택 "roi", "image_properties")
+        size: 출력 크기 (너비, 높이)
+        dst: 결과를 쓸 (높이, 너비, 3) 배열 (없으면 새로 할당)
+
+    Returns:
+        frame: BGR uint8 프레임 (읽기 실패 시 None)
+    """
+    roi = capture.get("roi") or (0.0, 0.0, 1.0, 1.0)
+    props = capture.get("image_properties") or {}
+    flags = cv2.IMREAD_COLOR
+    if props.get("width") and props.get("height"):
+        source_w, source_h = props["width"] * roi[2], props["height"] * roi[3]
+        for factor, reduced in _REDUCED_FLAGS:
+            if source_w / factor >= size[0] and source_h / factor >= size[1]:
+                flags = reduced
+                break
+
+    img = system.load_image(capture["path"], flags=flags)
+    if img is None:
+        return None
+    height, width = img.shape[:2]
+    x0, y0 = int(round(roi[0] * width)), int(round(roi[1] * height))
+    x1, y1 = int(round((roi[0] + roi[2]) * width)), int(round((roi[1] + roi[3]) * height))
+    crop = img[y0:max(y1, y0 + 1), x0:max(x1, x0 + 1)]
+    return cv2.resize(crop, size, dst=dst, interpolation=cv2.INTER_AREA)
+
+
+class FrameStack:
+    """식물 이력 프레임 (읽기 전용 memmap 뷰와 촬영 목록)"""
+
+    def __init__(self, plant_id: str, frames: np.ndarray, captures: List[Dict]):
+        self.plant_id = plant_id
+        self.frames = frames  # (T, H, W, 3) BGR uint8
+        self.captures = captures  # 프레임별 {"capture_time", "path", "roi", "ok"}
+
+    def __len__(self) -> int:
+        return len(self.captures)
+
+    @property
+    def times(self) -> List[datetime]:
+        return [datetime.fromisoformat(c["capture_time"]) for c in self.captures]
+
+    @property
+    def valid(self) -> np.ndarray:
+        """디코딩에 성공한 프레임 여부 (실패한 프레임은 0 으로 채워짐)"""
+        return np.array([c["ok"] for c in self.captures], dtype=bool)
+
+
+class FrameStackCache:
+    """식물별·해상도별 프레임 스택 캐시 (stack_dir/<식물 ID>/<너비>x<높이>.json 인덱스 + .<세대>.u8 배열)"""
+
+    def __init__(self, system, stack_dir: Path, workers: int = None):
+        """
+        캐시 초기화
+
+        Args:
+            system: PlantMonitoringSystem (타임라인 조회와 이미지 읽기에 사용)
+            stack_dir: 스택 저장 디렉토리
+            workers: 병렬 디코딩 스레드 수 (기본: CPU 수)
+        """
+        self.system = system
+        self.stack_dir = Path(stack_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.logger = get_logger("stack")
+        self._lock = threading.Lock()
+
+    def _index_path(self, plant_id: str, size: Tuple[int, int]) -> Path:
+        return self.stack_dir / plant_id / f"{size[0]}x{size[1]}.json"
+
+    def _read_index(self, path: Path) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return index if index.get("version") == STACK_VERSION else None
+
+    def _write_index(self, path: Path, index: Dict):
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _open(self, data_path: Path, count: int, size: Tuple[int, int], mode: str) -> np.ndarray:
+        return np.memmap(data_path, dtype=np.uint8, mode=mode, shape=(count, size[1], size[0], 3))
+
+    def _decode_into(self, capture: Dict, slot: np.ndarray, size: Tuple[int, int]) -> bool:
+        """촬영 하나를 슬롯에 디코딩 (실패하면 0 으로 채움)"""
+        if decode_capture(self.system, capture, size, dst=slot) is None:
+            slot.fill(0)
+            return False
+        return True
+
+    def _decode(self, frames: np.ndarray, captures: List[Dict], slots: List[int], size: Tuple[int, int]):
+        """촬영을 지정 슬롯에 병렬 디코딩 (cv2 가 GIL 을 놓으므로 스레드로 충분, ok 항목 갱신)"""
+        def work(position: int) -> bool:
+            return self._decode_into(captures[position], frames[slots[position]], size)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for capture, ok in zip(captures, executor.map(work, range(len(captures)))):
+                capture["ok"] = ok
+
+    def _scan(self, plant_id: str, since: Optional[str]) -> List[Dict]:
+        """since 이후(포함) 촬영 목록 (시간순)"""
+        days = 36500
+        if since:
+            days = (datetime.now() - datetime.fromisoformat(since)).days + 1
+        entries = []
+        for metadata in self.system.get_plant_timeline(plant_id, days=days):
+            if since and metadata["capture_time"] < since:
+                continue
+            entries.append({
+                "capture_time": metadata["capture_time"],
+                "path": metadata["path"],
+                "roi": metadata.get("roi"),
+                "image_properties": metadata.get("image_properties"),
+            })
+        return entries
+
+    def load(self, plant_id: str, start: datetime = None, end: datetime = None,
+             size: Tuple[int, int] = DEFAULT_STACK_SIZE, refresh: bool = True) -> FrameStack:
+        """
+        프레임 스택 열기 (필요한 촬영만 디코딩해 캐시 갱신)
+
+        Args:
+            plant_id: 식물 ID
+            start: 시작 시각 (없으면 전체 이력)
+            end: 끝 시각 (포함, 없으면 최신까지)
+            size: 프레임 크기 (너비, 높이)
+            refresh: 새 촬영 확인 여부 (False 면 캐시된 프레임만 바로 열기)
+
+        Returns:
+            stack: start~end 구간의 프레임 (memmap 뷰, 복사 없음)
+        """
+        size = (int(size[0]), int(size[1]))
+        start_key = start.isoformat() if start else None
+        index_path = self._index_path(plant_id, size)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            index = self._read_index(index_path) or {
+                "version": STACK_VERSION, "plant_id": plant_id, "size": list(size),
+                "since": start_key, "generation": 0, "frames": []
+            }
+            # 캐시 시작보다 이전 구간을 요청하면 그 구간까지 넓힘
+            covered = index["since"] is None or (start_key is not None and start_key >= index["since"])
+            if refresh or not covered or not index["frames"]:
+                self._update(index_path, index, start_key, covered)
+
+            captures = index["frames"]
+            data_path = index_path.with_name(f"{index_path.stem}.{index['generation']}.u8")
+            frames = self._open(data_path, len(captures), size, "r") if captures else \
+                np.empty((0, size[1], size[0], 3), dtype=np.uint8)
+
+        times = [c["capture_time"] for c in captures]
+        begin = 0 if start is None else np.searchsorted(times, start.isoformat(), side="left")
+        stop = len(times) if end is None else np.searchsorted(times, end.isoformat(), side="right")
+        return FrameStack(plant_id, frames[begin:stop], captures[begin:stop])
+
+    def _update(self, index_path: Path, index: Dict, start_key: Optional[str], covered: bool):
+        """새 촬영 반영 (뒤에 붙이기, 앞쪽·중간 삽입이면 새 세대 파일로 다시 쓰기)"""
+        started = time.perf_counter()
+        size = tuple(index["size"])
+        frames_before = index["frames"]
+        if covered and frames_before:
+            scan_from = frames_before[-1]["capture_time"]
+        else:
+            scan_from = index["since"] if covered else start_key
+        known = {_capture_key(c) for c in frames_before}
+        new = [c for c in self._scan(index["plant_id"], scan_from) if _capture_key(c) not in known]
+        if not covered:
+            index["since"] = start_key
+        if not new:
+            if not covered:
+                self._write_index(index_path, index)
+            return
+
+        frame_bytes = size[0] * size[1] * 3
+        old_path = index_path.with_name(f"{index_path.stem}.{index['generation']}.u8")
+        if not frames_before or new[0]["capture_time"] > frames_before[-1]["capture_time"]:
+            # 뒤에 붙이기: 파일을 늘리고 새 슬롯에만 디코딩
+            total = len(frames_before) + len(new)
+            with open(old_path, 'ab') as f:
+                f.truncate(total * frame_bytes)
+            frames = self._open(old_path, total, size, "r+")
+            self._decode(frames, new, list(range(len(frames_before), total)), size)
+            frames.flush()
+            del frames
+            index["frames"] = frames_before + new
+            mode = "append"
+        else:
+            # 시간순 병합: 기존 프레임은 복사, 새 촬영만 디코딩
+            merged = sorted(frames_before + new, key=_capture_key)
+            generation = index["generation"] + 1
+            new_path = index_path.with_name(f"{index_path.stem}.{generation}.u8")
+            frames = self._open(new_path, len(merged), size, "w+")
+            old = self._open(old_path, len(frames_before), size, "r")
+            positions = {_capture_key(c): i for i, c in enumerate(frames_before)}
+            pending, slots = [], []
+            for slot, capture in enumerate(merged):
+                if _capture_key(capture) in positions:
+                    frames[slot] = old[positions[_capture_key(capture)]]
+                else:
+                    pending.append(capture)
+                    slots.append(slot)
+            del old
+            self._decode(frames, pending, slots, size)
+            frames.flush()
+            del frames
+            index["frames"] = merged
+            index["generation"] = generation
+            mode = "rewrite"
+
+        for capture in new:
+            capture.pop("image_properties", None)
+        self._write_index(index_path, index)
+        if mode == "rewrite" and old_path.exists():
+            old_path.unlink()
+
+        failed = sum(1 for c in new if not c["ok"])
+        log_event(self.logger, "stack.update",
+                  f"🎞️ 프레임 스택 갱신: {index['plant_id']} +{len(new)}장 "
+                  f"(총 {len(index['frames'])}장, {size[0]}x{size[1]})",
+                  logging.WARNING if failed else logging.INFO,
+                  plant_id=index["plant_id"], added=len(new), failed=failed,
+                  frames=len(index["frames"]), size=list(size), mode=mode,
+                  workers=self.workers, duration_ms=elapsed_ms(started))
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+식물별 이동 성장 통계
+- 새 분석 결과마다 상수 시간에 갱신 (분석 파일 재조회 없음)
+- 지수 이동 평균(EWMA, 반감기 기반), 24시간/7일/30일 구간 평균·최소·최대·기울기
+- 구간은 고정 폭 시간 버킷으로 집계하여 식물당 저장 크기가 일정
+- 임계값 알림 (활성/해제 전환 시에만 발생)
+"""
+
+import json
+import math
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 구간 이름 → (구간 길이, 버킷 폭) 초 단위
+WINDOWS = {
+    "24h": (24 * 3600, 3600),
+    "7d": (7 * 86400, 6 * 3600),
+    "30d": (30 * 86400, 86400),
+}
+
+# 지표 이름 → 분석 결과 내 위치 ("analysis" 항목 기준)
+METRICS = {
+    "green_coverage": ("plant_detection", "green_coverage_percent"),
+    "green_ratio": ("color_analysis", "green_ratio"),
+    "brightness": ("basic_stats", "mean_brightness"),
+}
+
+DEFAULT_SETTINGS = {
+    "ewma_halflife_hours": 24,
+    "alerts": [
+        {"name": "coverage_low", "metric": "green_coverage", "stat": "ewma", "below": 5.0},
+        {"name": "coverage_declining", "metric": "green_coverage", "stat": "slope",
+         "window": "7d", "below": -2.0, "min_samples": 6},
+    ],
+}
+
+# 버킷 항목: [시작 시각, 개수, 합, 최소, 최대, Σt, Σt², Σty] (t 는 식물 기준 시각부터 일 단위)
+_START, _COUNT, _SUM, _MIN, _MAX, _ST, _STT, _STY = range(8)
+
+
+def extract_metrics(analysis: Dict) -> Dict[str, float]:
+    """분석 결과의 "analysis" 항목에서 추적 지표 추출"""
+    values = {}
+    for metric, (section, key) in METRICS.items():
+        value = analysis.get(section, {}).get(key)
+        if value is not None:
+            values[metric] = float(value)
+    return values
+
+
+class WindowAggregate:
+    """이동 구간 집계 (고정 폭 버킷 링)"""
+
+    def __init__(self, span: int, bucket: int, buckets: Iterable[List[float]] = ()):
+        self.span = span
+        self.bucket = bucket
+        self.buckets = deque(buckets)
+
+    def _expired(self, entry: List[float], now: float) -> bool:
+        return entry[_START] + self.bucket <= now - self.span
+
+    def add(self, ts: float, t_days: float, value: float):
+        """샘플 추가 (시간순 입력 가정)"""
+        while self.buckets and self._expired(self.buckets[0], ts):
+            self.buckets.popleft()
+
+        start = ts - ts % self.bucket
+        if self.buckets and self.buckets[-1][_START] == start:
+            entry = self.buckets[-1]
+            entry[_COUNT] += 1
+            entry[_SUM] += value
+            entry[_MIN] = min(entry[_MIN], value)
+            entry[_MAX] = max(entry[_MAX], value)
+            entry[_ST] += t_days
+            entry[_STT] += t_days * t_days
+            entry[_STY] += t_days * value
+        else:
+            self.buckets.append([start, 1, value, value, value,
+                                 t_days, t_days * t_days, t_days * value])
+
+    def summary(self, now: float) -> Dict:
+        """
+        구간 통계 (버킷 단위 경계, 최대 버킷 수만큼의 고정 비용)
+
+        Returns:
+            summary: count, mean, min, max, slope_per_day (샘플이 없으면 값은 None)
+        """
+        count = total = st = stt = sty = 0.0
+        low = high = None
+        for entry in self.buckets:
+            if self._expired(entry, now):
+                continue
+            count += entry[_COUNT]
+            total += entry[_SUM]
+            st += entry[_ST]
+            stt += entry[_STT]
+            sty += entry[_STY]
+            low = entry[_MIN] if low is None else min(low, entry[_MIN])
+            high = entry[_MAX] if high is None else max(high, entry[_MAX])
+
+        if not count:
+            return {"count": 0, "mean": None, "min": None, "max": None, "slope_per_day": None}
+
+        slope = None
+        denominator = count * stt - st * st
+        if count >= 2 and denominator > 1e-12:
+            slope = (count * sty - st * total) / denominator
+        return {"count": int(count), "mean": total / count, "min": low, "max": high,
+                "slope_per_day": slope}
+
+
+class PlantGrowthStats:
+    """한 식물의 지표별 EWMA 와 구간 집계"""
+
+    def __init__(self, plant_id: str, halflife_hours: float, state: Dict = None):
+        state = state or {}
+        self.plant_id = plant_id
+        self.halflife = halflife_hours * 3600
+        self.origin = state.get("origin")
+        self.last_time = state.get("last_time")
+        self.samples = state.get("samples", 0)
+        self.ewma: Dict[str, float] = state.get("ewma", {})
+        self.latest: Dict[str, float] = state.get("latest", {})
+        self.active_alerts: List[str] = state.get("active_alerts", [])
+        self.windows: Dict[str, Dict[str, WindowAggregate]] = {}
+        saved_windows = state.get("windows", {})
+        for metric in METRICS:
+            self.windows[metric] = {
+                name: WindowAggregate(span, bucket, saved_windows.get(metric, {}).get(name, ()))
+                for name, (span, bucket) in WINDOWS.items()
+            }
+
+    def update(self, ts: float, values: Dict[str, float]) -> bool:
+        """
+        샘플 반영
+
+        Args:
+            ts: 샘플 시각 (epoch 초)
+            values: 지표 이름 → 값
+
+        Returns:
+            updated: 반영 여부 (이미 반영된 시각 이전 샘플은 무시)
+        """
+        if self.last_time is not None and ts <= self.last_time:
+            return False
+        if self.origin is None:
+            self.origin = ts
+
+        # 불규칙 간격을 고려한 시간 기반 감쇠
+        if self.last_time is None or self.halflife <= 0:
+            alpha = 1.0
+        else:
+            alpha = 1.0 - math.pow(0.5, (ts - self.last_time) / self.halflife)
+
+        t_days = (ts - self.origin) / 86400
+        for metric, value in values.items():
+            if metric not in self.windows:
+                continue
+            previous = self.ewma.get(metric)
+            self.ewma[metric] = value if previous is None else previous + alpha * (value - previous)
+            self.latest[metric] = value
+            for window in self.windows[metric].values():
+                window.add(ts, t_days, value)
+
+        self.last_time = ts
+        self.samples += 1
+        return True
+
+    def summary(self, now: float = None) -> Dict:
+        """지표별 최신값, EWMA, 구간 통계"""
+        now = now if now is not None else datetime.now().timestamp()
+        metrics = {}
+        for metric, windows in self.windows.items():
+            if metric not in self.ewma:
+                continue
+            metrics[metric] = {
+                "latest": self.latest.get(metric),
+                "ewma": self.ewma[metric],
+                "windows": {name: window.summary(now) for name, window in windows.items()}
+            }
+        return {
+            "plant_id": self.plant_id,
+            "samples": self.samples,
+            "last_sample": datetime.fromtimestamp(self.last_time).isoformat() if self.last_time else None,
+            "active_alerts": list(self.active_alerts),
+            "metrics": metrics,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "origin": self.origin,
+            "last_time": self.last_time,
+            "samples": self.samples,
+            "ewma": self.ewma,
+            "latest": self.latest,
+            "active_alerts": self.active_alerts,
+            "windows": {
+                metric: {name: [list(entry) for entry in window.buckets]
+                         for name, window in windows.items() if window.buckets}
+                for metric, windows in self.windows.items()
+            },
+        }
+
+
+class GrowthStatsStore:
+    """식물별 성장 통계 저장소 (stats_dir/<식물 ID>.json)"""
+
+    def __init__(self, stats_dir: Path, settings: Dict = None):
+        """
+        저장소 초기화
+
+        Args:
+            stats_dir: 통계 파일 디렉토리
+            settings: EWMA 반감기, 알림 규칙 (config.json 의 growth_stats)
+        """
+        self.stats_dir = Path(stats_dir)
+        self.stats_dir.mkdir(parents=True, exist_ok=True)
+        self.settings = settings or DEFAULT_SETTINGS
+        self._plants: Dict[str, PlantGrowthStats] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, plant_id: str) -> Path:
+        return self.stats_dir / f"{plant_id}.json"
+
+    def _load(self, plant_id: str) -> PlantGrowthStats:
+        stats = self._plants.get(plant_id)
+        if stats is None:
+            state = None
+            try:
+                with open(self._path(plant_id), 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass
+            stats = PlantGrowthStats(plant_id, self.settings.get("ewma_halflife_hours", 24), state)
+            self._plants[plant_id] = stats
+        return stats
+
+    def _save(self, stats: PlantGrowthStats):
+        path = self._path(stats.plant_id)
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(stats.to_dict(), f, separators=(",", ":"))
+        os.replace(temp_path, path)
+
+    def _evaluate_alerts(self, stats: PlantGrowthStats, now: float) -> List[Dict]:
+        """알림 규칙 평가 → 상태가 바뀐 알림 목록"""
+        changes = []
+        summary = stats.summary(now)["metrics"]
+        active = set(stats.active_alerts)
+        for rule in self.settings.get("alerts", []):
+            metric = summary.get(rule["metric"])
+            if metric is None:
+                continue
+            if rule["stat"] == "ewma":
+                value, count = metric["ewma"], stats.samples
+            elif rule["stat"] == "latest":
+                value, count = metric["latest"], stats.samples
+            else:
+                window = metric["windows"].get(rule.get("window", "24h"), {})
+                key = "slope_per_day" if rule["stat"] == "slope" else rule["stat"]
+                value, count = window.get(key), window.get("count", 0)
+            if value is None or count < rule.get("min_samples", 1):
+                continue
+
+            firing = (("below" in rule and value < rule["below"]) or
+                      ("above" in rule and value > rule["above"]))
+            name = rule["name"]
+            if firing != (name in active):
+                (active.add if firing else active.discard)(name)
+                changes.append({"plant_id": stats.plant_id, "alert": name, "active": firing,
+                                "metric": rule["metric"], "stat": rule["stat"],
+                                "window": rule.get("window"), "value": value,
+                                "threshold": rule.get("below", rule.get("above"))})
+        stats.active_alerts = sorted(active)
+        return changes
+
+    def record(self, plant_id: str, ts: float, values: Dict[str, float]) -> Tuple[bool, List[Dict]]:
+        """
+        새 분석 결과 반영 (상수 시간 갱신 후 저장)
+
+        Args:
+            plant_id: 식물 ID
+            ts: 샘플 시각 (epoch 초)
+            values: 지표 이름 → 값
+
+        Returns:
+            (updated, alert_changes): 반영 여부, 활성/해제된 알림 목록
+        """
+        with self._lock:
+            stats = self._load(plant_id)
+            if not stats.update(ts, values):
+                return False, []
+            changes = self._evaluate_alerts(stats, ts)
+            self._save(stats)
+        return True, changes
+
+    def get(self, plant_id: str, now: float = None) -> Optional[Dict]:
+        """식물 통계 요약 (기록이 없으면 None)"""
+        with self._lock:
+            stats = self._load(plant_id)
+            if not stats.samples:
+                return None
+            return stats.summary(now)
+
+    def rebuild(self, plant_id: str, samples: Iterable[Tuple[float, Dict[str, float]]]) -> int:
+        """
+        기존 분석 결과로 통계 재구성 (설정 변경·도입 초기의 일회성 작업)
+
+        Args:
+            plant_id: 식물 ID
+            samples: (시각, 지표) 목록
+
+        Returns:
+            count: 반영된 샘플 수
+        """
+        with self._lock:
+            stats = PlantGrowthStats(plant_id, self.settings.get("ewma_halflife_hours", 24))
+            count = sum(stats.update(ts, values) for ts, values in sorted(samples, key=lambda s: s[0]))
+            if stats.samples:
+                self._evaluate_alerts(stats, stats.last_time)
+            self._plants[plant_id] = stats
+            self._save(stats)
+        return count
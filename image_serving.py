@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+저장 이미지 HTTP 제공
+- 로컬 파일과 팩 파일 안의 이미지를 (파일, 오프셋, 길이) 위치로 찾아 내용을 Python 메모리에 올리지 않고 전송
+  (파일 끝까지 보내는 응답은 WSGI 서버의 file_wrapper → sendfile, 나머지는 작은 청크로 읽기)
+- Range(단일 구간), If-None-Match, If-Modified-Since, If-Range 처리 → 206 / 304 / 416
+- 강한 ETag: 저장 경로(촬영 대상·시각 포함)와 크기로 계산 → 팩으로 옮겨져도 그대로
+- raw_images 는 한 번 쓰면 바뀌지 않으므로 1년 immutable 캐시, 나머지는 ETag 재검증
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+from werkzeug.http import http_date, parse_date, parse_etags, parse_if_range_header, parse_range_header
+
+# 한 번 저장되면 내용이 바뀌지 않는 경로 (촬영 원본)
+IMMUTABLE_PREFIXES = ("raw_images/",)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# 제공 가능한 이미지 형식
+CONTENT_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+# sendfile 을 쓸 수 없을 때 읽기 단위
+CHUNK_SIZE = 256 * 1024
+
+
+class ImageFile:
+    """제공할 이미지의 위치와 캐시 검증 값"""
+
+    def __init__(self, relative: str, path: Path, offset: int, length: int, mtime: float):
+        self.relative = relative
+        self.path = path  # 로컬 파일 또는 팩 파일
+        self.offset = offset  # 파일 안의 시작 위치 (로컬 파일이면 0)
+        self.length = length
+        self.mtime = int(mtime)  # HTTP 날짜는 초 단위
+        self.immutable = relative.startswith(IMMUTABLE_PREFIXES)
+        self.content_type = CONTENT_TYPES[Path(relative).suffix.lower()]
+
+        # 원본은 경로·크기만으로 식별 (팩으로 옮겨도 같은 값), 나머지는 수정 시각까지 포함
+        key = f"{relative}:{length}" if self.immutable else f"{relative}:{length}:{self.mtime}"
+        self.etag = hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+
+    def headers(self) -> Dict[str, str]:
+        """모든 응답(304 포함)에 붙는 캐시 헤더"""
+        cache_control = (f"public, max-age={IMMUTABLE_MAX_AGE}, immutable" if self.immutable
+                         else "public, no-cache")
+        return {
+            "ETag": f'"{self.etag}"',
+            "Last-Modified": http_date(self.mtime),
+            "Cache-Control": cache_control,
+            "Accept-Ranges": "bytes",
+        }
+
+
+def locate_image(system, relative: str) -> Optional[ImageFile]:
+    """
+    이미지 위치 조회
+
+    Args:
+        system: PlantMonitoringSystem (로컬 파일·팩 파일 위치 조회)
+        relative: 기본 경로 기준 상대 경로
+
+    Returns:
+        image: 이미지 정보 (없으면 None, 잘못된 경로면 ValueError)
+    """
+    parts = Path(relative).parts
+    if Path(relative).suffix.lower() not in CONTENT_TYPES or '..' in parts or Path(relative).is_absolute():
+        raise ValueError(f"잘못된 이미지 경로: {relative}")
+    location = system.locate_file(relative)
+    if location is None:
+        return None
+    return ImageFile(relative, *location)
+
+
+def _not_modified(image: ImageFile, headers: Mapping[str, str]) -> bool:
+    """조건부 요청 판정 (If-None-Match 가 있으면 If-Modified-Since 는 무시)"""
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return etags.star_tag or etags.contains_weak(image.etag)
+    since = parse_date(headers.get("If-Modified-Since"))
+    return since is not None and image.mtime <= since.timestamp()
+
+
+def _byte_range(image: ImageFile, headers: Mapping[str, str]) -> Optional[Tuple[int, int]]:
+    """
+    요청 구간 (시작, 끝 다음) → 전체면 (0, 길이), 만족할 수 없으면 None
+
+    여러 구간 요청과 형식이 잘못된 Range 는 전체 응답으로 처리 (RFC 9110 허용).
+    """
+    full = (0, image.length)
+    value = headers.get("Range")
+    if not value:
+        return full
+    if_range = headers.get("If-Range")
+    if if_range:
+        condition = parse_if_range_header(if_range)
+        if condition.etag is not None and condition.etag != image.etag:
+            return full
+        if condition.date is not None and int(condition.date.timestamp()) != image.mtime:
+            return full
+    requested = parse_range_header(value)
+    if requested is None or len(requested.ranges) != 1:
+        return full
+    return requested.range_for_length(image.length)
+
+
+def evaluate(image: ImageFile, headers: Mapping[str, str], method: str = "GET"
+             ) -> Tuple[int, Dict[str, str], Optional[Tuple[int, int]]]:
+    """
+    요청 헤더에 대한 응답 결정
+
+    Args:
+        image: 이미지 정보
+        headers: 요청 헤더 (대소문자 무관 조회)
+        method: 요청 메서드 (GET/HEAD 만 조건부·구간 요청 처리)
+
+    Returns:
+        (status, headers, span): 상태 코드, 응답 헤더, 보낼 구간 (시작, 끝 다음, 본문이 없으면 None)
+    """
+    response_headers = image.headers()
+    if method in ("GET", "HEAD") and _not_modified(image, headers):
+        return 304, response_headers, None
+
+    span = _byte_range(image, headers) if method in ("GET", "HEAD") else (0, image.length)
+    if span is None:
+        response_headers["Content-Range"] = f"bytes */{image.length}"
+        return 416, response_headers, None
+
+    start, stop = span
+    response_headers["Content-Type"] = image.content_type
+    response_headers["Content-Length"] = str(stop - start)
+    if (start, stop) != (0, image.length):
+        response_headers["Content-Range"] = f"bytes {start}-{stop - 1}/{image.length}"
+        return 206, response_headers, span
+    return 200, response_headers, span
+
+
+def _read_span(f, remaining: int) -> Iterator[bytes]:
+    """구간만 청크로 읽기 (파일 끝까지가 아닌 구간, 팩 파일 안의 이미지)"""
+    try:
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def wsgi_body(environ: Dict, image: ImageFile, span: Tuple[int, int]):
+    """
+    WSGI 응답 본문
+
+    구간이 파일 끝에서 끝나면 서버의 wsgi.file_wrapper 로 넘겨 sendfile 경로를 사용하고,
+    그 밖의 구간(팩 파일 중간 등)은 작은 청크로 읽음.
+    """
+    start, stop = span
+    f = open(image.path, 'rb')
+    f.seek(image.offset + start)
+    file_wrapper = environ.get("wsgi.file_wrapper")
+    if file_wrapper is not None and image.offset + stop == os.fstat(f.fileno()).st_size:
+        return file_wrapper(f, CHUNK_SIZE)
+    return _read_span(f, stop - start)
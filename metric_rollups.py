@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+식물 지표 다중 해상도 롤업
+- 분석 결과가 들어올 때마다 시간별·일별·주별 버킷(개수, 평균, 최소, 최대, 마지막 값)을 상수 시간에 갱신
+- 식물·지표·단계마다 고정 크기 레코드 파일 하나 (시작 시각 순, 마지막 버킷만 제자리 갱신 또는 추가)
+- 조회는 memmap 에서 이진 탐색으로 구간만 읽음 → 보관 기간·샘플 수와 무관하게 수 밀리초
+- 요청한 점 수 안에 들어오는 가장 세밀한 단계를 고르고, 주별로도 넘치면 이웃 버킷을 합쳐 줄임
+"""
+
+import argparse
+import bisect
+import json
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from growth_stats import METRICS
+
+# 버킷 레코드 (시작 시각은 현지 시각 기준 버킷 경계의 epoch 초)
+RECORD_DTYPE = np.dtype([
+    ("start", "<i8"),
+    ("count", "<i8"),
+    ("sum", "<f8"),
+    ("min", "<f8"),
+    ("max", "<f8"),
+    ("last", "<f8"),
+    ("last_time", "<f8"),
+])
+
+# 세밀한 단계부터 (조회 시 이 순서로 점 수 예산에 맞는 단계를 찾음)
+TIERS = ("hourly", "daily", "weekly")
+
+DEFAULT_MAX_POINTS = 500
+
+
+def bucket_start(tier: str, ts: float) -> int:
+    """
+    샘플 시각이 속한 버킷의 시작 시각 (현지 시각 기준 정시·자정·월요일 자정)
+
+    Args:
+        tier: 롤업 단계 (hourly, daily, weekly)
+        ts: 샘플 시각 (epoch 초)
+
+    Returns:
+        start: 버킷 시작 (epoch 초)
+    """
+    moment = datetime.fromtimestamp(ts)
+    if tier == "hourly":
+        moment = moment.replace(minute=0, second=0, microsecond=0)
+    elif tier == "daily":
+        moment = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        moment = (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int(moment.timestamp())
+
+
+def _merge(record: np.void, ts: float, value: float):
+    """버킷 레코드에 샘플 하나 합치기 (같은 버킷의 더 이른 샘플은 마지막 값을 바꾸지 않음)"""
+    record["count"] += 1
+    record["sum"] += value
+    record["min"] = min(record["min"], value)
+    record["max"] = max(record["max"], value)
+    if ts >= record["last_time"]:
+        record["last"] = value
+        record["last_time"] = ts
+
+
+def _new_record(start: int, ts: float, value: float) -> np.ndarray:
+    record = np.zeros(1, dtype=RECORD_DTYPE)
+    record[0] = (start, 1, value, value, value, value, ts)
+    return record
+
+
+class RollupStore:
+    """식물별 지표 롤업 저장소 (rollup_dir/<식물 ID>/<지표>.<단계>.bin)"""
+
+    def __init__(self, rollup_dir: Path):
+        """
+        저장소 초기화
+
+        Args:
+            rollup_dir: 롤업 파일 디렉토리
+        """
+        self.rollup_dir = Path(rollup_dir)
+        self.rollup_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, plant_id: str, metric: str, tier: str) -> Path:
+        return self.rollup_dir / plant_id / f"{metric}.{tier}.bin"
+
+    def _update(self, path: Path, start: int, ts: float, value: float) -> bool:
+        """마지막 버킷 갱신 또는 새 버킷 추가 (마지막 버킷보다 이른 버킷이면 무시)"""
+        size = RECORD_DTYPE.itemsize
+        try:
+            f = open(path, 'r+b')
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            f = open(path, 'w+b')
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            end -= end % size  # 중단된 쓰기로 남은 불완전 레코드는 덮어씀
+            if end:
+                f.seek(end - size)
+                last = np.frombuffer(f.read(size), dtype=RECORD_DTYPE).copy()
+                if last[0]["start"] == start:
+                    _merge(last[0], ts, value)
+                    f.seek(end - size)
+                    f.write(last.tobytes())
+                    return True
+                if last[0]["start"] > start:
+                    return False
+            f.seek(end)
+            f.write(_new_record(start, ts, value).tobytes())
+            f.truncate()
+        return True
+
+    def record(self, plant_id: str, ts: float, values: Dict[str, float]) -> bool:
+        """
+        새 분석 결과 반영 (지표·단계마다 마지막 버킷 하나만 읽고 씀)
+
+        Args:
+            plant_id: 식물 ID
+            ts: 샘플 시각 (epoch 초)
+            values: 지표 이름 → 값
+
+        Returns:
+            updated: 하나 이상의 롤업에 반영됐는지 (이미 지난 버킷의 샘플은 rebuild 로만 반영)
+        """
+        updated = False
+        with self._lock:
+            for metric, value in values.items():
+                if metric not in METRICS:
+                    continue
+                for tier in TIERS:
+                    updated |= self._update(self._path(plant_id, metric, tier), bucket_start(tier, ts), ts, value)
+        return updated
+
+    def rebuild(self, plant_id: str, samples: Iterable[Tuple[float, Dict[str, float]]]) -> int:
+        """
+        기존 분석 결과로 롤업 재구성 (도입 전 데이터·순서가 어긋난 샘플 반영용 일회성 작업)
+
+        Args:
+            plant_id: 식물 ID
+            samples: (시각, 지표) 목록
+
+        Returns:
+            count: 반영된 샘플 수
+        """
+        samples = sorted(samples, key=lambda sample: sample[0])
+        with self._lock:
+            for metric in METRICS:
+                for tier in TIERS:
+                    records = []
+                    for ts, values in samples:
+                        value = values.get(metric)
+                        if value is None:
+                            continue
+                        start = bucket_start(tier, ts)
+                        if records and records[-1][0]["start"] == start:
+                            _merge(records[-1][0], ts, value)
+                        else:
+                            records.append(_new_record(start, ts, value))
+                    path = self._path(plant_id, metric, tier)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    temp_path = path.with_suffix(".tmp")
+                    with open(temp_path, 'wb') as f:
+                        for record in records:
+                            f.write(record.tobytes())
+                    os.replace(temp_path, path)
+        return len(samples)
+
+    def _records(self, plant_id: str, metric: str, tier: str) -> np.ndarray:
+        """롤업 레코드 (memmap, 파일이 없거나 비었으면 빈 배열)"""
+        path = self._path(plant_id, metric, tier)
+        try:
+            count = path.stat().st_size // RECORD_DTYPE.itemsize
+        except OSError:
+            count = 0
+        if not count:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+
+    def query(self, plant_id: str, metric: str, start: datetime = None, end: datetime = None,
+              max_points: int = DEFAULT_MAX_POINTS) -> Dict:
+        """
+        구간 지표 조회 (점 수 예산 안에서 가장 세밀한 단계)
+
+        Args:
+            plant_id: 식물 ID
+            metric: 지표 이름 (green_coverage, green_ratio, brightness)
+            start: 시작 시각 (없으면 처음부터, 시작 시각이 속한 버킷 포함)
+            end: 끝 시각 (포함, 없으면 최신까지)
+            max_points: 최대 점 수 (주별로도 넘치면 이웃 버킷을 합침)
+
+        Returns:
+            result: 선택한 단계, 합친 버킷 수, 단계별 구간 버킷 수,
+                열 단위 series (time, count, mean, min, max, last)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"알 수 없는 지표: {metric} (가능: {', '.join(METRICS)})")
+        max_points = max(1, int(max_points))
+        start_ts = start.timestamp() if start else None
+        end_ts = end.timestamp() if end else None
+
+        with self._lock:
+            candidates, spans = {}, {}
+            for tier in TIERS:
+                records = self._records(plant_id, metric, tier)
+                starts = records["start"]
+                lo = bisect.bisect_left(starts, bucket_start(tier, start_ts)) if start_ts is not None else 0
+                hi = bisect.bisect_right(starts, end_ts) if end_ts is not None else len(records)
+                candidates[tier] = max(0, hi - lo)
+                spans[tier] = (records, lo, hi)
+            tier = next((name for name in TIERS if candidates[name] <= max_points), TIERS[-1])
+            records, lo, hi = spans[tier]
+            selected = np.array(records[lo:hi])  # 선택한 구간만 복사
+
+        # 가장 거친 단계로도 넘치면 이웃 버킷을 merge 개씩 합침
+        merge = max(1, math.ceil(len(selected) / max_points))
+        if merge > 1 and len(selected):
+            groups = np.arange(0, len(selected), merge)
+            last_index = np.minimum(groups + merge, len(selected)) - 1
+            merged = np.zeros(len(groups), dtype=RECORD_DTYPE)
+            merged["start"] = selected["start"][groups]
+            for field in ("count", "sum"):
+                merged[field] = np.add.reduceat(selected[field], groups)
+            merged["min"] = np.minimum.reduceat(selected["min"], groups)
+            merged["max"] = np.maximum.reduceat(selected["max"], groups)
+            merged["last"] = selected["last"][last_index]
+            merged["last_time"] = selected["last_time"][last_index]
+            selected = merged
+
+        counts = selected["count"]
+        return {
+            "plant_id": plant_id,
+            "metric": metric,
+            "tier": tier,
+            "merged_buckets": merge,
+            "candidates": candidates,
+            "series": {
+                "time": [datetime.fromtimestamp(int(ts)).isoformat() for ts in selected["start"]],
+                "count": counts.tolist(),
+                "mean": (selected["sum"] / np.maximum(counts, 1)).tolist(),
+                "min": selected["min"].tolist(),
+                "max": selected["max"].tolist(),
+                "last": selected["last"].tolist(),
+            },
+        }
+
+
+def main():
+    """메인 함수 - 명령줄 지표 조회·롤업 재구성"""
+    from plant_monitoring_system import PlantMonitoringSystem
+
+    parser = argparse.ArgumentParser(description="식물 지표 롤업 조회 (시간별·일별·주별 자동 선택)")
+    parser.add_argument("plant", nargs="?", help="식물 ID (--rebuild 와 함께 생략하면 전체)")
+    parser.add_argument("--base-path", default="/home/pi/plant_monitoring", help="데이터 저장 기본 경로")
+    parser.add_argument("--metric", default="green_coverage", choices=list(METRICS), help="지표")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="시작 시각 (예: 2025-01-01)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="끝 시각 (포함)")
+    parser.add_argument("--points", type=int, default=DEFAULT_MAX_POINTS, help="최대 점 수")
+    parser.add_argument("--rebuild", action="store_true", help="기존 분석 결과로 성장 통계·롤업 재구성")
+    parser.add_argument("--quiet", action="store_true", help="콘솔에는 경고 이상만 출력 (로그 파일은 그대로 기록)")
+    args = parser.parse_args()
+
+    system = PlantMonitoringSystem(args.base_path, quiet=args.quiet)
+    if args.rebuild:
+        print(json.dumps(system.rebuild_growth_stats(args.plant), indent=2, ensure_ascii=False))
+    if args.plant:
+        result = system.query_metrics(args.plant, args.metric, args.start, args.end, args.points)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif not args.rebuild:
+        parser.error("식물 ID 가 필요합니다")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+S3 호환 오브젝트 스토리지 오프로드
+- 촬영이 끝난 원본 이미지와 분석 결과(메타데이터, 분석 JSON, 처리 이미지)를 업로드
+- 멀티파트·동시 업로드 (연결 풀 크기 제한), 전체 업로드 대역폭 상한
+- 업로드 원장(JSON Lines)으로 재시작 시 이어서 처리
+- 선택 사항: 검증된 업로드의 로컬 파일 삭제 (필요 시 restore 로 복원)
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from plant_monitoring_system import PlantMonitoringSystem
+from event_logging import elapsed_ms, get_logger, log_event
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig, create_transfer_manager
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import BotoCoreError, ClientError
+except ImportError:  # 오프로드를 쓰지 않으면 필요 없음
+    boto3 = None
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def file_sha256(path: Path) -> str:
+    """파일 내용의 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadLedger:
+    """업로드 원장 (경로별 마지막 줄이 현재 상태, 잘린 마지막 줄은 무시)"""
+
+    def __init__(self, ledger_file: Path):
+        self.ledger_file = Path(ledger_file)
+        self.ledger_file.parent.mkdir(parents=True, exist_ok=True)
+        self.entries: Dict[str, Dict] = {}
+        lines = 0
+        if self.ledger_file.exists():
+            with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[entry["path"]] = entry
+                    lines += 1
+        # 덮어쓴 줄이 많으면 현재 상태만 남기도록 압축
+        if lines > 2 * len(self.entries) + 1000:
+            self._compact()
+        self._file = open(self.ledger_file, 'a', encoding='utf-8')
+
+    def _compact(self):
+        temp_path = self.ledger_file.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.ledger_file)
+
+    def is_current(self, path: str, stat: os.stat_result) -> bool:
+        """같은 크기·수정 시각의 파일이 이미 업로드되었는지"""
+        entry = self.entries.get(path)
+        return (entry is not None and entry["status"] in ("uploaded", "evicted")
+                and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns)
+
+    def record(self, entry: Dict):
+        entry["time"] = datetime.now().isoformat()
+        self.entries[entry["path"]] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def sync(self):
+        """원장 디스크 동기화"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+class OffloadJob:
+    """오브젝트 스토리지 오프로드 작업"""
+
+    def __init__(self, system: PlantMonitoringSystem, settings: Dict = None):
+        """
+        오프로드 작업 초기화
+
+        Args:
+            system: 모니터링 시스템
+            settings: 오프로드 설정 (없으면 config.json 의 offload)
+        """
+        self.system = system
+        self.base_path = system.base_path
+        self.settings = settings or system.config["offload"]
+        self.logger = get_logger("offload")
+        self.ledger = UploadLedger(self.base_path / "offload" / "ledger.jsonl")
+        self.client = None
+        self.manager = None
+
+    def _connect(self) -> bool:
+        """S3 클라이언트와 전송 관리자 생성 (동시 업로드, 대역폭 상한 공유)"""
+        if self.client is not None:
+            return True
+        if boto3 is None:
+            log_event(self.logger, "offload.unavailable",
+                      "❌ boto3 가 설치되지 않았습니다 (pip install boto3)", logging.ERROR)
+            return False
+
+        settings = self.settings
+        concurrency = max(1, settings["max_concurrency"])
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings["endpoint_url"] or None,
+            region_name=settings["region"],
+            aws_access_key_id=settings["access_key"] or None,
+            aws_secret_access_key=settings["secret_key"] or None,
+            config=BotoConfig(max_pool_connections=concurrency,
+                              retries={"max_attempts": 5, "mode": "standard"})
+        )
+        bandwidth = settings["max_bandwidth_kbps"] * 1024 if settings["max_bandwidth_kbps"] else None
+        transfer_config = TransferConfig(
+            multipart_threshold=settings["multipart_threshold_mb"] * 1024 * 1024,
+            multipart_chunksize=settings["multipart_chunk_mb"] * 1024 * 1024,
+            max_concurrency=concurrency,
+            max_bandwidth=bandwidth,
+        )
+        # 관리자 하나를 모든 업로드가 공유 → 대역폭 상한이 전체 합계에 적용
+        self.manager = create_transfer_manager(self.client, transfer_config)
+        return True
+
+    def object_key(self, relative: str) -> str:
+        prefix = self.settings["prefix"].strip("/")
+        return f"{prefix}/{relative}" if prefix else relative
+
+    def iter_pending(self) -> Iterator[Tuple[str, Path, os.stat_result]]:
+        """업로드할 파일 나열 (안정화 시간이 지난 것 중 원장에 없는 것)"""
+        settle_before = time.time() - self.settings["settle_seconds"]
+        for include in self.settings["include"]:
+            root = self.base_path / include
+            if not root.exists():
+                continue
+            for path in sorted(root.rglob("*")):
+                if not path.is_file() or path.suffix == ".tmp":
+                    continue
+                stat = path.stat()
+                if stat.st_mtime > settle_before:
+                    continue
+                relative = str(path.relative_to(self.base_path))
+                if not self.ledger.is_current(relative, stat):
+                    yield relative, path, stat
+
+    def _verify(self, key: str, size: int, sha256: str) -> Optional[str]:
+        """원격 오브젝트 크기와 내용 해시 확인 → ETag (불일치 시 None)"""
+        head = self.client.head_object(Bucket=self.settings["bucket"], Key=key)
+        if head["ContentLength"] != size or head.get("Metadata", {}).get("sha256") != sha256:
+            return None
+        return head["ETag"].strip('"')
+
+    def _upload_batch(self, batch: List[Tuple[str, Path, os.stat_result]], summary: Dict):
+        """배치 제출 후 제출 순서대로 결과를 검증하고 원장 기록"""
+        submitted = []
+        for relative, path, stat in batch:
+            sha256 = file_sha256(path)
+            key = self.object_key(relative)
+            future = self.manager.upload(str(path), self.settings["bucket"], key,
+                                         extra_args={"Metadata": {"sha256": sha256}})
+            submitted.append((relative, key, stat, sha256, future))
+
+        for relative, key, stat, sha256, future in submitted:
+            try:
+                future.result()
+                etag = self._verify(key, stat.st_size, sha256)
+            except Exception as e:
+                summary["failed"] += 1
+                log_event(self.logger, "offload.upload_error", f"❌ 업로드 실패: {relative} - {e}", logging.ERROR,
+                          path=relative, key=key, error=str(e))
+                continue
+            if etag is None:
+                summary["failed"] += 1
+                log_event(self.logger, "offload.verify_failed", f"❌ 업로드 검증 실패: {relative}", logging.ERROR,
+                          path=relative, key=key)
+                continue
+
+            self.ledger.record({"path": relative, "key": key, "size": stat.st_size,
+                                "mtime_ns": stat.st_mtime_ns, "sha256": sha256, "etag": etag,
+                                "status": "uploaded"})
+            summary["uploaded"] += 1
+            summary["bytes"] += stat.st_size
+        self.ledger.sync()
+
+    def evict(self) -> int:
+        """
+        검증된 업로드 중 보존 기간이 지난 로컬 파일 삭제 (삭제 직전 원격 존재 재확인)
+
+        Returns:
+            evicted: 삭제한 파일 수
+        """
+        cutoff = time.time() - self.settings["evict_after_days"] * 86400
+        evict_roots = tuple(root.rstrip("/") + "/" for root in self.settings["evict_paths"])
+        evicted = 0
+        for relative, entry in list(self.ledger.entries.items()):
+            if entry["status"] != "uploaded" or not relative.startswith(evict_roots):
+                continue
+            path = self.base_path / relative
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if stat.st_mtime > cutoff or not self.ledger.is_current(relative, stat):
+                continue
+            try:
+                if self._verify(entry["key"], entry["size"], entry["sha256"]) is None:
+                    continue
+            except (BotoCoreError, ClientError) as e:
+                log_event(self.logger, "offload.verify_error", f"❌ 원격 확인 실패: {relative} - {e}",
+                          logging.WARNING, path=relative, error=str(e))
+                continue
+            path.unlink()
+            self.ledger.record(dict(entry, status="evicted"))
+            evicted += 1
+        self.ledger.sync()
+        return evicted
+
+    def run(self, limit: int = None, evict: bool = None) -> Optional[Dict]:
+        """
+        오프로드 실행
+
+        Args:
+            limit: 이번 실행에서 업로드할 최대 파일 수
+            evict: 로컬 삭제 여부 (없으면 설정값)
+
+        Returns:
+            summary: 업로드/실패/삭제 개수와 업로드 바이트
+        """
+        if not self._connect():
+            return None
+
+        start = time.perf_counter()
+        summary = {"uploaded": 0, "failed": 0, "bytes": 0, "evicted": 0}
+        log_event(self.logger, "offload.start",
+                  f"☁️ 오프로드 시작: {self.settings['endpoint_url']}/{self.settings['bucket']}",
+                  endpoint=self.settings["endpoint_url"], bucket=self.settings["bucket"])
+
+        batch = []
+        submitted = 0
+        for item in self.iter_pending():
+            if limit is not None and submitted >= limit:
+                break
+            batch.append(item)
+            submitted += 1
+            if len(batch) >= self.settings["batch_size"]:
+                self._upload_batch(batch, summary)
+                batch = []
+        if batch:
+            self._upload_batch(batch, summary)
+
+        if self.settings["evict_local"] if evict is None else evict:
+            summary["evicted"] = self.evict()
+
+        log_event(self.logger, "offload.done",
+                  f"✅ 오프로드 완료 - 업로드 {summary['uploaded']}개 ({summary['bytes'] / 1024 / 1024:.1f}MB), "
+                  f"실패 {summary['failed']}개, 로컬 삭제 {summary['evicted']}개",
+                  duration_ms=elapsed_ms(start), **summary)
+        return summary
+
+    def restore(self, relative: str) -> bool:
+        """
+        로컬에서 삭제된 파일을 오브젝트 스토리지에서 복원
+
+        Args:
+            relative: 기본 경로 기준 파일 경로
+
+        Returns:
+            success: 복원 여부
+        """
+        entry = self.ledger.entries.get(relative)
+        if entry is None or not self._connect():
+            return False
+        path = self.base_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(path.suffix + ".tmp")
+        try:
+            self.client.download_file(self.settings["bucket"], entry["key"], str(temp_path))
+        except (BotoCoreError, ClientError) as e:
+            log_event(self.logger, "offload.restore_error", f"❌ 복원 실패: {relative} - {e}", logging.ERROR,
+                      path=relative, error=str(e))
+            return False
+        if file_sha256(temp_path) != entry["sha256"]:
+            temp_path.unlink()
+            log_event(self.logger, "offload.restore_error", f"❌ 복원 파일 해시 불일치: {relative}", logging.ERROR,
+                      path=relative)
+            return False
+        os.replace(temp_path, path)
+        # 복원 후 수정 시각이 바뀌므로 원장을 새 상태로 기록 (재업로드 방지)
+        stat = path.stat()
+        self.ledger.record(dict(entry, status="uploaded", mtime_ns=stat.st_mtime_ns))
+        self.ledger.sync()
+        log_event(self.logger, "offload.restored", f"✅ 복원 완료: {relative}", path=relative)
+        return True
+
+    def close(self):
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
+        self.ledger.close()
+
+
+_run_lock = threading.Lock()
+
+
+def run_offload(system: PlantMonitoringSystem, limit: int = None) -> Optional[Dict]:
+    """오프로드 한 번 실행 (이미 실행 중이면 건너뜀)"""
+    if not _run_lock.acquire(blocking=False):
+        return None
+    job = OffloadJob(system)
+    try:
+        return job.run(limit=limit)
+    finally:
+        job.close()
+        _run_lock.release()
+
+
+def main():
+    """메인 함수 - 명령줄 오프로드"""
+    parser = argparse.ArgumentParser(description="S3 호환 오브젝트 스토리지로 이미지·분석 결과 오프로드")
+    parser.add_argument("--base-path", default="/home/pi/plant_monitoring", help="데이터 저장 기본 경로")
+    parser.add_argument("--limit", type=int, help="이번 실행에서 업로드할 최대 파일 수")
+    parser.add_argument("--evict", action="store_true", help="검증된 업로드의 로컬 파일 삭제 (설정과 무관하게)")
+    parser.add_argument("--restore", metavar="PATH", help="삭제된 로컬 파일 복원 (기본 경로 기준 상대 경로)")
+    parser.add_argument("--quiet", action="store_true", help="콘솔에는 경고 이상만 출력 (로그 파일은 그대로 기록)")
+    args = parser.parse_args()
+
+    system = PlantMonitoringSystem(args.base_path, quiet=args.quiet)
+    job = OffloadJob(system)
+    try:
+        if args.restore:
+            job.restore(args.restore)
+        else:
+            job.run(limit=args.limit, evict=True if args.evict else None)
+    finally:
+        job.close()
+
+if __name__ == "__main__":
+    main()
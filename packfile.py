@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+오래된 촬영 파일의 팩 파일 보관
+- 보관 기간이 지난 촬영(원본, 처리 이미지, 분석 JSON, 메타데이터)을 식물별·월별 팩 파일 하나로 묶음
+- 팩 옆의 오프셋 인덱스(JSON)에 파일 위치와 촬영 메타데이터를 기록 → 작은 파일·inode 수 감소
+- 읽기는 mmap 으로 오프셋 위치를 바로 참조 (타임라인, 분석, 웹 인터페이스에서 투명하게 사용)
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from event_logging import elapsed_ms, get_logger, log_event
+
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+
+
+def _write_json_atomic(path: Path, data: Dict):
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class PackStore:
+    """팩 파일 읽기 (경로 → 팩 위치 인덱스, mmap 캐시)"""
+
+    def __init__(self, pack_dir: Path, max_open: int = 8):
+        """
+        팩 저장소 초기화
+
+        Args:
+            pack_dir: 팩 파일 디렉토리 (pack_dir/<소유자>/<YYYY-MM>.pack)
+            max_open: 동시에 열어 둘 팩 mmap 수
+        """
+        self.pack_dir = Path(pack_dir)
+        self.pack_dir.mkdir(parents=True, exist_ok=True)
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._locations: Dict[str, Tuple[Path, int, int]] = {}
+        self._index_mtimes: Dict[Path, int] = {}
+        self._maps: "OrderedDict[Path, mmap.mmap]" = OrderedDict()
+        self._refresh()
+
+    def index_files(self, owner: str = None) -> List[Path]:
+        root = self.pack_dir / owner if owner else self.pack_dir
+        return sorted(root.rglob(f"*{INDEX_SUFFIX}"))
+
+    @staticmethod
+    def load_index(index_file: Path) -> Dict:
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"files": {}, "captures": []}
+
+    def _refresh(self) -> bool:
+        """바뀐 인덱스만 다시 읽음 (다른 프로세스의 압축 반영) → 변경 여부"""
+        changed = False
+        for index_file in self.index_files():
+            mtime = index_file.stat().st_mtime_ns
+            if self._index_mtimes.get(index_file) == mtime:
+                continue
+            pack_file = index_file.with_name(index_file.name[:-len(INDEX_SUFFIX)] + PACK_SUFFIX)
+            for relative, entry in self.load_index(index_file)["files"].items():
+                self._locations[relative] = (pack_file, entry["offset"], entry["length"])
+            self._index_mtimes[index_file] = mtime
+            changed = True
+        return changed
+
+    def locate(self, relative: str) -> Optional[Tuple[Path, int, int]]:
+        """
+        보관된 파일 위치 조회
+
+        Args:
+            relative: 기본 경로 기준 원래 파일 경로
+
+        Returns:
+            (pack_file, offset, length): 팩에 없으면 None
+        """
+        with self._lock:
+            location = self._locations.get(relative)
+            if location is None and self._refresh():
+                location = self._locations.get(relative)
+        return location
+
+    def _map(self, pack_file: Path, end: int) -> mmap.mmap:
+        """팩 mmap (LRU 캐시, 팩이 커져 범위를 벗어나면 다시 매핑)"""
+        mapped = self._maps.get(pack_file)
+        if mapped is not None and len(mapped) >= end:
+            self._maps.move_to_end(pack_file)
+            return mapped
+        if mapped is not None:
+            self._close_map(self._maps.pop(pack_file))
+        with open(pack_file, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[pack_file] = mapped
+        while len(self._maps) > self.max_open:
+            _, old = self._maps.popitem(last=False)
+            self._close_map(old)
+        return mapped
+
+    @staticmethod
+    def _close_map(mapped: mmap.mmap):
+        try:
+            mapped.close()
+        except BufferError:  # 아직 내보낸 뷰가 있으면 GC 에 맡김
+            pass
+
+    def view(self, relative: str) -> Optional[memoryview]:
+        """보관된 파일 내용의 mmap 뷰 (복사 없음)"""
+        location = self.locate(relative)
+        if location is None:
+            return None
+        pack_file, offset, length = location
+        with self._lock:
+            mapped = self._map(pack_file, offset + length)
+            return memoryview(mapped)[offset:offset + length]
+
+    def read_bytes(self, relative: str) -> Optional[bytes]:
+        view = self.view(relative)
+        return bytes(view) if view is not None else None
+
+    def read_json(self, relative: str) -> Optional[Dict]:
+        view = self.view(relative)
+        return json.loads(bytes(view).decode("utf-8")) if view is not None else None
+
+    def read_image(self, relative: str, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """보관된 이미지 디코딩 (팩 mmap 에서 바로 디코딩, flags 는 cv2.imdecode 플래그)"""
+        view = self.view(relative)
+        if view is None:
+            return None
+        return cv2.imdecode(np.frombuffer(view, dtype=np.uint8), flags)
+
+    def members(self, pattern: str = "*") -> List[str]:
+        """패턴에 맞는 보관 파일 경로 목록 (fnmatch)"""
+        with self._lock:
+            self._refresh()
+            return sorted(path for path in self._locations if fnmatch.fnmatch(path, pattern))
+
+    def captures(self, owner: str, since: datetime = None) -> List[Dict]:
+        """
+        소유자(식물)의 보관된 촬영 메타데이터 (인덱스에서 읽음, 개별 파일 없음)
+
+        Args:
+            owner: 식물 ID
+            since: 이 시각 이후 촬영만 (월 단위로 인덱스를 먼저 거름)
+        """
+        captures = []
+        since_month = since.strftime("%Y-%m") if since else ""
+        for index_file in self.index_files(owner):
+            if index_file.parent != self.pack_dir / owner:
+                continue
+            if index_file.name[:-len(INDEX_SUFFIX)] < since_month:
+                continue
+            for metadata in self.load_index(index_file)["captures"]:
+                if since is None or datetime.fromisoformat(metadata["capture_time"]) >= since:
+                    captures.append(metadata)
+        return captures
+
+
+class PackCompactor:
+    """보관 기간이 지난 촬영을 팩 파일로 압축"""
+
+    def __init__(self, base_path, packs: PackStore = None):
+        self.base_path = Path(base_path)
+        self.packs = packs or PackStore(self.base_path / "archive" / "packs")
+        self.logger = get_logger("packfile")
+
+    def _relative(self, path) -> str:
+        path = Path(path)
+        try:
+            return str(path.relative_to(self.base_path))
+        except ValueError:
+            return str(path)
+
+    def _analysis_index(self) -> Dict[Tuple[str, Optional[str]], List[Tuple[Path, Dict]]]:
+        """(원본 상대 경로, 식물 ID) → 일반 분석 결과 파일 목록"""
+        index = {}
+        data_dir = self.base_path / "analysis" / "data"
+        for analysis_file in data_dir.glob("[0-9][0-9][0-9][0-9]/*/analysis_*.json"):
+            try:
+                with open(analysis_file, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            plant_id = (result.get("metadata") or {}).get("plant_id")
+            key = (self._relative(result.get("original_image", "")), plant_id)
+            index.setdefault(key, []).append((analysis_file, result))
+        return index
+
+    def plan(self, older_than_days: int, plant_id: str = None) -> Dict[Tuple[str, str], List[Dict]]:
+        """
+        압축 대상 수집
+
+        Returns:
+            groups: (소유자, YYYY-MM) → [{"metadata", "files"}] (files 는 팩에 넣을 실제 파일 경로)
+        """
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        analysis_index = self._analysis_index()
+        groups = {}
+        for metadata_file in sorted((self.base_path / "metadata").glob("*_metadata.json")):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                capture_time = datetime.fromisoformat(metadata["capture_time"])
+            except (OSError, KeyError, ValueError):
+                continue
+            if capture_time >= cutoff:
+                continue
+            owner_plant = metadata.get("plant_id")
+            if plant_id and owner_plant != plant_id:
+                continue
+
+            # 공유 뷰 원본은 뷰 메타데이터(plant_id 없음) 쪽에서 한 번만 보관
+            view_id = metadata.get("view_id")
+            if owner_plant:
+                owner = owner_plant
+            else:
+                owner = f"_views/{view_id}" if view_id else "_general"
+
+            files = [metadata_file]
+            raw_image = self.base_path / metadata["path"]
+            if (not view_id or not owner_plant) and raw_image.exists():
+                files.append(raw_image)
+            for analysis_file, result in analysis_index.get((metadata["path"], owner_plant), []):
+                files.append(analysis_file)
+                processed = result.get("processed_image")
+                if processed and Path(processed).exists():
+                    files.append(Path(processed))
+
+            groups.setdefault((owner, capture_time.strftime("%Y-%m")), []).append(
+                {"metadata": metadata, "files": files})
+        return groups
+
+    def _pack_group(self, owner: str, month: str, captures: List[Dict]) -> Tuple[int, int]:
+        """한 팩에 추가 후 인덱스 기록, 원본 삭제 → (파일 수, 바이트)"""
+        owner_dir = self.packs.pack_dir / owner
+        owner_dir.mkdir(parents=True, exist_ok=True)
+        pack_file = owner_dir / f"{month}{PACK_SUFFIX}"
+        index_file = owner_dir / f"{month}{INDEX_SUFFIX}"
+        index = self.packs.load_index(index_file)
+        index.update(version=INDEX_VERSION, owner=owner, month=month)
+
+        packed_files = []
+        total = 0
+        # 이전 실행이 인덱스 기록 후 원본 삭제 전에 중단됐으면 같은 파일이 다시 계획됨 → 중복 추가하지 않음
+        captured = {(m["capture_time"], m["path"]) for m in index["captures"]}
+        # 1. 팩 끝에 추가 (인덱스 기록 전 중단되면 끝부분은 참조되지 않는 바이트로 남을 뿐)
+        with open(pack_file, 'ab') as pack:
+            offset = pack.seek(0, os.SEEK_END)
+            for capture in captures:
+                for path in capture["files"]:
+                    relative = self._relative(path)
+                    data = path.read_bytes()
+                    sha256 = hashlib.sha256(data).hexdigest()
+                    packed_files.append(path)
+                    if index["files"].get(relative, {}).get("sha256") == sha256:
+                        continue
+                    pack.write(data)
+                    index["files"][relative] = {
+                        "offset": offset, "length": len(data),
+                        "sha256": sha256,
+                        "mtime": path.stat().st_mtime
+                    }
+                    offset += len(data)
+                    total += len(data)
+                metadata = capture["metadata"]
+                key = (metadata["capture_time"], metadata["path"])
+                if metadata.get("plant_id") == owner and key not in captured:
+                    captured.add(key)
+                    index["captures"].append(dict(metadata, packed=self._relative(pack_file)))
+            pack.flush()
+            os.fsync(pack.fileno())
+
+        # 2. 인덱스 원자적 교체
+        index["captures"].sort(key=lambda m: m["capture_time"])
+        _write_json_atomic(index_file, index)
+
+        # 3. 원본 삭제 (인덱스가 기록된 뒤에만)
+        for path in packed_files:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        return len(packed_files), total
+
+    def run(self, older_than_days: int, plant_id: str = None, dry_run: bool = False) -> Dict:
+        """
+        압축 실행
+
+        Args:
+            older_than_days: 이 일수보다 오래된 촬영만 압축
+            plant_id: 특정 식물만 (없으면 전체)
+            dry_run: 대상만 집계하고 파일은 건드리지 않음
+
+        Returns:
+            summary: 팩/촬영/파일 수, 바이트
+        """
+        start = time.perf_counter()
+        groups = self.plan(older_than_days, plant_id)
+        summary = {"packs": len(groups), "captures": sum(len(c) for c in groups.values()),
+                   "files": 0, "bytes": 0, "dry_run": dry_run}
+        log_event(self.logger, "pack.start",
+                  f"📦 팩 압축 시작: {older_than_days}일 이전 촬영 {summary['captures']}건 → 팩 {summary['packs']}개",
+                  older_than_days=older_than_days, plant_id=plant_id, **summary)
+
+        for (owner, month), captures in sorted(groups.items()):
+            if dry_run:
+                summary["files"] += sum(len(c["files"]) for c in captures)
+                summary["bytes"] += sum(p.stat().st_size for c in captures for p in c["files"])
+                continue
+            try:
+                files, size = self._pack_group(owner, month, captures)
+            except OSError as e:
+                log_event(self.logger, "pack.error", f"❌ 팩 압축 실패: {owner}/{month} - {e}", logging.ERROR,
+                          owner=owner, month=month, error=str(e))
+                continue
+            summary["files"] += files
+            summary["bytes"] += size
+
+        log_event(self.logger, "pack.done",
+                  f"✅ 팩 압축 완료: 파일 {summary['files']}개 ({summary['bytes'] / 1024 / 1024:.1f}MB)",
+                  duration_ms=elapsed_ms(start), **summary)
+        return summary
+
+
+def main():
+    """메인 함수 - 명령줄 팩 압축"""
+    from plant_monitoring_system import PlantMonitoringSystem
+
+    parser = argparse.ArgumentParser(description="오래된 촬영 파일을 식물별·월별 팩 파일로 압축")
+    parser.add_argument("--base-path", default="/home/pi/plant_monitoring", help="데이터 저장 기본 경로")
+    parser.add_argument("--older-than", type=int, help="이 일수보다 오래된 촬영만 압축 (기본: 설정의 pack_after_days)")
+    parser.add_argument("--plant", help="압축할 식물 ID (없으면 전체)")
+    parser.add_argument("--dry-run", action="store_true", help="대상만 집계")
+    parser.add_argument("--quiet", action="store_true", help="콘솔에는 경고 이상만 출력 (로그 파일은 그대로 기록)")
+    args = parser.parse_args()
+
+    system = PlantMonitoringSystem(args.base_path, quiet=args.quiet)
+    older_than = args.older_than if args.older_than is not None else system.config["archive"]["pack_after_days"]
+    PackCompactor(system.base_path, system.packs).run(older_than, plant_id=args.plant, dry_run=args.dry_run)
+
+if __name__ == "__main__":
+    main()
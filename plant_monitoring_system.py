@@ -7,29 +7,100 @@
 - 확장 가능한 데이터 구조
 """
 
+import atexit
+import copy
 import cv2
 import numpy as np
 import os
 import json
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from pathlib import Path
 import shutil
+from stat import S_ISREG
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
 from typing import Dict, List, Optional, Tuple
 
+from tiled_analysis import ANALYSIS_STAGES, CORE_STAGES, DEFAULT_TILE_PIXELS, AnalysisPipeline, resolve_pipeline
+from vegetation_indices import DEFAULT_INDICES, DEFAULT_PERCENTILES, DEFAULT_THRESHOLDS, VegetationIndexEngine
+from analysis_cache import AnalysisCache
+from packfile import PackStore
+from frame_stack import DEFAULT_STACK_SIZE, FrameStack, FrameStackCache
+from timelapse import DEFAULT_TIMELAPSE_SIZE, TimelapseBuilder
+from growth_stats import DEFAULT_SETTINGS as GROWTH_DEFAULTS, GrowthStatsStore, extract_metrics
+from metric_rollups import DEFAULT_MAX_POINTS, RollupStore
+from event_logging import elapsed_ms, get_logger, log_event, setup_logging
+from burst_stack import BurstStack, frames_within_budget
+from camera_broker import MAX_BURST_FRAMES, broker_available, default_socket_path, request_burst, request_still
+from event_bus import publish
+from capture_pipeline import CaptureJob, CapturePipeline
+
+# 분석 알고리즘 버전 (결과가 달라지는 변경 시 올림 → 분석 지문이 바뀜)
+ANALYSIS_VERSION = 2
+
+# 분석 지문에 포함되는 설정 항목 (결과 값에 영향을 주는 것만)
+FINGERPRINT_SETTINGS = (
+    "green_hsv_lower",
+    "green_hsv_upper",
+    "plant_detection_threshold",
+    "vegetation_indices",
+    "vegetation_index_thresholds",
+    "vegetation_percentiles",
+)
+
 class PlantMonitoringSystem:
     """식물 모니터링 시스템 메인 클래스"""
     
-    def __init__(self, base_path: str = "/home/pi/plant_monitoring"):
+    def __init__(self, base_path: str = "/home/pi/plant_monitoring", quiet: bool = False):
         """
         시스템 초기화
         
         Args:
             base_path: 데이터 저장 기본 경로
+            quiet: 배치 작업용 조용한 모드 (콘솔에는 경고 이상만 출력, 로그 파일은 그대로 기록)
         """
         self.base_path = Path(base_path)
+        setup_logging(self.base_path / "logs", quiet=quiet)
+        self.logger = get_logger("system")
         self.setup_directory_structure()
         self.config_file = self.base_path / "config.json"
+        self._config_lock = threading.RLock()  # 파이프라인 저장 스레드와 설정 갱신 직렬화
         self.load_config()
+        self._resolve_analysis_pipelines()
+        self.broker_socket = default_socket_path(self.base_path)
+        self._burst_stack: Optional[BurstStack] = None  # 버스트 버퍼 (같은 크기면 재사용)
+        self._capture_pipeline: Optional[CapturePipeline] = None  # 처음 촬영할 때 시작
+        self._known_dirs = set()  # 파이프라인이 이미 만든 저장 디렉토리
+        self._grab_second, self._grab_names = None, set()  # 이번 초에 쓴 (종류, 대상, 타임스탬프)
+        
+        # 분석 결과 캐시 (원본 내용 해시 + 분석 지문)
+        self.analysis_cache = None
+        settings = self.config["analysis_settings"]
+        if settings["result_cache"]:
+            self.analysis_cache = AnalysisCache(
+                self.base_path / "analysis" / "cache",
+                max_bytes=settings["cache_max_mb"] * 1024 * 1024
+            )
+        
+        # 팩 파일로 압축된 오래된 촬영 (원래 경로로 투명하게 읽기)
+        self.packs = PackStore(self.base_path / "archive" / "packs", self.config["archive"]["max_open_packs"])
+        
+        # 식물별 이동 성장 통계 (분석마다 상수 시간 갱신)
+        self.growth_stats = GrowthStatsStore(self.base_path / "analysis" / "growth",
+                                             self.config["growth_stats"])
+        
+        # 장기 조회용 식물별 시간별·일별·주별 지표 롤업
+        self.rollups = RollupStore(self.base_path / "analysis" / "rollups")
+        
+        # 노트북 분석용 식물 이력 프레임 스택 (memmap 캐시)
+        self.frame_stacks = FrameStackCache(self, self.base_path / "analysis" / "stacks")
+        
+        # 성장 타임랩스 (인코딩한 프레임 캐시, 새 촬영만 이어 붙임)
+        self.timelapses = TimelapseBuilder(self, self.base_path / "analysis" / "timelapse",
+                                           quality=self.config["timelapse"]["quality"])
     
     def setup_directory_structure(self):
         """체계적인 디렉토리 구조 생성"""
@@ -38,28 +109,45 @@ class PlantMonitoringSystem:
         directories = [
             "raw_images",           # 원본 이미지 (절대 건드리지 않음)
             "raw_images/plants",    # 식물별 분류
+            "raw_images/views",     # 공유 카메라 뷰 (여러 식물을 한 장에 촬영)
             "analysis",            # 분석 결과
             "analysis/processed",  # 처리된 이미지
             "analysis/data",       # 분석 데이터 (JSON, CSV 등)
+            "analysis/cache",      # 분석 결과 캐시 (내용 해시 기준)
+            "analysis/growth",     # 식물별 이동 성장 통계
+            "analysis/stacks",     # 노트북용 식물 이력 프레임 스택 (memmap 캐시)
+            "analysis/timelapse",  # 식물별 타임랩스 프레임 캐시와 출력 영상
             "metadata",           # 메타데이터
             "logs",              # 로그 파일
+            "run",               # 실행 중 프로세스 소켓 (카메라 브로커)
+            "offload",           # 오브젝트 스토리지 업로드 원장
+            "archive/packs",     # 오래된 촬영의 식물별·월별 팩 파일
             "temp",              # 임시 파일
         ]
         
         for directory in directories:
             (self.base_path / directory).mkdir(parents=True, exist_ok=True)
         
-        print(f"📁 디렉토리 구조 생성 완료: {self.base_path}")
+        log_event(self.logger, "system.directories", f"📁 디렉토리 구조 생성 완료: {self.base_path}",
+                  base_path=str(self.base_path))
     
     def load_config(self):
         """설정 파일 로드"""
         
         default_config = {
             "plants": {},  # 등록된 식물들
+            "views": {},   # 공유 카메라 뷰 (뷰 하나에 여러 식물 ROI)
             "camera_settings": {
                 "width": 1920,
                 "height": 1080,
-                "quality": 95
+                "quality": 95,
+                "preview_width": 640,   # 카메라 브로커 미리보기 해상도
+                "preview_height": 480,
+                "preview_fps": 15,
+                "ring_slots": 4,        # 미리보기 공유 메모리 링 슬롯 수
+                "burst_frames": 1,      # 버스트 촬영 프레임 수 (1 = 단일 촬영, 식물별 "burst_frames" 로 덮어씀)
+                "burst_mode": "mean",   # 버스트 스택 방식 (mean / median)
+                "burst_max_mb": 96      # 버스트 버퍼 메모리 상한
             },
             "monitoring": {
                 "interval_minutes": 60,
@@ -68,33 +156,105 @@ class PlantMonitoringSystem:
             },
             "analysis_settings": {
                 "save_processed_images": True,
-                "export_data": True
+                "export_data": True,
+                "tile_pixels": DEFAULT_TILE_PIXELS,  # 스트립 분석 작업 버퍼 크기 (픽셀)
+                "green_hsv_lower": [35, 40, 40],  # 녹색 HSV 하한
+                "green_hsv_upper": [85, 255, 255],  # 녹색 HSV 상한
+                "plant_detection_threshold": 0.05,  # 녹색 비율이 이 값을 넘으면 식물로 간주
+                "vegetation_indices": list(DEFAULT_INDICES),  # 함께 계산할 식생 지수 (exg, exgr, vari, gli, 비우면 사용 안 함)
+                "vegetation_index_thresholds": dict(DEFAULT_THRESHOLDS),  # 지수별 식생 판정 임계값
+                "vegetation_percentiles": list(DEFAULT_PERCENTILES),  # 지수별로 보고할 백분위수
+                "analysis_stages": [],  # 추가 분석 단계 (sharpness, green_color - 기본 항목·식생 지수는 자동 포함)
+                "result_cache": True,  # 같은 이미지·같은 설정의 재분석 시 캐시 결과 사용
+                "cache_max_mb": 64,  # 분석 결과 캐시 용량 상한
+                "live_overlay_fps": 1.0,  # 웹 실시간 녹색 분석 스트림 프레임률
+                "live_overlay_width": 320  # 실시간 분석용 축소 폭 (픽셀)
+            },
+            "capture_pipeline": {
+                "enabled": True,  # 획득·인코딩·저장을 작업 스레드로 분리 (False 면 호출 스레드에서 순서대로)
+                "queue_size": 2,  # 단계 사이 대기 프레임 수 상한 (메모리 상한)
+                "encode_workers": 2,  # JPEG 인코딩 스레드 수
+                "batch_size": 8,  # 저장 단계가 한 번에 묶는 촬영 수
+                "fsync": True  # 묶음마다 파일·디렉토리 동기화 (전원 차단 대비)
+            },
+            "timelapse": {
+                "fps": 12,  # 타임랩스 초당 프레임 수
+                "width": DEFAULT_TIMELAPSE_SIZE[0],  # 타임랩스 프레임 크기
+                "height": DEFAULT_TIMELAPSE_SIZE[1],
+                "quality": 85  # 프레임 JPEG 품질 (바꾸면 프레임 캐시를 새로 만듦)
+            },
+            "growth_stats": copy.deepcopy(GROWTH_DEFAULTS),  # EWMA 반감기, 성장 알림 규칙
+            "offload": {
+                "enabled": False,  # S3 호환 오브젝트 스토리지 오프로드 (boto3 필요)
+                "endpoint_url": "http://localhost:9000",  # MinIO 등
+                "bucket": "plant-monitoring",
+                "prefix": "",  # 오브젝트 키 접두사 (장치 이름 등)
+                "region": "us-east-1",
+                "access_key": "",  # 비우면 환경 변수/AWS 설정 사용
+                "secret_key": "",
+                "include": ["raw_images", "metadata", "analysis/data", "analysis/processed"],
+                "settle_seconds": 120,  # 수정 후 이 시간이 지난 파일만 업로드 (촬영 중 파일 제외)
+                "batch_size": 200,  # 배치마다 업로드 원장 동기화
+                "max_concurrency": 4,  # 동시 업로드 수 = 연결 풀 크기
+                "multipart_threshold_mb": 8,
+                "multipart_chunk_mb": 8,
+                "max_bandwidth_kbps": 1024,  # 전체 업로드 대역폭 상한 (실시간 스트리밍 보호, 0 이면 제한 없음)
+                "interval_minutes": 30,  # 자동 모니터링 중 오프로드 주기
+                "evict_local": False,  # 검증된 업로드의 로컬 파일 삭제
+                "evict_paths": ["raw_images", "analysis/processed"],
+                "evict_after_days": 30  # 이 기간이 지난 파일만 삭제
+            },
+            "archive": {
+                "pack_after_days": 90,  # 이 기간이 지난 촬영은 주간 점검 때 팩 파일로 압축 (0 이면 사용 안 함)
+                "max_open_packs": 8  # 동시에 mmap 으로 열어 둘 팩 수
             }
         }
         
         if self.config_file.exists():
             with open(self.config_file, 'r', encoding='utf-8') as f:
                 self.config = json.load(f)
+            # 이전 버전 설정 파일에 없는 항목은 기본값으로 보충
+            for section, values in default_config.items():
+                current = self.config.setdefault(section, values)
+                if isinstance(values, dict) and section not in ("plants", "views"):
+                    for key, value in values.items():
+                        current.setdefault(key, value)
         else:
             self.config = default_config
             self.save_config()
     
     def save_config(self):
         """설정 파일 저장"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=2, ensure_ascii=False)
+        with self._config_lock:
+            with open(self.config_file, 'w', encoding='utf-8') as f:
+                json.dump(self.config, f, indent=2, ensure_ascii=False)
     
-    def register_plant(self, plant_name: str, plant_info: Dict = None) -> str:
+    def register_plant(self, plant_name: str, plant_info: Dict = None,
+                       view_id: str = None, roi: Tuple[float, float, float, float] = None) -> str:
         """
         식물 등록
         
         Args:
             plant_name: 식물 이름
             plant_info: 식물 추가 정보
+            view_id: 공유 카메라 뷰 ID (한 장에 여러 식물을 촬영하는 선반/트레이)
+            roi: 뷰 안의 관심 영역 (x, y, w, h), 이미지 크기 대비 0~1 비율
             
         Returns:
             plant_id: 생성된 식물 ID
         """
+        if roi is not None:
+            if not view_id:
+                raise ValueError("ROI 는 카메라 뷰 ID 와 함께 지정해야 합니다")
+            if len(roi) != 4:
+                raise ValueError(f"ROI 는 (x, y, w, h) 형식이어야 합니다: {roi}")
+            x, y, w, h = (float(v) for v in roi)
+            if not (0 <= x < 1 and 0 <= y < 1 and w > 0 and h > 0 and x + w <= 1 and y + h <= 1):
+                raise ValueError(f"ROI 는 0~1 범위의 비율이어야 합니다: {roi}")
+            roi = [x, y, w, h]
+        elif view_id:
+            roi = [0.0, 0.0, 1.0, 1.0]  # ROI 없이 뷰에 등록하면 전체 화면
+        
         plant_id = plant_name.lower().replace(' ', '_')
         
         # 식물 전용 디렉토리 생성
@@ -110,158 +270,800 @@ class PlantMonitoringSystem:
             "image_count": 0,
             "last_captured": None
         }
+        if view_id:
+            plant_data["view_id"] = view_id
+            plant_data["roi"] = roi
+            self.config["views"].setdefault(view_id, {
+                "registered_date": plant_data["registered_date"],
+                "image_count": 0,
+                "last_captured": None
+            })
         
         self.config["plants"][plant_id] = plant_data
         self.save_config()
         
-        print(f"🌱 식물 등록 완료: {plant_name} (ID: {plant_id})")
+        log_event(self.logger, "plant.registered", f"🌱 식물 등록 완료: {plant_name} (ID: {plant_id})",
+                  plant_id=plant_id, plant_name=plant_name, view_id=view_id, roi=roi)
         return plant_id
     
-    def capture_image(self, plant_id: str = None, notes: str = "") -> Optional[Dict]:
+    def get_view_plants(self, view_id: str) -> List[str]:
+        """카메라 뷰에 등록된 식물 ID 목록"""
+        return [plant_id for plant_id, plant in self.config["plants"].items()
+                if plant.get("view_id") == view_id]
+    
+    def _burst_settings(self, plant_ids: List[str]) -> Tuple[int, str]:
+        """식물별 버스트 설정 (여러 식물이면 가장 큰 프레임 수)"""
+        camera_settings = self.config["camera_settings"]
+        frames = camera_settings["burst_frames"]
+        mode = camera_settings["burst_mode"]
+        plant_frames = [self.config["plants"][pid].get("burst_frames") for pid in plant_ids
+                        if pid in self.config["plants"]]
+        plant_frames = [f for f in plant_frames if f]
+        if plant_frames:
+            frames = max(plant_frames)
+        for pid in plant_ids:
+            mode = self.config["plants"].get(pid, {}).get("burst_mode", mode)
+        return max(1, int(frames)), mode
+    
+    def _get_burst_stack(self, frames: int, shape: Tuple[int, int, int]) -> BurstStack:
+        """메모리 상한 안의 버스트 버퍼 (이전 버퍼와 크기가 같으면 재사용)"""
+        max_bytes = self.config["camera_settings"]["burst_max_mb"] * 1024 * 1024
+        frames = min(frames_within_budget(frames, shape, max_bytes), MAX_BURST_FRAMES)
+        if self._burst_stack is None or not self._burst_stack.fits(frames, shape):
+            self._burst_stack = None  # 새 버퍼 할당 전에 이전 버퍼 해제
+            self._burst_stack = BurstStack(frames, shape)
+        self._burst_stack.reset()
+        return self._burst_stack
+    
+    def _grab_frame(self, start: float, burst_frames: int = 1, burst_mode: str = "mean",
+                    **fields) -> Tuple[Optional[np.ndarray], bool, Optional[Dict]]:
         """
-        이미지 촬영 및 체계적 저장
+        카메라 프레임 한 장 획득 (burst_frames > 1 이면 연속 촬영 후 스택)
         
         Args:
-            plant_id: 대상 식물 ID (없으면 일반 촬영)
-            notes: 촬영 메모
+            start: 촬영 시작 시각 (time.perf_counter 기준, 로그 소요 시간용)
+            burst_frames: 버스트 프레임 수
+            burst_mode: 버스트 스택 방식 (mean / median)
+            **fields: 오류 로그에 추가할 필드
             
         Returns:
-            capture_info: 촬영 정보
+            (frame, via_broker, burst_info): 실패 시 frame 은 None, 단일 촬영이면 burst_info 는 None
         """
-        print("📸 이미지 촬영 시작...")
+        camera_settings = self.config["camera_settings"]
+        width, height = camera_settings["width"], camera_settings["height"]
+        via_broker = broker_available(self.broker_socket)
+        stack = None
+        
+        if via_broker:
+            # 카메라 브로커가 장치를 소유 중 → 고해상도 정지 영상 요청 (미리보기와 중재됨)
+            if burst_frames > 1:
+                stack = self._get_burst_stack(burst_frames, (height, width, 3))
+                ret = request_burst(self.broker_socket, stack, width, height) > 0
+            else:
+                frame = request_still(self.broker_socket, width, height)
+                ret = frame is not None
+        else:
+            # 카메라 초기화
+            cap = cv2.VideoCapture(0)
+            
+            if not cap.isOpened():
+                log_event(self.logger, "capture.camera_error", "❌ 카메라 연결 실패", logging.ERROR,
+                          duration_ms=elapsed_ms(start), **fields)
+                return None, False, None
+            
+            # 카메라 설정 적용
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            
+            # 이미지 촬영
+            ret, frame = cap.read()
+            if ret and burst_frames > 1:
+                # 나머지 프레임은 미리 할당된 링 슬롯에 직접 기록
+                stack = self._get_burst_stack(burst_frames, frame.shape)
+                stack.add(frame)
+                while stack.count < stack.capacity:
+                    slot = stack.next_slot()
+                    ok, out = cap.read(slot)
+                    if not ok:
+                        break
+                    if out.__array_interface__["data"][0] == slot.__array_interface__["data"][0]:
+                        stack.commit()
+                    else:
+                        stack.add(out)
+            cap.release()
+        
+        if not ret:
+            log_event(self.logger, "capture.read_error", "❌ 이미지 촬영 실패", logging.ERROR,
+                      via_broker=via_broker, duration_ms=elapsed_ms(start), **fields)
+            return None, via_broker, None
         
-        # 카메라 초기화
-        cap = cv2.VideoCapture(0)
+        if stack is None:
+            return frame, via_broker, None
         
-        if not cap.isOpened():
-            print("❌ 카메라 연결 실패")
+        grab_ms = elapsed_ms(start)
+        stack_start = time.perf_counter()
+        frame = stack.stack(burst_mode)
+        burst_info = {
+            "frames": stack.count,
+            "requested": burst_frames,
+            "mode": burst_mode,
+            "grab_ms": grab_ms,
+            "stack_ms": elapsed_ms(stack_start),
+            "buffer_bytes": stack.nbytes
+        }
+        log_event(self.logger, "capture.burst",
+                  f"🎞️ 버스트 {stack.count}장 {burst_mode} 스택 ({burst_info['stack_ms']:.0f}ms, "
+                  f"버퍼 {stack.nbytes / 1024 / 1024:.1f}MB)",
+                  via_broker=via_broker, **burst_info, **fields)
+        return frame, via_broker, burst_info
+    
+    def _get_capture_pipeline(self) -> Optional[CapturePipeline]:
+        """촬영 파이프라인 (처음 사용할 때 작업 스레드 시작, 비활성화 시 None)"""
+        settings = self.config["capture_pipeline"]
+        if not settings["enabled"]:
             return None
+        with self._config_lock:
+            if self._capture_pipeline is None:
+                self._capture_pipeline = CapturePipeline(
+                    self._grab_job, self._encode_job, self._persist_jobs, self._finish_job,
+                    queue_size=settings["queue_size"],
+                    encode_workers=settings["encode_workers"],
+                    batch_size=settings["batch_size"]
+                )
+                atexit.register(self.close_capture_pipeline)
+        return self._capture_pipeline
+    
+    def _submit(self, job: CaptureJob) -> Future:
+        pipeline = self._get_capture_pipeline()
+        if pipeline is not None:
+            return pipeline.submit(job)
         
-        # 카메라 설정 적용
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.config["camera_settings"]["width"])
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.config["camera_settings"]["height"])
+        # 파이프라인 비활성화: 호출 스레드에서 단계를 차례로 실행
+        if self._grab_job(job):
+            self._encode_job(job)
+            self._persist_jobs([job])
+            job.future.set_result(job.result)
+            self._finish_job(job)
+        else:
+            job.future.set_result(None)
+        return job.future
+    
+    def submit_capture(self, plant_id: str = None, notes: str = "") -> Future:
+        """
+        이미지 촬영 요청 (획득·인코딩·저장은 파이프라인 작업 스레드에서 진행)
         
-        # 이미지 촬영
-        ret, frame = cap.read()
-        cap.release()
+        Args:
+            plant_id: 대상 식물 ID (없으면 일반 촬영)
+            notes: 촬영 메모
+            
+        Returns:
+            future: 저장이 끝나면 촬영 정보(실패 시 None), 자동 분석은 그 뒤에 진행
+        """
+        log_event(self.logger, "capture.start", "📸 이미지 촬영 시작...", plant_id=plant_id)
+        return self._submit(CaptureJob("plant", plant_id, notes))
+    
+    def submit_view_capture(self, view_id: str, notes: str = "") -> Future:
+        """
+        공유 카메라 뷰 촬영 요청 (한 번 촬영해 뷰의 모든 식물 타임라인에 기록)
         
-        if not ret:
-            print("❌ 이미지 촬영 실패")
-            return None
+        Args:
+            view_id: 카메라 뷰 ID
+            notes: 촬영 메모
+            
+        Returns:
+            future: 저장이 끝나면 뷰 촬영 정보(식물별 메타데이터는 "plants" 항목, 실패 시 None)
+        """
+        job = CaptureJob("view", view_id, notes)
+        plant_ids = self.get_view_plants(view_id)
+        if not plant_ids:
+            log_event(self.logger, "view.empty", f"❌ 식물이 등록되지 않은 뷰: {view_id}", logging.WARNING,
+                      view_id=view_id)
+            job.future.set_result(None)
+            return job.future
+        
+        log_event(self.logger, "capture.start", f"📸 뷰 촬영 시작: {view_id} ({len(plant_ids)}개 식물)",
+                  view_id=view_id, plants=len(plant_ids))
+        job.fields["plant_ids"] = plant_ids
+        return self._submit(job)
+    
+    def capture_image(self, plant_id: str = None, notes: str = "") -> Optional[Dict]:
+        """
+        이미지 촬영 및 체계적 저장 (저장 완료까지 대기)
+        
+        Args:
+            plant_id: 대상 식물 ID (없으면 일반 촬영)
+            notes: 촬영 메모
+            
+        Returns:
+            capture_info: 촬영 정보
+        """
+        return self.submit_capture(plant_id, notes).result()
+    
+    def capture_view(self, view_id: str, notes: str = "") -> Optional[Dict]:
+        """
+        공유 카메라 뷰 촬영 (저장 완료까지 대기)
+        
+        Args:
+            view_id: 카메라 뷰 ID
+            notes: 촬영 메모
+            
+        Returns:
+            capture_info: 뷰 촬영 정보 (식물별 메타데이터는 "plants" 항목)
+        """
+        return self.submit_view_capture(view_id, notes).result()
+    
+    def wait_for_captures(self, timeout: float = None) -> bool:
+        """제출된 촬영이 자동 분석까지 모두 끝날 때까지 대기"""
+        if self._capture_pipeline is None:
+            return True
+        return self._capture_pipeline.drain(timeout)
+    
+    def close_capture_pipeline(self):
+        """남은 촬영을 저장하고 파이프라인 작업 스레드 종료"""
+        pipeline, self._capture_pipeline = self._capture_pipeline, None
+        if pipeline is not None:
+            pipeline.close()
+    
+    def _grab_job(self, job: CaptureJob) -> bool:
+        """획득 단계: 프레임 획득, 촬영 시각과 저장 경로 결정"""
+        fields = job.fields
+        if job.kind == "view":
+            burst_frames, burst_mode = self._burst_settings(fields["plant_ids"])
+            frame, via_broker, burst_info = self._grab_frame(job.start, burst_frames, burst_mode,
+                                                             view_id=job.target)
+        else:
+            burst_frames, burst_mode = self._burst_settings([job.target] if job.target else [])
+            frame, via_broker, burst_info = self._grab_frame(job.start, burst_frames, burst_mode,
+                                                             plant_id=job.target)
+        if frame is None:
+            return False
+        if burst_info is not None:
+            frame = frame.copy()  # 버스트 결과 버퍼는 다음 버스트에서 재사용됨
         
-        # 촬영 시간 및 파일명 생성
         capture_time = datetime.now()
         timestamp = capture_time.strftime("%Y%m%d_%H%M%S")
-        
-        # 저장 경로 결정
-        if plant_id and plant_id in self.config["plants"]:
+        # 같은 초에 같은 대상을 연속 촬영하면 순번을 붙여 이미지·메타데이터 덮어쓰기 방지 (획득 단계는 스레드 하나)
+        if timestamp != self._grab_second:
+            self._grab_second, self._grab_names = timestamp, set()
+        base_timestamp, sequence = timestamp, 1
+        while (job.kind, job.target, timestamp) in self._grab_names:
+            timestamp = f"{base_timestamp}_{sequence}"
+            sequence += 1
+        self._grab_names.add((job.kind, job.target, timestamp))
+        month_parts = (capture_time.strftime("%Y"), capture_time.strftime("%m"))
+        if job.kind == "view":
+            save_dir = self.base_path.joinpath("raw_images", "views", job.target, *month_parts)
+            filename = f"{job.target}_{timestamp}.jpg"
+        elif job.target and job.target in self.config["plants"]:
             # 식물별 저장
-            save_dir = self.base_path / "raw_images" / "plants" / plant_id / capture_time.strftime("%Y") / capture_time.strftime("%m")
-            filename = f"{plant_id}_{timestamp}.jpg"
+            save_dir = self.base_path.joinpath("raw_images", "plants", job.target, *month_parts)
+            filename = f"{job.target}_{timestamp}.jpg"
         else:
             # 일반 저장
-            save_dir = self.base_path / "raw_images" / capture_time.strftime("%Y") / capture_time.strftime("%m")
+            save_dir = self.base_path.joinpath("raw_images", *month_parts)
             filename = f"capture_{timestamp}.jpg"
         
-        save_dir.mkdir(parents=True, exist_ok=True)
-        image_path = save_dir / filename
-        
-        # 고품질로 이미지 저장
-        cv2.imwrite(str(image_path), frame, [
+        fields.update(frame=frame, via_broker=via_broker, burst_info=burst_info,
+                      grab_ms=elapsed_ms(job.start), capture_time=capture_time, timestamp=timestamp,
+                      image_path=save_dir / filename, filename=filename)
+        return True
+    
+    def _encode_job(self, job: CaptureJob):
+        """인코딩 단계: 고품질 JPEG 인코딩 (메모리에서)"""
+        fields = job.fields
+        start = time.perf_counter()
+        ok, encoded = cv2.imencode(".jpg", fields["frame"], [
             cv2.IMWRITE_JPEG_QUALITY, self.config["camera_settings"]["quality"]
         ])
+        if not ok:
+            raise RuntimeError("JPEG 인코딩 실패")
+        frame = fields.pop("frame")  # 인코딩 후에는 프레임 메모리 해제
+        fields.update(encoded=encoded, encode_ms=elapsed_ms(start),
+                      shape=frame.shape)
+    
+    def _persist_jobs(self, jobs: List[CaptureJob]):
+        """
+        저장 단계: 작업 묶음의 이미지·메타데이터 기록
+        
+        디렉토리 생성, 파일 동기화, 설정 저장, 통계 게시는 묶음마다 한 번.
+        """
+        start = time.perf_counter()
+        settings = self.config["capture_pipeline"]
+        metadata_dir = self.base_path / "metadata"
         
-        # 메타데이터 생성
-        metadata = {
-            "filename": filename,
-            "path": str(image_path.relative_to(self.base_path)),
-            "absolute_path": str(image_path),
-            "plant_id": plant_id,
-            "plant_name": self.config["plants"].get(plant_id, {}).get("name", "Unknown") if plant_id else "General",
-            "capture_time": capture_time.isoformat(),
-            "timestamp": timestamp,
-            "notes": notes,
-            "camera_settings": self.config["camera_settings"].copy(),
-            "image_properties": {
-                "width": frame.shape[1],
-                "height": frame.shape[0],
-                "channels": frame.shape[2],
-                "size_bytes": image_path.stat().st_size
+        # 1. 처음 보는 디렉토리만 생성
+        for directory in {job.fields["image_path"].parent for job in jobs} - self._known_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(directory)
+        
+        # 2. 이미지와 메타데이터 기록
+        written = []
+        for job in jobs:
+            fields = job.fields
+            image_path = fields["image_path"]
+            try:
+                f = open(image_path, 'wb')
+            except FileNotFoundError:  # 생성 후 외부에서 디렉토리가 지워진 경우
+                image_path.parent.mkdir(parents=True, exist_ok=True)
+                f = open(image_path, 'wb')
+            with f:
+                f.write(fields.pop("encoded"))
+                size_bytes = f.tell()
+            written.append(image_path)
+            
+            height, width, channels = fields["shape"]
+            metadata = {
+                "filename": fields["filename"],
+                "path": str(image_path.relative_to(self.base_path)),
+                "absolute_path": str(image_path),
+                "plant_id": job.target if job.kind == "plant" else None,
+                "plant_name": (self.config["plants"].get(job.target, {}).get("name", "Unknown")
+                               if job.target else "General"),
+                "capture_time": fields["capture_time"].isoformat(),
+                "timestamp": fields["timestamp"],
+                "notes": job.notes,
+                "camera_settings": self.config["camera_settings"].copy(),
+                "image_properties": {
+                    "width": width,
+                    "height": height,
+                    "channels": channels,
+                    "size_bytes": size_bytes
+                },
+                "burst": fields["burst_info"]  # 버스트 스택 정보 (단일 촬영이면 None)
             }
-        }
+            timestamp = fields["timestamp"]
+            
+            if job.kind == "view":
+                metadata.update(plant_name=f"View {job.target}", view_id=job.target,
+                                plant_ids=fields["plant_ids"])
+                metadata_files = [(metadata_dir / f"{timestamp}_{job.target}_view_metadata.json", metadata)]
+                # 식물별 타임라인 항목 (같은 원본 이미지 + 식물 ROI)
+                plant_metadata = []
+                for plant_id in fields["plant_ids"]:
+                    plant = self.config["plants"][plant_id]
+                    entry = dict(metadata, plant_id=plant_id, plant_name=plant["name"], roi=plant["roi"])
+                    del entry["plant_ids"]
+                    metadata_files.append((metadata_dir / f"{timestamp}_{plant_id}_metadata.json", entry))
+                    plant_metadata.append(entry)
+                fields["plant_metadata"] = plant_metadata
+            else:
+                metadata_name = f"{timestamp}_{job.target}_metadata.json" if job.target else f"{timestamp}_metadata.json"
+                metadata_files = [(metadata_dir / metadata_name, metadata)]
+            
+            for metadata_path, data in metadata_files:
+                with open(metadata_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                written.append(metadata_path)
+            fields["metadata"] = metadata
         
-        # 메타데이터 저장
-        metadata_path = self.base_path / "metadata" / f"{timestamp}_metadata.json"
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        # 3. 묶음 단위 동기화 (쓰기가 모두 끝난 뒤 한꺼번에 → 저장 장치가 쓰기를 병합)
+        if settings["fsync"]:
+            for path in written + sorted({path.parent for path in written}):
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
         
-        # 설정 업데이트
-        if plant_id and plant_id in self.config["plants"]:
-            self.config["plants"][plant_id]["image_count"] += 1
-            self.config["plants"][plant_id]["last_captured"] = capture_time.isoformat()
+        # 4. 설정 업데이트 (묶음당 한 번 저장)
+        with self._config_lock:
+            for job in jobs:
+                fields = job.fields
+                capture_time = fields["capture_time"].isoformat()
+                if job.kind == "view":
+                    for plant_id in fields["plant_ids"]:
+                        plant = self.config["plants"][plant_id]
+                        plant["image_count"] += 1
+                        plant["last_captured"] = capture_time
+                    view = self.config["views"].setdefault(job.target, {"registered_date": capture_time, "image_count": 0})
+                    view["image_count"] = view.get("image_count", 0) + 1
+                    view["last_captured"] = capture_time
+                elif job.target and job.target in self.config["plants"]:
+                    self.config["plants"][job.target]["image_count"] += 1
+                    self.config["plants"][job.target]["last_captured"] = capture_time
             self.save_config()
+        persist_ms = elapsed_ms(start)
         
-        print(f"✅ 이미지 저장 완료:")
-        print(f"   📁 경로: {image_path}")
-        print(f"   📊 크기: {metadata['image_properties']['width']}x{metadata['image_properties']['height']}")
-        print(f"   💾 용량: {metadata['image_properties']['size_bytes']/1024:.1f}KB")
+        # 5. 로그와 대시보드 알림
+        for job in jobs:
+            fields = job.fields
+            metadata = fields["metadata"]
+            properties = metadata["image_properties"]
+            timings = dict(via_broker=fields["via_broker"], grab_ms=fields["grab_ms"],
+                           encode_ms=fields["encode_ms"], persist_ms=persist_ms, batch=len(jobs),
+                           duration_ms=elapsed_ms(job.start))
+            if job.kind == "view":
+                plant_ids = fields["plant_ids"]
+                log_event(self.logger, "capture.saved",
+                          f"✅ 뷰 이미지 저장 완료: {fields['image_path']} ({properties['width']}x{properties['height']}, "
+                          f"{len(plant_ids)}개 식물)",
+                          view_id=job.target, plant_ids=plant_ids, path=metadata["path"],
+                          size_bytes=properties["size_bytes"], **timings)
+                event = {"plant_id": None, "view_id": job.target, "plant_ids": plant_ids}
+                job.result = dict(metadata, plants=fields["plant_metadata"])
+            else:
+                log_event(self.logger, "capture.saved",
+                          f"✅ 이미지 저장 완료: {fields['image_path']} ({properties['width']}x{properties['height']}, "
+                          f"{properties['size_bytes']/1024:.1f}KB)",
+                          plant_id=job.target, path=metadata["path"], width=properties["width"],
+                          height=properties["height"], size_bytes=properties["size_bytes"], **timings)
+                event = {"plant_id": job.target}
+                job.result = metadata
+            
+            publish("capture", dict(event, **{
+                "plant_name": metadata["plant_name"],
+                "filename": metadata["filename"],
+                "path": metadata["path"],
+                "capture_time": metadata["capture_time"],
+                "width": properties["width"],
+                "height": properties["height"],
+                "size_bytes": properties["size_bytes"]
+            }))
+        publish("stats", self.get_system_stats())
+    
+    def _finish_job(self, job: CaptureJob):
+        """후처리 단계: 자동 분석 (저장 결과를 호출자에게 돌려준 뒤 실행)"""
+        if not self.config["monitoring"]["auto_analysis"]:
+            return
+        fields = job.fields
+        if job.kind == "view":
+            self.analyze_view(str(fields["image_path"]), fields["plant_metadata"])
+        else:
+            self.analyze_image(str(fields["image_path"]), fields["metadata"])
+    
+    def analyze_view(self, image_path: str, plant_metadata: List[Dict], version_tag: str = None) -> List[Dict]:
+        """
+        공유 뷰 이미지의 식물별 ROI 분석 (모든 ROI 를 한 번의 순회로 계산)
         
-        # 자동 분석 실행
-        if self.config["monitoring"]["auto_analysis"]:
-            self.analyze_image(str(image_path), metadata)
+        Args:
+            image_path: 뷰 원본 이미지 경로
+            plant_metadata: 식물별 메타데이터 (plant_id, roi 포함)
+            version_tag: 재분석 버전 태그 (지정 시 analysis/data/<태그>/ 아래에 저장,
+                성장 통계에는 반영하지 않음)
+            
+        Returns:
+            analysis_results: 식물별 분석 결과
+        """
+        log_event(self.logger, "analysis.start", f"🔍 뷰 ROI 분석 시작: {Path(image_path).name} ({len(plant_metadata)}개 ROI)",
+                  image=image_path, rois=len(plant_metadata), version_tag=version_tag)
+        start = time.perf_counter()
+        
+        img = self.load_image(image_path)
+        if img is None:
+            log_event(self.logger, "analysis.read_error", "❌ 이미지 읽기 실패", logging.ERROR,
+                      image=image_path, duration_ms=elapsed_ms(start))
+            return []
+        decode_ms = elapsed_ms(start)
+        
+        # 비율 ROI → 픽셀 ROI
+        height, width = img.shape[:2]
+        pixel_rois = []
+        for metadata in plant_metadata:
+            x, y, w, h = metadata["roi"]
+            x0, y0 = int(round(x * width)), int(round(y * height))
+            x1, y1 = min(width, int(round((x + w) * width))), min(height, int(round((y + h) * height)))
+            pixel_rois.append((x0, y0, max(0, x1 - x0), max(0, y1 - y0)))
+        
+        settings = self.config["analysis_settings"]
+        roi_results = self.analysis_pipeline.analyze_rois(
+            img, pixel_rois, self._analysis_params(),
+            tile_pixels=settings.get("tile_pixels", DEFAULT_TILE_PIXELS)
+        )
         
-        return metadata
+        analysis_time = datetime.now()
+        timestamp = Path(image_path).stem  # 원본 파일명 + 식물 ID (촬영·식물마다 고유)
+        tag_parts = (version_tag,) if version_tag else ()
+        analysis_dir = self.base_path.joinpath("analysis", "data", *tag_parts) / analysis_time.strftime("%Y") / analysis_time.strftime("%m")
+        analysis_dir.mkdir(parents=True, exist_ok=True)
+        fingerprint = self.get_analysis_fingerprint()
+        
+        analysis_results = []
+        for metadata, pixel_roi, roi_result in zip(plant_metadata, pixel_rois, roi_results):
+            analysis_result = {
+                "original_image": image_path,
+                "analysis_time": analysis_time.isoformat(),
+                "analysis_fingerprint": fingerprint,
+                "analysis_version": ANALYSIS_VERSION,
+                "version_tag": version_tag,
+                "metadata": metadata,
+                "roi": {"normalized": metadata["roi"], "pixels": list(pixel_roi)},
+                "analysis": self._build_analysis(roi_result)
+            }
+            analysis_file = analysis_dir / f"analysis_{timestamp}_{metadata['plant_id']}.json"
+            analysis_result["analysis_file"] = str(analysis_file)
+            with open(analysis_file, 'w', encoding='utf-8') as f:
+                json.dump(analysis_result, f, indent=2, ensure_ascii=False)
+            self._publish_analysis(analysis_result)
+            if not version_tag:
+                self._record_growth(analysis_result)
+            analysis_results.append(analysis_result)
+        
+        log_event(self.logger, "analysis.done",
+                  f"✅ 뷰 ROI 분석 완료: {len(analysis_results)}개 식물",
+                  image=image_path, rois=len(analysis_results), fingerprint=fingerprint,
+                  decode_ms=decode_ms, duration_ms=elapsed_ms(start))
+        return analysis_results
+    
+    def relative_path(self, path) -> str:
+        """기본 경로 기준 상대 경로 (기본 경로 밖이면 그대로)"""
+        path = Path(path)
+        try:
+            return str(path.relative_to(self.base_path))
+        except ValueError:
+            return str(path)
     
-    def analyze_image(self, image_path: str, metadata: Dict = None) -> Optional[Dict]:
+    def load_image(self, image_path, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """
+        이미지 읽기 (로컬 파일이 없으면 팩 파일에서 mmap 으로 디코딩)
+        
+        Args:
+            image_path: 이미지 경로 (절대 경로 또는 기본 경로 기준 상대 경로)
+            flags: cv2 읽기 플래그 (예: cv2.IMREAD_REDUCED_COLOR_4 로 축소 디코딩)
+            
+        Returns:
+            img: BGR 이미지 (없으면 None)
+        """
+        path = Path(image_path)
+        if not path.is_absolute():
+            path = self.base_path / path
+        if path.exists():
+            return cv2.imread(str(path), flags)
+        return self.packs.read_image(self.relative_path(path), flags)
+    
+    def read_file(self, relative: str) -> Optional[memoryview]:
+        """
+        저장 파일 내용 (로컬 파일 또는 팩 파일의 mmap 뷰)
+        
+        Args:
+            relative: 기본 경로 기준 상대 경로
+            
+        Returns:
+            data: 파일 내용 (없으면 None)
+        """
+        path = self.base_path / relative
+        if path.is_file():
+            return memoryview(path.read_bytes())
+        return self.packs.view(relative)
+
+    def locate_file(self, relative: str) -> Optional[Tuple[Path, int, int, float]]:
+        """
+        저장 파일 위치 (내용을 읽지 않고 파일 전송에 사용)
+
+        Args:
+            relative: 기본 경로 기준 상대 경로
+
+        Returns:
+            (path, offset, length, mtime): 로컬 파일이면 offset 0, 팩 파일이면 팩 안의 위치 (없으면 None)
+        """
+        path = self.base_path / relative
+        try:
+            info = path.stat()
+            if S_ISREG(info.st_mode):
+                return path, 0, info.st_size, info.st_mtime
+        except OSError:
+            pass
+        location = self.packs.locate(relative)
+        if location is None:
+            return None
+        pack_file, offset, length = location
+        try:
+            return pack_file, offset, length, pack_file.stat().st_mtime
+        except OSError:
+            return None
+
+    def get_analysis_fingerprint(self) -> str:
+        """
+        분석 지문 계산
+        
+        분석 결과에 영향을 주는 설정과 알고리즘 버전의 해시.
+        지문이 같으면 같은 이미지에 대해 같은 결과가 나온다.
+        
+        Returns:
+            fingerprint: 16자리 16진수 문자열
+        """
+        settings = self.config["analysis_settings"]
+        params = {key: settings.get(key) for key in FINGERPRINT_SETTINGS}
+        params["analysis_version"] = ANALYSIS_VERSION
+        if settings.get("analysis_stages"):  # 추가 단계가 없으면 기존 지문 유지
+            params["analysis_stages"] = sorted(settings["analysis_stages"])
+            # 스트립 경계에 따라 값이 달라지는 단계가 켜져 있으면 스트립 크기도 결과에 영향
+            if any(getattr(ANALYSIS_STAGES.get(name), "tile_dependent", False)
+                   for name in settings["analysis_stages"]):
+                params["tile_pixels"] = settings.get("tile_pixels", DEFAULT_TILE_PIXELS)
+        encoded = json.dumps(params, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()[:16]
+    
+    def analyze_image(self, image_path: str, metadata: Dict = None, version_tag: str = None,
+                      use_cache: bool = True) -> Optional[Dict]:
         """
         이미지 분석 (원본은 건드리지 않음)
         
         Args:
             image_path: 분석할 이미지 경로
             metadata: 이미지 메타데이터
+            version_tag: 재분석 버전 태그 (지정 시 analysis/*/<태그>/ 아래에 저장,
+                기존 결과는 덮어쓰지 않음)
+            use_cache: 같은 이미지·같은 분석 지문의 캐시 결과 사용 여부
             
         Returns:
             analysis_result: 분석 결과
         """
-        print(f"🔍 이미지 분석 시작: {Path(image_path).name}")
-        
-        # 원본 이미지 읽기
-        img = cv2.imread(image_path)
-        if img is None:
-            print("❌ 이미지 읽기 실패")
-            return None
+        log_event(self.logger, "analysis.start", f"🔍 이미지 분석 시작: {Path(image_path).name}",
+                  image=image_path, version_tag=version_tag)
+        start = time.perf_counter()
         
+        fingerprint = self.get_analysis_fingerprint()
         analysis_time = datetime.now()
-        timestamp = analysis_time.strftime("%Y%m%d_%H%M%S")
+        # 원본 파일명으로 저장 (촬영마다 고유 → 같은 초에 여러 장을 분석해도 충돌 없음)
+        timestamp = Path(image_path).stem
+        tag_parts = (version_tag,) if version_tag else ()
         
         # 분석 결과 저장 경로
-        analysis_dir = self.base_path / "analysis" / "data" / analysis_time.strftime("%Y") / analysis_time.strftime("%m")
+        analysis_dir = self.base_path.joinpath("analysis", "data", *tag_parts) / analysis_time.strftime("%Y") / analysis_time.strftime("%m")
         analysis_dir.mkdir(parents=True, exist_ok=True)
+        analysis_file = analysis_dir / f"analysis_{timestamp}.json"
+        
+        # 캐시 조회 (이미지 디코딩 없이 파일 내용 해시만 계산)
+        if use_cache and self.analysis_cache and os.path.exists(image_path):
+            cached = self.analysis_cache.get(image_path, fingerprint)
+            if cached is not None:
+                # 같은 내용의 다른 촬영일 수 있으므로 분석 값만 재사용하고 이 촬영의 결과로 기록
+                analysis_result = {
+                    "original_image": image_path,
+                    "analysis_time": analysis_time.isoformat(),
+                    "analysis_fingerprint": fingerprint,
+                    "analysis_version": ANALYSIS_VERSION,
+                    "version_tag": version_tag,
+                    "metadata": metadata,
+                    "analysis": cached["analysis"],
+                    "cache_hit": True,
+                    "cached_from": cached.get("analysis_file"),
+                    "analysis_file": str(analysis_file)
+                }
+                if cached.get("processed_image"):  # 픽셀이 같으므로 처리 이미지도 그대로 참조
+                    analysis_result["processed_image"] = cached["processed_image"]
+                with open(analysis_file, 'w', encoding='utf-8') as f:
+                    json.dump(analysis_result, f, indent=2, ensure_ascii=False)
+                log_event(self.logger, "analysis.cache_hit", f"♻️ 캐시된 분석 결과 사용: {cached.get('analysis_file')} → {analysis_file}",
+                          image=image_path, analysis_file=str(analysis_file),
+                          cached_from=cached.get("analysis_file"), duration_ms=elapsed_ms(start))
+                self._publish_analysis(analysis_result)
+                if not version_tag:
+                    self._record_growth(analysis_result)
+                return analysis_result
+        
+        # 원본 이미지 읽기
+        img = self.load_image(image_path)
+        if img is None:
+            log_event(self.logger, "analysis.read_error", "❌ 이미지 읽기 실패", logging.ERROR,
+                      image=image_path, duration_ms=elapsed_ms(start))
+            return None
+        decode_ms = elapsed_ms(start)
         
         # 기본 분석 수행
         analysis_result = {
             "original_image": image_path,
             "analysis_time": analysis_time.isoformat(),
+            "analysis_fingerprint": fingerprint,
+            "analysis_version": ANALYSIS_VERSION,
+            "version_tag": version_tag,
             "metadata": metadata,
             "analysis": {}
         }
         
+        # 1~3. 스트립 단위 분석 단계 (고정 크기 작업 버퍼, 오버레이는 디코딩된 사본에 제자리 합성)
+        settings = self.config["analysis_settings"]
+        save_processed = settings["save_processed_images"]
+        pipeline = self.overlay_pipeline if save_processed else self.analysis_pipeline
+        strip_result = pipeline.analyze(
+            img, self._analysis_params(),
+            tile_pixels=settings.get("tile_pixels", DEFAULT_TILE_PIXELS)
+        )
+        
+        analysis_result["analysis"].update(self._build_analysis(strip_result))
+        
+        # 4. 처리된 이미지 저장 (선택사항)
+        if save_processed:
+            processed_dir = self.base_path.joinpath("analysis", "processed", *tag_parts) / analysis_time.strftime("%Y") / analysis_time.strftime("%m")
+            processed_dir.mkdir(parents=True, exist_ok=True)
+            
+            # 녹색 마스크 오버레이는 스트립 분석 중 img 에 이미 합성됨
+            processed_path = processed_dir / f"analyzed_{timestamp}.jpg"
+            cv2.imwrite(str(processed_path), img)
+            analysis_result["processed_image"] = str(processed_path)
+        
+        # 분석 결과 저장
+        analysis_result["analysis_file"] = str(analysis_file)
+        with open(analysis_file, 'w', encoding='utf-8') as f:
+            json.dump(analysis_result, f, indent=2, ensure_ascii=False)
+        
+        if self.analysis_cache and os.path.exists(image_path):  # 팩 파일의 원본은 캐시하지 않음
+            self.analysis_cache.put(image_path, fingerprint, analysis_result)
+        
+        detection = analysis_result['analysis']['plant_detection']
+        green_ratio = analysis_result['analysis']['color_analysis']['green_ratio']
+        log_event(self.logger, "analysis.done",
+                  f"✅ 분석 완료: 식물 감지 {'예' if detection['plant_detected'] else '아니오'}, "
+                  f"녹색 비율 {green_ratio:.1f}% → {analysis_file}",
+                  image=image_path, analysis_file=str(analysis_file),
+                  plant_detected=detection["plant_detected"],
+                  green_coverage_percent=detection["green_coverage_percent"],
+                  green_ratio=green_ratio, fingerprint=fingerprint,
+                  decode_ms=decode_ms, duration_ms=elapsed_ms(start))
+        self._publish_analysis(analysis_result)
+        if not version_tag:
+            self._record_growth(analysis_result)
+        
+        return analysis_result
+    
+    def _resolve_analysis_pipelines(self):
+        """
+        설정에서 켠 분석 단계를 실행 계획으로 풀어 둠 (시작 시 한 번, 알 수 없는 단계면 ValueError)
+        
+        기본 항목 단계는 항상, 식생 지수 단계는 지수 목록이 있을 때만 포함.
+        처리 이미지를 저장할 때 쓰는 오버레이 포함 계획도 함께 만든다.
+        """
+        settings = self.config["analysis_settings"]
+        stages = list(CORE_STAGES)
+        if settings.get("vegetation_indices"):
+            stages.append("vegetation_indices")
+        stages.extend(settings.get("analysis_stages") or [])
+        self.analysis_pipeline: AnalysisPipeline = resolve_pipeline(stages)
+        self.overlay_pipeline: AnalysisPipeline = resolve_pipeline(stages + ["overlay"])
+        log_event(self.logger, "analysis.pipeline",
+                  f"🧩 분석 단계: {' → '.join(self.analysis_pipeline.names)} "
+                  f"(작업 버퍼 픽셀당 {self.analysis_pipeline.bytes_per_pixel}B)",
+                  stages=self.analysis_pipeline.names,
+                  bytes_per_pixel=self.analysis_pipeline.bytes_per_pixel)
+    
+    def _analysis_params(self) -> Dict:
+        """분석 단계 설정 (HSV 녹색 범위, 식생 지수 엔진)"""
+        settings = self.config["analysis_settings"]
+        return {
+            "lower_green": np.array(settings["green_hsv_lower"]),
+            "upper_green": np.array(settings["green_hsv_upper"]),
+            "index_engine": self._index_engine(),
+        }
+    
+    def _index_engine(self) -> Optional[VegetationIndexEngine]:
+        """설정된 식생 지수 엔진 (지수 목록이 비어 있으면 None)"""
+        settings = self.config["analysis_settings"]
+        names = settings.get("vegetation_indices") or []
+        if not names:
+            return None
+        return VegetationIndexEngine(
+            names,
+            thresholds=settings.get("vegetation_index_thresholds"),
+            percentiles=settings.get("vegetation_percentiles", DEFAULT_PERCENTILES)
+        )
+    
+    def _build_analysis(self, strip_result: Dict) -> Dict:
+        """
+        스트립 분석 결과를 분석 항목(기본 통계, 색상, 식물 감지, 식생 지수)으로 변환
+        
+        Args:
+            strip_result: analyze_in_strips / analyze_rois_in_strips 의 결과 하나
+            
+        Returns:
+            analysis: 분석 결과의 "analysis" 항목
+        """
+        settings = self.config["analysis_settings"]
+        analysis = {}
+        
         # 1. 기본 이미지 통계
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        analysis_result["analysis"]["basic_stats"] = {
-            "mean_brightness": float(np.mean(gray)),
-            "std_brightness": float(np.std(gray)),
-            "min_brightness": int(np.min(gray)),
-            "max_brightness": int(np.max(gray))
+        brightness = strip_result["brightness"]
+        analysis["basic_stats"] = {
+            "mean_brightness": float(brightness.mean),
+            "std_brightness": float(brightness.std),
+            "min_brightness": int(brightness.min or 0),
+            "max_brightness": int(brightness.max or 0)
         }
         
         # 2. 색상 분석
-        b_mean = float(np.mean(img[:, :, 0]))
-        g_mean = float(np.mean(img[:, :, 1]))
-        r_mean = float(np.mean(img[:, :, 2]))
+        b_mean, g_mean, r_mean = strip_result["mean_bgr"]
         
         total_color = b_mean + g_mean + r_mean
-        analysis_result["analysis"]["color_analysis"] = {
+        analysis["color_analysis"] = {
             "mean_bgr": [b_mean, g_mean, r_mean],
             "green_ratio": g_mean / total_color * 100 if total_color > 0 else 0,
             "red_ratio": r_mean / total_color * 100 if total_color > 0 else 0,
@@ -269,46 +1071,163 @@ class PlantMonitoringSystem:
         }
         
         # 3. 녹색 영역 분석 (식물 감지용)
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        lower_green = np.array([35, 40, 40])
-        upper_green = np.array([85, 255, 255])
-        green_mask = cv2.inRange(hsv, lower_green, upper_green)
-        
-        green_pixels = np.sum(green_mask > 0)
-        total_pixels = img.shape[0] * img.shape[1]
+        green_pixels = strip_result["green_pixels"]
+        total_pixels = strip_result["total_pixels"]
+        coverage = green_pixels / total_pixels if total_pixels else 0.0
         
-        analysis_result["analysis"]["plant_detection"] = {
+        analysis["plant_detection"] = {
             "green_pixel_count": int(green_pixels),
             "total_pixels": int(total_pixels),
-            "green_coverage_percent": float(green_pixels / total_pixels * 100),
-            "plant_detected": green_pixels / total_pixels > 0.05  # 5% 이상이면 식물로 간주
+            "green_coverage_percent": float(coverage * 100),
+            "plant_detected": coverage > settings["plant_detection_threshold"]
         }
         
-        # 4. 처리된 이미지 저장 (선택사항)
-        if self.config["analysis_settings"]["save_processed_images"]:
-            processed_dir = self.base_path / "analysis" / "processed" / analysis_time.strftime("%Y") / analysis_time.strftime("%m")
-            processed_dir.mkdir(parents=True, exist_ok=True)
+        # 4. 식생 지수 (평균, 백분위수, 임계값 초과 비율)
+        if strip_result.get("vegetation_indices") is not None:
+            analysis["vegetation_indices"] = strip_result["vegetation_indices"]
+        
+        # 5. 설정에서 켠 추가 지표 (선명도, 녹색 영역 색 등)
+        for section in self.analysis_pipeline.report_sections:
+            if section in strip_result:
+                analysis[section] = strip_result[section]
+        
+        return analysis
+    
+    def _publish_analysis(self, analysis_result: Dict):
+        """분석 결과 요약을 이벤트 버스에 게시"""
+        metadata = analysis_result.get("metadata") or {}
+        detection = analysis_result["analysis"]["plant_detection"]
+        publish("analysis", {
+            "image": analysis_result["original_image"],
+            "plant_id": metadata.get("plant_id"),
+            "analysis_time": analysis_result["analysis_time"],
+            "analysis_file": analysis_result.get("analysis_file"),
+            "plant_detected": detection["plant_detected"],
+            "green_coverage_percent": detection["green_coverage_percent"],
+            "green_ratio": analysis_result["analysis"]["color_analysis"]["green_ratio"],
+            "cached": analysis_result.get("cache_hit", False)
+        })
+    
+    @staticmethod
+    def _growth_sample(analysis_result: Dict) -> Tuple[Optional[str], float, Dict[str, float]]:
+        """분석 결과 → (식물 ID, 촬영 시각, 성장 지표)"""
+        metadata = analysis_result.get("metadata") or {}
+        sample_time = metadata.get("capture_time") or analysis_result["analysis_time"]
+        return (metadata.get("plant_id"), datetime.fromisoformat(sample_time).timestamp(),
+                extract_metrics(analysis_result["analysis"]))
+    
+    def _record_growth(self, analysis_result: Dict):
+        """식물 분석 결과를 성장 통계에 반영하고 알림 상태 변화를 알림"""
+        plant_id, sample_time, values = self._growth_sample(analysis_result)
+        if not plant_id:
+            return
+        updated, alerts = self.growth_stats.record(plant_id, sample_time, values)
+        if not updated:
+            return
+        self.rollups.record(plant_id, sample_time, values)
+        
+        for alert in alerts:
+            if alert["active"]:
+                log_event(self.logger, "growth.alert",
+                          f"⚠️ 성장 알림: {plant_id} - {alert['alert']} "
+                          f"({alert['metric']} {alert['stat']} = {alert['value']:.2f}, 기준 {alert['threshold']})",
+                          logging.WARNING, **alert)
+            else:
+                log_event(self.logger, "growth.alert_cleared",
+                          f"✅ 성장 알림 해제: {plant_id} - {alert['alert']}", **alert)
+            publish("alert", alert)
+        publish("growth", self.growth_stats.get(plant_id))
+    
+    def get_growth_stats(self, plant_id: str) -> Optional[Dict]:
+        """
+        식물 성장 통계 조회 (분석 파일 재조회 없음)
+        
+        Args:
+            plant_id: 식물 ID
             
-            # 녹색 마스크 오버레이 생성
-            overlay = img.copy()
-            overlay[green_mask > 0] = [0, 255, 0]  # 녹색 영역 강조
-            result_img = cv2.addWeighted(img, 0.7, overlay, 0.3, 0)
+        Returns:
+            growth: 지표별 최신값, EWMA, 24h/7d/30d 구간 평균·최소·최대·기울기 (기록이 없으면 None)
+        """
+        return self.growth_stats.get(plant_id)
+    
+    def query_metrics(self, plant_id: str, metric: str = "green_coverage", start: datetime = None,
+                      end: datetime = None, max_points: int = DEFAULT_MAX_POINTS) -> Dict:
+        """
+        식물 지표 장기 조회 (롤업에서 점 수 예산에 맞는 시간별·일별·주별 단계 선택, 분석 파일 재조회 없음)
+        
+        Args:
+            plant_id: 식물 ID
+            metric: 지표 이름 (green_coverage, green_ratio, brightness)
+            start: 시작 시각 (없으면 처음부터)
+            end: 끝 시각 (포함, 없으면 최신까지)
+            max_points: 최대 점 수
             
-            processed_path = processed_dir / f"analyzed_{timestamp}.jpg"
-            cv2.imwrite(str(processed_path), result_img)
-            analysis_result["processed_image"] = str(processed_path)
+        Returns:
+            result: 선택한 단계와 버킷별 개수·평균·최소·최대·마지막 값
+        """
+        if plant_id not in self.config["plants"]:
+            raise ValueError(f"등록되지 않은 식물: {plant_id}")
+        started = time.perf_counter()
+        result = self.rollups.query(plant_id, metric, start, end, max_points)
+        log_event(self.logger, "growth.metrics_query",
+                  f"📈 지표 조회: {plant_id} {metric} → {result['tier']} {len(result['series']['time'])}점",
+                  logging.DEBUG, plant_id=plant_id, metric=metric, tier=result["tier"],
+                  points=len(result["series"]["time"]), duration_ms=elapsed_ms(started))
+        return result
+    
+    def rebuild_growth_stats(self, plant_id: str = None) -> Dict[str, int]:
+        """
+        기존 분석 결과로 성장 통계·지표 롤업 재구성 (도입 전 데이터나 알림 규칙 변경 시 일회성 실행)
         
-        # 분석 결과 저장
-        analysis_file = analysis_dir / f"analysis_{timestamp}.json"
-        with open(analysis_file, 'w', encoding='utf-8') as f:
-            json.dump(analysis_result, f, indent=2, ensure_ascii=False)
+        Args:
+            plant_id: 특정 식물만 재구성 (없으면 등록된 전체)
+            
+        Returns:
+            counts: 식물 ID → 반영된 샘플 수
+        """
+        plant_ids = [plant_id] if plant_id else list(self.config["plants"].keys())
+        samples = {pid: [] for pid in plant_ids}
+        # 태그 없는 일반 결과만 사용 (재분석 결과는 같은 촬영의 다른 버전)
+        for analysis_file in (self.base_path / "analysis" / "data").glob("[0-9][0-9][0-9][0-9]/*/analysis_*.json"):
+            try:
+                with open(analysis_file, 'r', encoding='utf-8') as f:
+                    pid, sample_time, values = self._growth_sample(json.load(f))
+            except (OSError, KeyError, ValueError):
+                continue
+            if pid in samples:
+                samples[pid].append((sample_time, values))
+        for relative in self.packs.members("analysis/data/[0-9][0-9][0-9][0-9]/*/analysis_*.json"):
+            try:
+                pid, sample_time, values = self._growth_sample(self.packs.read_json(relative))
+            except (KeyError, ValueError):
+                continue
+            if pid in samples:
+                samples[pid].append((sample_time, values))
         
-        print("✅ 분석 완료:")
-        print(f"   🌿 식물 감지: {'예' if analysis_result['analysis']['plant_detection']['plant_detected'] else '아니오'}")
-        print(f"   💚 녹색 비율: {analysis_result['analysis']['color_analysis']['green_ratio']:.1f}%")
-        print(f"   📊 분석 파일: {analysis_file}")
+        counts = {}
+        for pid, plant_samples in samples.items():
+            counts[pid] = self.growth_stats.rebuild(pid, plant_samples)
+            self.rollups.rebuild(pid, plant_samples)
+        log_event(self.logger, "growth.rebuilt", f"📈 성장 통계 재구성 완료: {counts}", counts=counts)
+        return counts
+    
+    def lookup_analysis(self, image_path: str, all_versions: bool = False) -> Optional[Dict]:
+        """
+        원본 이미지로 분석 결과 조회 (캐시 기준, 재분석 없음)
         
-        return analysis_result
+        Args:
+            image_path: 원본 이미지 경로
+            all_versions: True 이면 모든 분석 지문의 결과를 반환
+            
+        Returns:
+            analysis_result: 현재 지문의 결과 (all_versions 이면 지문 → 결과 딕셔너리)
+        """
+        if not self.analysis_cache or not os.path.exists(image_path):
+            return None
+        
+        if all_versions:
+            return self.analysis_cache.lookup(image_path)
+        return self.analysis_cache.get(image_path, self.get_analysis_fingerprint())
     
     def get_plant_timeline(self, plant_id: str, days: int = 30) -> List[Dict]:
         """
@@ -322,10 +1241,10 @@ class PlantMonitoringSystem:
             timeline: 시간순 이미지 목록
         """
         if plant_id not in self.config["plants"]:
-            print(f"❌ 등록되지 않은 식물: {plant_id}")
+            log_event(self.logger, "plant.unknown", f"❌ 등록되지 않은 식물: {plant_id}", logging.WARNING,
+                      plant_id=plant_id)
             return []
         
-        plant_dir = self.base_path / "raw_images" / "plants" / plant_id
         timeline = []
         
         # 메타데이터 파일들 검색
@@ -343,20 +1262,76 @@ class PlantMonitoringSystem:
             except Exception as e:
                 continue
         
+        # 팩 파일로 압축된 촬영 (인덱스의 메타데이터, 압축 도중 중단으로 양쪽에 있으면 한 번만)
+        seen = {(m["capture_time"], m["path"]) for m in timeline}
+        since = datetime.now() - timedelta(days=days + 1)
+        for metadata in self.packs.captures(plant_id, since=since):
+            capture_time = datetime.fromisoformat(metadata["capture_time"])
+            if (datetime.now() - capture_time).days <= days and (metadata["capture_time"], metadata["path"]) not in seen:
+                timeline.append(metadata)
+        
         # 시간순 정렬
         timeline.sort(key=lambda x: x["capture_time"])
         
         return timeline
     
+    def load_plant_stack(self, plant_id: str, start: datetime = None, end: datetime = None,
+                         size: Tuple[int, int] = DEFAULT_STACK_SIZE, refresh: bool = True) -> FrameStack:
+        """
+        식물 이력을 (T, H, W, 3) 프레임 배열로 열기 (Jupyter 분석용)
+        
+        처음에는 촬영을 병렬·축소 디코딩해 디스크 캐시를 만들고, 이후에는 디코딩 없이
+        memmap 으로 바로 열며 새 촬영만 이어 붙인다.
+        
+        Args:
+            plant_id: 식물 ID
+            start: 시작 시각 (없으면 전체 이력)
+            end: 끝 시각 (포함, 없으면 최신까지)
+            size: 프레임 크기 (너비, 높이), 공유 뷰 식물은 ROI 를 이 크기로 맞춤
+            refresh: 새 촬영 확인 여부 (False 면 캐시만 열기)
+            
+        Returns:
+            stack: stack.frames (BGR uint8 읽기 전용 memmap), stack.times, stack.captures
+        """
+        if plant_id not in self.config["plants"]:
+            raise ValueError(f"등록되지 않은 식물: {plant_id}")
+        return self.frame_stacks.load(plant_id, start, end, size, refresh)
+    
+    def build_timelapse(self, plant_id: str, start: datetime = None, end: datetime = None,
+                        fps: float = None, size: Tuple[int, int] = None, output: str = None) -> Optional[Dict]:
+        """
+        식물 성장 타임랩스 생성 (MJPEG AVI)
+        
+        촬영을 병렬로 디코딩·축소·인코딩해 작은 창으로 흘려 보내고, 인코딩한 프레임은
+        캐시에 남겨 다음에는 새 촬영만 인코딩한다.
+        
+        Args:
+            plant_id: 식물 ID
+            start: 시작 시각 (없으면 전체 이력)
+            end: 끝 시각 (포함, 없으면 최신까지)
+            fps: 초당 프레임 수 (없으면 설정값)
+            size: 프레임 크기 (너비, 높이), 없으면 설정값
+            output: 출력 경로 (없으면 analysis/timelapse/<식물 ID>/ 아래)
+            
+        Returns:
+            summary: 출력 경로, 프레임 수, 새로 인코딩한 수 등 (구간에 촬영이 없으면 None)
+        """
+        if plant_id not in self.config["plants"]:
+            raise ValueError(f"등록되지 않은 식물: {plant_id}")
+        settings = self.config["timelapse"]
+        fps = fps or settings["fps"]
+        size = size or (settings["width"], settings["height"])
+        return self.timelapses.build(plant_id, start, end, fps, size, output)
+    
     def cleanup_old_files(self, days: int = None):
         """오래된 파일 정리"""
         if days is None:
             days = self.config["monitoring"]["retain_days"]
         
         cutoff_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - \
-                     datetime.timedelta(days=days)
+                     timedelta(days=days)
         
-        print(f"🧹 {days}일 이전 파일 정리 시작...")
+        log_event(self.logger, "cleanup.start", f"🧹 {days}일 이전 파일 정리 시작...", days=days)
         
         # TODO: 실제 파일 정리 로직 구현
         # (안전을 위해 주석 처리, 필요시 구현)
@@ -407,7 +1382,20 @@ def main():
         
         if choice == "1":
             plant_name = input("식물 이름: ")
-            plant_id = monitor.register_plant(plant_name)
+            view_id = input("카메라 뷰 ID (엔터시 단독 촬영): ").strip() or None
+            roi = None
+            if view_id:
+                roi_text = input("ROI x,y,w,h (0~1 비율, 엔터시 전체 화면): ").strip()
+                if roi_text:
+                    try:
+                        roi = [float(v) for v in roi_text.split(",")]
+                    except ValueError:
+                        print("❌ 잘못된 ROI 형식입니다.")
+                        continue
+            try:
+                plant_id = monitor.register_plant(plant_name, view_id=view_id, roi=roi)
+            except ValueError as e:
+                print(f"❌ {e}")
             
         elif choice == "2":
             plants = list(monitor.config["plants"].keys())
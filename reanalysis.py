@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+원본 이미지 아카이브 재분석 도구
+- 분석 설정(녹색 HSV 범위, 감지 임계값 등) 지문 기반 증분 처리
+- 같은 지문으로 이미 분석된 이미지는 건너뜀
+- 진행 상황 체크포인트로 중단 후 이어서 실행
+- 새 결과는 버전 태그 아래에 저장 (기존 결과 보존)
+- 공유 뷰 이미지는 식물별 ROI 로 한 번에 분석 (analyze_view)
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+from plant_monitoring_system import PlantMonitoringSystem
+from event_logging import elapsed_ms, get_logger, log_event
+
+
+class ReanalysisJob:
+    """지문 단위 재분석 작업 (체크포인트 포함)"""
+
+    def __init__(self, system: PlantMonitoringSystem, version_tag: str = None,
+                 checkpoint_every: int = 25):
+        """
+        재분석 작업 초기화
+
+        Args:
+            system: 모니터링 시스템
+            version_tag: 결과 버전 태그 (없으면 지문으로 생성)
+            checkpoint_every: 몇 장마다 체크포인트를 디스크에 동기화할지
+        """
+        self.system = system
+        self.logger = get_logger("reanalysis")
+        self.fingerprint = system.get_analysis_fingerprint()
+        self.version_tag = version_tag or f"fp_{self.fingerprint}"
+        self.checkpoint_every = max(1, checkpoint_every)
+
+        self.job_dir = system.base_path / "analysis" / "reanalysis"
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self.header_file = self.job_dir / f"{self.version_tag}.json"
+        self.progress_file = self.job_dir / f"{self.version_tag}.progress.jsonl"
+
+    def _check_header(self) -> bool:
+        """태그가 다른 지문에 이미 쓰였는지 확인하고 작업 정보 기록"""
+        if self.header_file.exists():
+            with open(self.header_file, 'r', encoding='utf-8') as f:
+                header = json.load(f)
+            if header.get("fingerprint") != self.fingerprint:
+                log_event(self.logger, "reanalysis.tag_conflict",
+                          f"❌ 태그 '{self.version_tag}'는 다른 분석 지문({header.get('fingerprint')})에 사용 중입니다",
+                          logging.ERROR, version_tag=self.version_tag,
+                          fingerprint=self.fingerprint, existing_fingerprint=header.get("fingerprint"))
+                return False
+            return True
+
+        settings = self.system.config["analysis_settings"]
+        header = {
+            "version_tag": self.version_tag,
+            "fingerprint": self.fingerprint,
+            "analysis_settings": settings,
+            "created": datetime.now().isoformat()
+        }
+        with open(self.header_file, 'w', encoding='utf-8') as f:
+            json.dump(header, f, indent=2, ensure_ascii=False)
+        return True
+
+    def load_completed(self) -> Dict[str, Set[Optional[str]]]:
+        """체크포인트에서 완료된 이미지 → 분석된 식물 ID 로드 (잘린 마지막 줄은 무시)"""
+        completed: Dict[str, Set[Optional[str]]] = {}
+        if not self.progress_file.exists():
+            return completed
+        with open(self.progress_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("fingerprint") == self.fingerprint:
+                    completed.setdefault(entry["image"], set()).update(entry.get("plants") or [None])
+        return completed
+
+    def find_existing_results(self) -> Dict[str, Set[Optional[str]]]:
+        """태그 없는 일반 분석 결과 중 같은 지문으로 분석된 이미지 → 식물 ID"""
+        analyzed: Dict[str, Set[Optional[str]]] = {}
+        data_dir = self.system.base_path / "analysis" / "data"
+        # 일반 결과는 analysis/data/YYYY/MM/ 에만 있음 (태그 디렉토리 제외)
+        for analysis_file in data_dir.glob("[0-9][0-9][0-9][0-9]/*/analysis_*.json"):
+            try:
+                with open(analysis_file, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if result.get("analysis_fingerprint") == self.fingerprint:
+                self._add_result(analyzed, result)
+        # 팩 파일로 압축된 결과
+        for relative in self.system.packs.members("analysis/data/[0-9][0-9][0-9][0-9]/*/analysis_*.json"):
+            result = self.system.packs.read_json(relative)
+            if result.get("analysis_fingerprint") == self.fingerprint:
+                self._add_result(analyzed, result)
+        return analyzed
+
+    def _add_result(self, analyzed: Dict[str, Set[Optional[str]]], result: Dict):
+        plant_id = (result.get("metadata") or {}).get("plant_id")
+        analyzed.setdefault(self._relative(result["original_image"]), set()).add(plant_id)
+
+    def iter_images(self, plant_id: str = None,
+                    metadata_index: Dict[str, List[Dict]] = None) -> Iterator[Path]:
+        """
+        아카이브 원본 이미지를 경로순으로 나열 (팩 파일로 압축된 원본 포함)
+
+        Args:
+            plant_id: 특정 식물의 이미지만 (공유 뷰 이미지는 metadata_index 로 찾음)
+            metadata_index: 원본 상대 경로 → 촬영 메타데이터 목록
+        """
+        raw_dir = self.system.base_path / "raw_images"
+        if plant_id:
+            raw_dir = raw_dir / "plants" / plant_id
+        packed = self.system.packs.members(f"{self._relative(raw_dir)}/*.jpg")
+        images = set(raw_dir.rglob("*.jpg")) | {self.system.base_path / relative for relative in packed}
+        if plant_id and metadata_index:
+            images |= {self.system.base_path / relative for relative, entries in metadata_index.items()
+                       if self._view_plants(entries, plant_id)}
+        yield from sorted(images)
+
+    def _load_metadata_index(self) -> Dict[str, List[Dict]]:
+        """원본 상대 경로 → 촬영 메타데이터 목록 (공유 뷰 이미지는 뷰와 식물별 메타데이터가 같은 경로를 가리킴)"""
+        index: Dict[str, List[Dict]] = {}
+        for metadata_file in sorted((self.system.base_path / "metadata").glob("*_metadata.json")):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                index.setdefault(metadata["path"], []).append(metadata)
+            except (OSError, KeyError, json.JSONDecodeError):
+                continue
+        for relative in self.system.packs.members("metadata/*_metadata.json"):
+            metadata = self.system.packs.read_json(relative)
+            index.setdefault(metadata["path"], []).append(metadata)
+        return index
+
+    @staticmethod
+    def _view_plants(entries: List[Dict], plant_id: str = None) -> Optional[List[Dict]]:
+        """
+        공유 뷰 이미지의 식물별 ROI 메타데이터
+
+        Returns:
+            plants: 식물 ID 순 메타데이터 (뷰 이미지가 아니면 None)
+        """
+        if not any(entry.get("view_id") for entry in entries):
+            return None
+        plants: Dict[str, Dict] = {}
+        for entry in entries:
+            if entry.get("plant_id") and entry.get("roi") and (plant_id is None or entry["plant_id"] == plant_id):
+                plants.setdefault(entry["plant_id"], entry)
+        return [plants[key] for key in sorted(plants)]
+
+    def _relative(self, image_path) -> str:
+        path = Path(image_path)
+        try:
+            return str(path.relative_to(self.system.base_path))
+        except ValueError:
+            return str(path)
+
+    def run(self, plant_id: str = None, limit: int = None) -> Optional[Dict]:
+        """
+        재분석 실행
+
+        Args:
+            plant_id: 특정 식물만 재분석 (없으면 전체)
+            limit: 이번 실행에서 처리할 최대 이미지 수
+
+        Returns:
+            summary: 처리/건너뜀/실패 개수
+        """
+        if not self._check_header():
+            return None
+
+        start = time.perf_counter()
+        done = self.load_completed()
+        for image, plants in self.find_existing_results().items():
+            done.setdefault(image, set()).update(plants)
+        metadata_index = self._load_metadata_index()
+
+        log_event(self.logger, "reanalysis.start",
+                  f"🔁 재분석 시작 - 지문: {self.fingerprint}, 태그: {self.version_tag} (이미 분석됨: {len(done)}장)",
+                  fingerprint=self.fingerprint, version_tag=self.version_tag,
+                  already_done=len(done), duration_ms=elapsed_ms(start))
+
+        summary = {"processed": 0, "skipped": 0, "failed": 0,
+                   "fingerprint": self.fingerprint, "version_tag": self.version_tag}
+        pending = 0
+
+        with open(self.progress_file, 'a', encoding='utf-8') as progress:
+            for image_path in self.iter_images(plant_id, metadata_index):
+                relative = self._relative(image_path)
+                entries = metadata_index.get(relative, [])
+                # 공유 뷰 이미지는 아직 이 지문으로 분석되지 않은 식물 ROI 만 분석
+                view_plants = self._view_plants(entries, plant_id)
+                if view_plants is not None:
+                    analyzed = done.get(relative, set())
+                    view_plants = [entry for entry in view_plants if entry["plant_id"] not in analyzed]
+                    if not view_plants:
+                        summary["skipped"] += 1
+                        continue
+                elif relative in done:
+                    summary["skipped"] += 1
+                    continue
+                if limit is not None and summary["processed"] + summary["failed"] >= limit:
+                    break
+
+                if view_plants is not None:
+                    results = self.system.analyze_view(str(image_path), view_plants, version_tag=self.version_tag)
+                    if not results:
+                        summary["failed"] += 1
+                        continue
+                    entry = {
+                        "image": relative,
+                        "fingerprint": self.fingerprint,
+                        "plants": [result["metadata"]["plant_id"] for result in results],
+                        "results": [self._relative(result["analysis_file"]) for result in results],
+                        "time": results[0]["analysis_time"]
+                    }
+                else:
+                    result = self.system.analyze_image(str(image_path), entries[0] if entries else None,
+                                                       version_tag=self.version_tag)
+                    if result is None:
+                        summary["failed"] += 1
+                        continue
+                    entry = {
+                        "image": relative,
+                        "fingerprint": self.fingerprint,
+                        "result": self._relative(result["analysis_file"]),
+                        "time": result["analysis_time"]
+                    }
+
+                progress.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                summary["processed"] += 1
+                pending += 1
+
+                # 체크포인트 동기화
+                if pending >= self.checkpoint_every:
+                    progress.flush()
+                    os.fsync(progress.fileno())
+                    pending = 0
+
+            progress.flush()
+            os.fsync(progress.fileno())
+
+        log_event(self.logger, "reanalysis.done",
+                  f"✅ 재분석 완료 - 처리 {summary['processed']}장, 건너뜀 {summary['skipped']}장, 실패 {summary['failed']}장",
+                  duration_ms=elapsed_ms(start), **summary)
+        return summary
+
+
+def main():
+    """메인 함수 - 명령줄 재분석"""
+    parser = argparse.ArgumentParser(description="원본 이미지 아카이브 재분석")
+    parser.add_argument("--base-path", default="/home/pi/plant_monitoring", help="데이터 저장 기본 경로")
+    parser.add_argument("--plant", help="재분석할 식물 ID (없으면 전체)")
+    parser.add_argument("--tag", help="결과 버전 태그 (기본: fp_<지문>)")
+    parser.add_argument("--limit", type=int, help="이번 실행에서 처리할 최대 이미지 수")
+    parser.add_argument("--checkpoint-every", type=int, default=25, help="체크포인트 동기화 간격 (장)")
+    parser.add_argument("--quiet", action="store_true", help="콘솔에는 경고 이상만 출력 (로그 파일은 그대로 기록)")
+    args = parser.parse_args()
+
+    system = PlantMonitoringSystem(args.base_path, quiet=args.quiet)
+    job = ReanalysisJob(system, version_tag=args.tag, checkpoint_every=args.checkpoint_every)
+    job.run(plant_id=args.plant, limit=args.limit)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+스트림 동시 시청자 부하 테스트
+- MJPEG 시청자를 단계적으로 늘려 연결하고, 단계마다 서버 메모리(RSS)·스레드 수·CPU 와
+  시청자별 수신 fps·전송량을 측정 → 연결당 메모리 증가량 보고
+- --url 없이 실행하면 카메라 없이 합성 프레임 서버를 자식 프로세스로 띄워 측정
+  (기본은 비동기 서버 모드, --threaded 는 기존 Flask 스레드 모드로 비교)
+- 실제 장치 측정: python3 web_interface.py --async 실행 후 --url http://<주소>:5000/video_feed --pid <서버 PID>
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+DEFAULT_STEPS = [1, 10, 25, 50, 75]
+BOUNDARY = b"--frame"
+
+
+class SyntheticCamera:
+    """합성 미리보기 프레임 (움직이는 패턴, 지정 fps)"""
+
+    def __init__(self, width: int, height: int, fps: float):
+        self.width = width
+        self.height = height
+        self.interval = 1.0 / fps
+        self.condition = threading.Condition()
+        self.seq = 0
+        self.frame = None
+        threading.Thread(target=self._run, name="synthetic-camera", daemon=True).start()
+
+    def _run(self):
+        base = np.random.default_rng(0).integers(0, 255, (self.height, self.width, 3), dtype=np.uint8)
+        while True:
+            started = time.monotonic()
+            frame = np.roll(base, self.seq * 4, axis=1)
+            cv2.putText(frame, str(self.seq), (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
+            with self.condition:
+                self.seq += 1
+                self.frame = frame
+                self.condition.notify_all()
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def wait_frame(self, seq: int, timeout: float = 2.0) -> Tuple[int, Optional[np.ndarray]]:
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.seq != seq, timeout=timeout):
+                return seq, None
+            return self.seq, self.frame
+
+    def next_jpeg(self, seq: int = 0) -> Tuple[int, Optional[bytes]]:
+        seq, frame = self.wait_frame(seq)
+        if frame is None:
+            return seq, None
+        _, buffer = cv2.imencode('.jpg', frame)
+        return seq, buffer.tobytes()
+
+
+def serve_synthetic(port: int, width: int, height: int, fps: float, threaded: bool):
+    """합성 프레임 서버 (자식 프로세스, 실제 포트를 표준 출력 첫 줄로 알림)"""
+    camera = SyntheticCamera(width, height, fps)
+
+    if threaded:
+        # 기존 방식: 시청자마다 스레드 하나, 시청자마다 인코딩
+        from flask import Flask, Response
+        from werkzeug.serving import make_server
+
+        app = Flask(__name__)
+
+        @app.route('/video_feed')
+        def video_feed():
+            def stream():
+                seq = 0
+                while True:
+                    seq, frame_bytes = camera.next_jpeg(seq)
+                    if frame_bytes is not None:
+                        yield b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n'
+            return Response(stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+        server = make_server("127.0.0.1", port, app, threaded=True)
+        print(server.server_port, flush=True)
+        server.serve_forever()
+        return
+
+    from async_server import MJPEG_HEADERS, AsyncWebServer, Response, SharedFrameSource, mjpeg_stream
+
+    server = AsyncWebServer()
+    source = SharedFrameSource(camera.next_jpeg, name="synthetic-source")
+
+    async def video_feed(request):
+        return Response(200, MJPEG_HEADERS, stream=mjpeg_stream(source))
+
+    server.route('/video_feed', video_feed)
+
+    async def main():
+        running = await server.start("127.0.0.1", port)
+        print(server.port, flush=True)
+        async with running:
+            await running.serve_forever()
+
+    asyncio.run(main())
+
+
+def process_stats(pid: int) -> Dict[str, float]:
+    """서버 프로세스 RSS(MB), 스레드 수, 누적 CPU 시간(초) (/proc, 리눅스)"""
+    stats = {"rss_mb": None, "threads": None, "cpu_seconds": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    stats["rss_mb"] = int(line.split()[1]) / 1024
+                elif line.startswith("Threads:"):
+                    stats["threads"] = int(line.split()[1])
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        stats["cpu_seconds"] = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except OSError:
+        pass
+    return stats
+
+
+class Viewer:
+    """MJPEG 시청자 하나 (수신 프레임·바이트 집계)"""
+
+    def __init__(self, host: str, port: int, path: str):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.frames = 0
+        self.bytes = 0
+        self.connected = False
+        self.error = None
+        self.task = None
+
+    async def run(self):
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            writer.write(f"GET {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+            await reader.readuntil(b"\r\n\r\n")
+            self.connected = True
+            tail = b""
+            while True:
+                chunk = await reader.read(256 * 1024)
+                if not chunk:
+                    break
+                self.bytes += len(chunk)
+                data = tail + chunk
+                self.frames += data.count(BOUNDARY)
+                tail = data[-(len(BOUNDARY) - 1):]  # 청크 경계에 걸친 구분자
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.error = str(e)
+        finally:
+            self.connected = False
+
+    def reset(self):
+        self.frames = 0
+        self.bytes = 0
+
+
+async def run_load(url: str, pid: Optional[int], steps: List[int], duration: float, settle: float) -> List[Dict]:
+    """단계별 시청자 수로 측정"""
+    parts = urlsplit(url)
+    host, port, path = parts.hostname, parts.port or 80, parts.path or "/"
+    viewers: List[Viewer] = []
+    results = []
+
+    for count in steps:
+        while len(viewers) < count:
+            viewer = Viewer(host, port, path)
+            viewer.task = asyncio.create_task(viewer.run())
+            viewers.append(viewer)
+        await asyncio.sleep(settle)
+
+        for viewer in viewers:
+            viewer.reset()
+        before = process_stats(pid) if pid else {}
+        await asyncio.sleep(duration)
+        after = process_stats(pid) if pid else {}
+
+        fps = [viewer.frames / duration for viewer in viewers]
+        step = {
+            "viewers": count,
+            "connected": sum(1 for v in viewers if v.connected),
+            "errors": sum(1 for v in viewers if v.error),
+            "fps_mean": round(sum(fps) / len(fps), 2),
+            "fps_min": round(min(fps), 2),
+            "mbit_per_s": round(sum(v.bytes for v in viewers) * 8 / duration / 1e6, 2),
+            "server_rss_mb": round(after["rss_mb"], 1) if after.get("rss_mb") is not None else None,
+            "server_threads": after.get("threads"),
+            "server_cpu_percent": (round((after["cpu_seconds"] - before["cpu_seconds"]) / duration * 100, 1)
+                                   if after.get("cpu_seconds") is not None else None),
+        }
+        results.append(step)
+        print(f"시청자 {count:4d}명 | 연결 {step['connected']:4d} | fps 평균 {step['fps_mean']:5.1f} "
+              f"최소 {step['fps_min']:5.1f} | {step['mbit_per_s']:7.1f} Mbit/s | "
+              f"서버 RSS {step['server_rss_mb']}MB, 스레드 {step['server_threads']}, "
+              f"CPU {step['server_cpu_percent']}%", flush=True)
+
+    for viewer in viewers:
+        viewer.task.cancel()
+    await asyncio.gather(*(viewer.task for viewer in viewers), return_exceptions=True)
+    return results
+
+
+def summarize(results: List[Dict]) -> Dict:
+    """연결당 메모리·스레드 증가량 (첫 단계 → 마지막 단계 기울기)"""
+    first, last = results[0], results[-1]
+    added = last["viewers"] - first["viewers"]
+    summary = {"steps": results}
+    if added > 0 and first["server_rss_mb"] is not None and last["server_rss_mb"] is not None:
+        summary["rss_kb_per_viewer"] = round((last["server_rss_mb"] - first["server_rss_mb"]) * 1024 / added, 1)
+        summary["threads_per_viewer"] = round((last["server_threads"] - first["server_threads"]) / added, 2)
+    return summary
+
+
+def main():
+    """메인 함수 - 명령줄 부하 테스트"""
+    parser = argparse.ArgumentParser(description="MJPEG 스트림 동시 시청자 부하 테스트")
+    parser.add_argument("--url", help="측정할 스트림 URL (없으면 합성 프레임 서버를 띄워 측정)")
+    parser.add_argument("--pid", type=int, help="--url 서버의 프로세스 ID (메모리·스레드·CPU 측정)")
+    parser.add_argument("--steps", type=int, nargs="+", default=DEFAULT_STEPS, help="단계별 시청자 수")
+    parser.add_argument("--duration", type=float, default=5.0, help="단계별 측정 시간 (초)")
+    parser.add_argument("--settle", type=float, default=2.0, help="시청자 추가 후 안정화 대기 (초)")
+    parser.add_argument("--threaded", action="store_true", help="합성 서버를 기존 Flask 스레드 모드로 실행 (비교용)")
+    parser.add_argument("--width", type=int, default=640, help="합성 프레임 너비")
+    parser.add_argument("--height", type=int, default=480, help="합성 프레임 높이")
+    parser.add_argument("--fps", type=float, default=15.0, help="합성 프레임 fps")
+    parser.add_argument("--report", help="결과 JSON 저장 경로")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_synthetic(args.port, args.width, args.height, args.fps, args.threaded)
+        return
+
+    server = None
+    url, pid = args.url, args.pid
+    if url is None:
+        command = [sys.executable, os.path.abspath(__file__), "--serve", "--width", str(args.width),
+                   "--height", str(args.height), "--fps", str(args.fps)]
+        if args.threaded:
+            command.append("--threaded")
+        server = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        port = int(server.stdout.readline())
+        url, pid = f"http://127.0.0.1:{port}/video_feed", server.pid
+        mode = "스레드(Flask)" if args.threaded else "비동기"
+        print(f"🧪 합성 서버 ({mode}, {args.width}x{args.height} @ {args.fps}fps): {url}", flush=True)
+
+    try:
+        results = asyncio.run(run_load(url, pid, sorted(args.steps), args.duration, args.settle))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    summary = summarize(results)
+    summary["config"] = {"url": url, "threaded": args.threaded if args.url is None else None,
+                         "duration": args.duration, "steps": sorted(args.steps)}
+    if "rss_kb_per_viewer" in summary:
+        print(f"📊 시청자당 서버 메모리 {summary['rss_kb_per_viewer']}KB, 스레드 {summary['threads_per_viewer']}개")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
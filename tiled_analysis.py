@@ -0,0 +1,692 @@
+#!/usr/bin/env python3
+"""
+스트립 단위 이미지 분석
+- 고해상도 센서(HQ Camera 12MP 등)용 고정 크기 작업 버퍼
+- 부분 통계를 정수 합으로 누적해 오차 없이 병합
+- 중간 버퍼(gray, HSV, 마스크, 오버레이) 메모리는 해상도와 무관
+- 식생 지수(ExG 등)도 같은 스트립 순회에서 HSV 버퍼로 누적 (이미지를 다시 읽지 않음)
+- 분석 단계 레지스트리: 단계마다 필요한 중간 결과(gray, hsv, green_mask)를 선언하고,
+  설정에서 켠 단계는 시작 시 한 번 실행 순서·작업 버퍼 배치로 풀어 둠 (AnalysisPipeline)
+- 스트립마다 중간 결과는 처음 필요할 때 한 번만 계산하고, 마지막으로 쓰는 단계가 끝나면 버려
+  그 작업 버퍼를 뒤 단계의 중간 결과가 이어 씀 → 단계를 더해도 새로 필요한 계산만 늘어남
+"""
+
+import math
+import cv2
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from vegetation_indices import VegetationIndexEngine
+
+# 스트립 하나가 담을 최대 픽셀 수 (약 1MP → 작업 버퍼 합계 약 9MB)
+DEFAULT_TILE_PIXELS = 1 << 20
+
+# 오버레이 강조 색상 (BGR) 및 합성 가중치
+OVERLAY_COLOR = (0, 255, 0)
+OVERLAY_ALPHA = 0.3
+
+# 원본 스트립 (BGR, 항상 사용 가능 - 중간 결과가 아님)
+SOURCE = "bgr"
+
+# 분석 결과의 기본 항목(기본 통계, 색상, 식물 감지)을 만드는 단계 (항상 포함)
+CORE_STAGES = ("brightness", "color", "green")
+
+
+class RunningStats:
+    """정수 합 기반 누적 통계 (스트립별 결과를 정확히 병합)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+        self.min = None
+        self.max = None
+
+    def add(self, count: int, total: int, total_sq: int, min_value: int, max_value: int):
+        """스트립 하나의 부분 통계 추가"""
+        if count <= 0:
+            return
+        self.count += count
+        self.total += total
+        self.total_sq += total_sq
+        self.min = min_value if self.min is None else min(self.min, min_value)
+        self.max = max_value if self.max is None else max(self.max, max_value)
+
+    def merge(self, other: "RunningStats"):
+        """다른 누적 통계 병합"""
+        if other.count:
+            self.add(other.count, other.total, other.total_sq, other.min, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """모표준편차 (np.std 와 동일한 ddof=0)"""
+        if not self.count:
+            return 0.0
+        # n²·분산 = n·Σx² - (Σx)² 를 정수로 계산해 상쇄 오차 제거
+        variance_scaled = self.count * self.total_sq - self.total * self.total
+        return math.sqrt(max(variance_scaled, 0)) / self.count
+
+
+class Intermediate:
+    """스트립 단위 중간 결과 정의 (compute(context, dst) 가 작업 버퍼 dst 에 결과를 씀)"""
+
+    def __init__(self, name: str, inputs: Tuple[str, ...], channels: int, compute):
+        self.name = name
+        self.inputs = inputs
+        self.channels = channels
+        self.compute = compute
+
+
+# 중간 결과 이름 → 정의
+INTERMEDIATES: Dict[str, Intermediate] = {}
+
+# 분석 단계 이름 → 단계 클래스
+ANALYSIS_STAGES: Dict[str, type] = {}
+
+
+def register_intermediate(name: str, inputs: Tuple[str, ...], channels: int = 1):
+    """중간 결과 계산 함수 등록 (uint8, 채널 수만큼의 작업 버퍼)"""
+    def decorator(compute):
+        INTERMEDIATES[name] = Intermediate(name, tuple(inputs), channels, compute)
+        return compute
+    return decorator
+
+
+def register_stage(cls):
+    """분석 단계 클래스 등록 (선언한 입력은 등록된 중간 결과 또는 SOURCE)"""
+    unknown = [name for name in cls.inputs if name != SOURCE and name not in INTERMEDIATES]
+    if unknown:
+        raise ValueError(f"분석 단계 {cls.name}: 알 수 없는 입력 {', '.join(unknown)}")
+    ANALYSIS_STAGES[cls.name] = cls
+    return cls
+
+
+@register_intermediate("gray", (SOURCE,))
+def _gray(context: "FrameContext", dst: np.ndarray):
+    cv2.cvtColor(context.strip, cv2.COLOR_BGR2GRAY, dst=dst)
+
+
+@register_intermediate("hsv", (SOURCE,), channels=3)
+def _hsv(context: "FrameContext", dst: np.ndarray):
+    cv2.cvtColor(context.strip, cv2.COLOR_BGR2HSV, dst=dst)
+
+
+@register_intermediate("green_mask", ("hsv",))
+def _green_mask(context: "FrameContext", dst: np.ndarray):
+    cv2.inRange(context.get("hsv"), context.params["lower_green"], context.params["upper_green"], dst=dst)
+
+
+class FrameContext:
+    """
+    이미지 하나의 분석 문맥
+
+    작업 버퍼는 실행 계획의 슬롯마다 한 번만 할당하고, 스트립마다 중간 결과를
+    처음 요청될 때 계산해 기억한다. 계획상 마지막 사용 단계가 끝나면 기억을 지워
+    같은 슬롯을 쓰는 뒤 단계의 중간 결과가 버퍼를 이어 쓴다.
+    """
+
+    def __init__(self, pipeline: "AnalysisPipeline", width: int, height: int,
+                 tile_pixels: int, params: Dict, label_count: int = 1):
+        self.rows = max(1, min(height, tile_pixels // max(width, 1)))
+        self.width = width
+        self.params = params
+        self.label_count = label_count
+        self.labeled = label_count > 1  # ROI 분석 (라벨 0 = 어느 ROI 에도 속하지 않음)
+
+        size = self.rows * width
+        buffers = [np.empty(size * channels, dtype=np.uint8) for channels in pipeline.slots]
+        self.nbytes = sum(buffer.nbytes for buffer in buffers)
+        self._views = {}
+        for name, slot in pipeline.slot_of.items():
+            channels = INTERMEDIATES[name].channels
+            shape = (self.rows, width) if channels == 1 else (self.rows, width, channels)
+            self._views[name] = buffers[slot][:size * channels].reshape(shape)
+
+        self.strip = None
+        self.labels = None  # 스트립의 픽셀별 라벨 (ROI 분석)
+        self.flat_labels = None
+        self.regions = ()  # 스트립에 걸친 ROI (순번, 시작 행, 끝 행, 시작 열, 끝 열)
+        self._computed = {}
+
+    def begin_strip(self, strip: np.ndarray, labels: Optional[np.ndarray] = None, regions=()):
+        """새 스트립 시작 (이전 스트립의 중간 결과는 모두 무효)"""
+        self.strip = strip
+        self.labels = labels
+        self.flat_labels = labels.ravel() if labels is not None else None
+        self.regions = regions
+        self._computed.clear()
+
+    def get(self, name: str) -> np.ndarray:
+        """현재 스트립의 중간 결과 (스트립당 한 번만 계산)"""
+        if name == SOURCE:
+            return self.strip
+        value = self._computed.get(name)
+        if value is None:
+            value = self._views[name][:self.strip.shape[0]]
+            INTERMEDIATES[name].compute(self, value)
+            self._computed[name] = value
+        return value
+
+    def release(self, names: Iterable[str]):
+        """더 쓰지 않는 중간 결과 버리기 (버퍼는 뒤 단계가 재사용)"""
+        for name in names:
+            self._computed.pop(name, None)
+
+
+class AnalysisStage:
+    """
+    분석 단계 (이미지 하나마다 새 인스턴스가 스트립 결과를 누적)
+
+    하위 클래스는 name, inputs 를 선언하고 add(), result() 를 구현한다.
+    라벨은 전체 이미지 분석이면 0 하나, ROI 분석이면 ROI 순번 + 1.
+    """
+
+    name = ""
+    inputs: Tuple[str, ...] = ()
+    modifies_frame = False  # 원본 스트립을 제자리에서 바꿈 → 다른 단계가 모두 끝난 뒤 실행
+    report = False  # 결과를 분석 결과의 같은 이름 항목으로 보고 (추가 지표)
+    tile_dependent = False  # 결과가 스트립 크기(tile_pixels)에 따라 달라짐 → 분석 지문에 tile_pixels 포함
+
+    def __init__(self, context: FrameContext):
+        self.context = context
+
+    def add(self, context: FrameContext):
+        """스트립 하나 누적"""
+        raise NotImplementedError
+
+    def result(self, label: int, pixels: int) -> Dict:
+        """
+        라벨 하나의 결과 항목
+
+        Args:
+            label: 라벨 (전체 이미지는 0)
+            pixels: 라벨의 픽셀 수
+
+        Returns:
+            fields: 스트립 분석 결과에 합칠 항목
+        """
+        return {}
+
+
+@register_stage
+class BrightnessStage(AnalysisStage):
+    """밝기 누적 통계 (그레이스케일)"""
+
+    name = "brightness"
+    inputs = ("gray",)
+
+    def __init__(self, context: FrameContext):
+        super().__init__(context)
+        self.stats = [RunningStats() for _ in range(context.label_count)]
+        if context.labeled:
+            self.sums = np.zeros(context.label_count, dtype=np.float64)
+            self.sq_sums = np.zeros(context.label_count, dtype=np.float64)
+            self.squares = np.empty(context.rows * context.width, dtype=np.float64)
+
+    def add(self, context: FrameContext):
+        gray = context.get("gray")
+        if not context.labeled:
+            # 스트립 내 합계는 float64 로도 정확히 표현되는 범위
+            min_value, max_value, _, _ = cv2.minMaxLoc(gray)
+            self.stats[0].add(
+                gray.size,
+                int(cv2.sumElems(gray)[0]),
+                int(cv2.norm(gray, cv2.NORM_L2SQR)),
+                int(min_value),
+                int(max_value),
+            )
+            return
+
+        # 라벨별 합계 (float64 누적은 2^53 까지 정수로 정확)
+        flat_gray = gray.ravel()
+        sq = self.squares[:flat_gray.size]
+        np.multiply(flat_gray, flat_gray, out=sq, dtype=np.float64)
+        self.sums += np.bincount(context.flat_labels, weights=flat_gray, minlength=context.label_count)
+        self.sq_sums += np.bincount(context.flat_labels, weights=sq, minlength=context.label_count)
+
+        # 최소/최대는 ROI 사각형 뷰에서 직접 (복사 없음)
+        for index, r0, r1, x0, x1 in context.regions:
+            min_value, max_value, _, _ = cv2.minMaxLoc(gray[r0:r1, x0:x1])
+            stats = self.stats[index + 1]  # 개수/합계는 순회 후 bincount 결과로 일괄 반영
+            stats.min = int(min_value) if stats.min is None else min(stats.min, int(min_value))
+            stats.max = int(max_value) if stats.max is None else max(stats.max, int(max_value))
+
+    def result(self, label: int, pixels: int) -> Dict:
+        stats = self.stats[label]
+        if self.context.labeled:
+            stats.count = pixels
+            stats.total = int(self.sums[label])
+            stats.total_sq = int(self.sq_sums[label])
+        return {"brightness": stats}
+
+
+@register_stage
+class ColorStage(AnalysisStage):
+    """채널별 평균 (BGR)"""
+
+    name = "color"
+    inputs = (SOURCE,)
+
+    def __init__(self, context: FrameContext):
+        super().__init__(context)
+        if context.labeled:
+            self.sums = np.zeros((3, context.label_count), dtype=np.float64)
+        else:
+            self.sums = [[0], [0], [0]]
+
+    def add(self, context: FrameContext):
+        strip = context.strip
+        if not context.labeled:
+            sums = cv2.sumElems(strip)
+            for channel in range(3):
+                self.sums[channel][0] += int(sums[channel])
+            return
+        for channel in range(3):
+            self.sums[channel] += np.bincount(context.flat_labels, weights=strip[:, :, channel].ravel(),
+                                              minlength=context.label_count)
+
+    def result(self, label: int, pixels: int) -> Dict:
+        return {"mean_bgr": [float(self.sums[c][label]) / pixels if pixels else 0.0 for c in range(3)]}
+
+
+@register_stage
+class GreenStage(AnalysisStage):
+    """녹색 픽셀 수 (HSV 범위 마스크)"""
+
+    name = "green"
+    inputs = ("green_mask",)
+
+    def __init__(self, context: FrameContext):
+        super().__init__(context)
+        self.counts = np.zeros(context.label_count, dtype=np.float64)
+
+    def add(self, context: FrameContext):
+        mask = context.get("green_mask")
+        if not context.labeled:
+            self.counts[0] += cv2.countNonZero(mask)
+            return
+        self.counts += np.bincount(context.flat_labels, weights=mask.ravel(), minlength=context.label_count) / 255
+
+    def result(self, label: int, pixels: int) -> Dict:
+        return {"green_pixels": int(round(self.counts[label]))}
+
+
+@register_stage
+class VegetationIndexStage(AnalysisStage):
+    """식생 지수 (HSV 버퍼에서 색도 히스토그램만 누적, 엔진은 params["index_engine"])"""
+
+    name = "vegetation_indices"
+    inputs = ("hsv",)
+
+    def __init__(self, context: FrameContext):
+        super().__init__(context)
+        self.engine: Optional[VegetationIndexEngine] = context.params.get("index_engine")
+        if self.engine is not None:
+            self.engine.begin(context.label_count)
+
+    def add(self, context: FrameContext):
+        if self.engine is None:
+            return
+        if context.labeled:
+            self.engine.add(context.get("hsv"), context.labels, context.regions)
+        else:
+            self.engine.add(context.get("hsv"))
+
+    def result(self, label: int, pixels: int) -> Dict:
+        return {"vegetation_indices": self.engine.summary(label) if self.engine is not None else None}
+
+
+@register_stage
+class OverlayStage(AnalysisStage):
+    """녹색 영역 오버레이 (통계 계산이 끝난 스트립에 제자리 합성)"""
+
+    name = "overlay"
+    inputs = (SOURCE, "green_mask")
+    modifies_frame = True
+
+    def __init__(self, context: FrameContext):
+        super().__init__(context)
+        shape = (context.rows, context.width, 3)
+        self.blend = np.empty(shape, dtype=np.uint8)
+        self.color = np.empty(shape, dtype=np.uint8)
+        self.color[:] = OVERLAY_COLOR
+
+    def add(self, context: FrameContext):
+        strip = context.strip
+        rows = strip.shape[0]
+        blend = self.blend[:rows]
+        cv2.addWeighted(strip, 1.0 - OVERLAY_ALPHA, self.color[:rows], OVERLAY_ALPHA, 0, dst=blend)
+        cv2.copyTo(blend, context.get("green_mask"), strip)
+
+
+@register_stage
+class SharpnessStage(AnalysisStage):
+    """
+    초점 선명도 (라플라시안 분산, 추가 지표)
+
+    스트립 경계 행은 스트립 안에서 반사 패딩하므로 전체 이미지 값과 약간 다를 수 있다.
+    """
+
+    name = "sharpness"
+    inputs = ("gray",)
+    report = True
+    tile_dependent = True
+
+    def __init__(self, context: FrameContext):
+        super().__init__(context)
+        self.laplacian = np.empty((context.rows, context.width), dtype=np.float32)
+        self.sums = np.zeros(context.label_count, dtype=np.float64)
+        self.sq_sums = np.zeros(context.label_count, dtype=np.float64)
+        self.counts = np.zeros(context.label_count, dtype=np.int64)
+
+    def add(self, context: FrameContext):
+        gray = context.get("gray")
+        laplacian = self.laplacian[:gray.shape[0]]
+        cv2.Laplacian(gray, cv2.CV_32F, dst=laplacian)
+        if not context.labeled:
+            self.sums[0] += cv2.sumElems(laplacian)[0]
+            self.sq_sums[0] += cv2.norm(laplacian, cv2.NORM_L2SQR)
+            self.counts[0] += laplacian.size
+            return
+        flat = laplacian.ravel()
+        self.sums += np.bincount(context.flat_labels, weights=flat, minlength=context.label_count)
+        self.sq_sums += np.bincount(context.flat_labels, weights=flat * flat, minlength=context.label_count)
+        self.counts += np.bincount(context.flat_labels, minlength=context.label_count)
+
+    def result(self, label: int, pixels: int) -> Dict:
+        count = int(self.counts[label])
+        mean = self.sums[label] / count if count else 0.0
+        variance = max(self.sq_sums[label] / count - mean * mean, 0.0) if count else 0.0
+        return {"sharpness": {"laplacian_variance": float(variance)}}
+
+
+@register_stage
+class GreenColorStage(AnalysisStage):
+    """녹색 영역의 평균 색상·채도·명도 (추가 지표, 잎 색 변화 추적)"""
+
+    name = "green_color"
+    inputs = ("hsv", "green_mask")
+    report = True
+
+    def __init__(self, context: FrameContext):
+        super().__init__(context)
+        self.sums = np.zeros((3, context.label_count), dtype=np.float64)
+        self.counts = np.zeros(context.label_count, dtype=np.float64)
+        if context.labeled:
+            self.green_labels = np.empty(context.rows * context.width, dtype=np.int64)
+
+    def add(self, context: FrameContext):
+        hsv = context.get("hsv")
+        mask = context.get("green_mask")
+        if not context.labeled:
+            count = cv2.countNonZero(mask)
+            if count:
+                means = cv2.mean(hsv, mask)
+                for channel in range(3):
+                    self.sums[channel][0] += means[channel] * count
+                self.counts[0] += count
+            return
+        # 녹색이 아닌 픽셀은 라벨 0 으로 돌려 ROI 별 녹색 픽셀만 집계
+        green_labels = self.green_labels[:mask.size]
+        np.multiply(context.flat_labels, mask.ravel() > 0, out=green_labels)
+        self.counts += np.bincount(green_labels, minlength=context.label_count)
+        for channel in range(3):
+            self.sums[channel] += np.bincount(green_labels, weights=hsv[:, :, channel].ravel(),
+                                              minlength=context.label_count)
+
+    def result(self, label: int, pixels: int) -> Dict:
+        count = self.counts[label]
+        if not count:
+            return {"green_color": {"pixels": 0, "mean_hue_deg": None, "mean_saturation": None,
+                                    "mean_value": None}}
+        hue, saturation, value = (self.sums[c][label] / count for c in range(3))
+        return {"green_color": {
+            "pixels": int(count),
+            "mean_hue_deg": float(hue * 2),  # OpenCV 8비트 색상은 2° 단위
+            "mean_saturation": float(saturation / 255 * 100),
+            "mean_value": float(value / 255 * 100),
+        }}
+
+
+def _requirements(inputs: Iterable[str], available) -> List[str]:
+    """입력을 만들기 위해 새로 계산할 중간 결과 (의존 순서, 이미 있는 것은 제외)"""
+    order = []
+
+    def visit(name: str):
+        if name == SOURCE or name in available or name in order:
+            return
+        for dependency in INTERMEDIATES[name].inputs:
+            visit(dependency)
+        order.append(name)
+
+    for name in inputs:
+        visit(name)
+    return order
+
+
+class AnalysisPipeline:
+    """
+    켜진 분석 단계의 실행 계획 (시작 시 한 번 풀어 두고 모든 이미지에 재사용)
+
+    - 실행 순서: 이미 계산된 중간 결과만으로 돌 수 있는 단계부터 (중간 결과 수명 단축),
+      원본을 바꾸는 단계(오버레이)는 맨 뒤
+    - 중간 결과마다 마지막으로 쓰는 단계를 구해, 그 뒤로는 버리고 작업 버퍼 슬롯을
+      다음 중간 결과에 넘김 (예: gray 슬롯을 green_mask 가 재사용)
+    """
+
+    def __init__(self, stages: Iterable[str]):
+        names = list(dict.fromkeys(stages))
+        unknown = [name for name in names if name not in ANALYSIS_STAGES]
+        if unknown:
+            raise ValueError(f"알 수 없는 분석 단계: {', '.join(unknown)} "
+                             f"(가능: {', '.join(ANALYSIS_STAGES)})")
+        self.stages = self._schedule([ANALYSIS_STAGES[name] for name in names])
+        self.names = [stage.name for stage in self.stages]
+        self.report_sections = [stage.name for stage in self.stages if stage.report]
+        self._plan()
+
+    @staticmethod
+    def _schedule(stages: List[type]) -> List[type]:
+        """실행 순서 (새로 계산할 중간 결과가 적은 단계 먼저, 동률이면 설정 순서)"""
+        pending = sorted(stages, key=lambda stage: stage.modifies_frame)
+        order, available = [], set()
+        while pending:
+            group = [stage for stage in pending if stage.modifies_frame == pending[0].modifies_frame]
+            stage = min(group, key=lambda s: len(_requirements(s.inputs, available)))
+            pending.remove(stage)
+            order.append(stage)
+            available.update(_requirements(stage.inputs, available))
+        return order
+
+    def _plan(self):
+        """중간 결과별 계산·마지막 사용 단계와 작업 버퍼 슬롯 배치"""
+        available, created, last_use = set(), [], {}
+        for step, stage in enumerate(self.stages):
+            new = _requirements(stage.inputs, available)
+            created.append(new)
+            for name in list(stage.inputs) + new:
+                last_use[name] = step
+            for name in new:
+                for dependency in INTERMEDIATES[name].inputs:
+                    last_use[dependency] = step
+            available.update(new)
+        last_use.pop(SOURCE, None)
+
+        # 단계 뒤에 버릴 중간 결과
+        self.release_after = [[name for name, step in last_use.items() if step == index]
+                              for index in range(len(self.stages))]
+
+        # 수명이 겹치지 않는 중간 결과는 같은 슬롯 (채널 수가 충분한 가장 작은 빈 슬롯)
+        self.slots: List[int] = []  # 슬롯별 채널 수
+        self.slot_of: Dict[str, int] = {}
+        free = []
+        for step, new in enumerate(created):
+            for name in new:
+                channels = INTERMEDIATES[name].channels
+                fits = [slot for slot in free if self.slots[slot] >= channels]
+                if fits:
+                    slot = min(fits, key=lambda s: self.slots[s])
+                    free.remove(slot)
+                else:
+                    self.slots.append(channels)
+                    slot = len(self.slots) - 1
+                self.slot_of[name] = slot
+            free.extend(self.slot_of[name] for name in self.release_after[step])
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        """스트립 한 행의 픽셀당 중간 결과 작업 버퍼 바이트"""
+        return sum(self.slots)
+
+    def _run_strip(self, context: FrameContext, stages: List[AnalysisStage]):
+        for stage, released in zip(stages, self.release_after):
+            stage.add(context)
+            context.release(released)
+
+    def analyze(self, img: np.ndarray, params: Dict, tile_pixels: int = DEFAULT_TILE_PIXELS) -> Dict:
+        """
+        이미지를 가로 스트립 단위로 분석
+
+        Args:
+            img: BGR 이미지 (overlay 단계가 있으면 녹색 오버레이가 제자리에 합성됨)
+            params: 단계 설정 (lower_green, upper_green: HSV 녹색 범위, index_engine: 식생 지수 엔진)
+            tile_pixels: 스트립당 최대 픽셀 수
+
+        Returns:
+            strip_result: 단계별 결과 항목 + 전체 픽셀 수, 스트립 행 수, 작업 버퍼 크기
+        """
+        height, width = img.shape[:2]
+        context = FrameContext(self, width, height, tile_pixels, params)
+        stages = [stage(context) for stage in self.stages]
+
+        for top in range(0, height, context.rows):
+            context.begin_strip(img[top:top + context.rows])
+            self._run_strip(context, stages)
+
+        total_pixels = height * width
+        result = {"total_pixels": total_pixels, "strip_rows": context.rows, "buffer_bytes": context.nbytes}
+        for stage in stages:
+            result.update(stage.result(0, total_pixels))
+        return result
+
+    def analyze_rois(self, img: np.ndarray, rois: List[Tuple[int, int, int, int]], params: Dict,
+                     tile_pixels: int = DEFAULT_TILE_PIXELS) -> List[Dict]:
+        """
+        여러 관심 영역(ROI)을 한 번의 스트립 순회로 분석 (라벨 기반 bincount)
+
+        겹치는 영역은 목록에서 뒤에 있는 ROI 에 속한다.
+
+        Args:
+            img: BGR 이미지
+            rois: 픽셀 단위 (x, y, w, h) 목록
+            params: 단계 설정 (analyze 와 같음)
+            tile_pixels: 스트립당 최대 픽셀 수
+
+        Returns:
+            roi_results: ROI 별 단계 결과 항목 + 픽셀 수
+        """
+        height, width = img.shape[:2]
+        label_count = len(rois) + 1  # 0 = 어느 ROI 에도 속하지 않음
+        context = FrameContext(self, width, height, tile_pixels, params, label_count)
+        labels = np.empty((context.rows, width), dtype=np.uint16 if label_count > 255 else np.uint8)
+        counts = np.zeros(label_count, dtype=np.int64)
+        stages = [stage(context) for stage in self.stages]
+
+        for top in range(0, height, context.rows):
+            strip = img[top:top + context.rows]
+            rows = strip.shape[0]
+            bottom = top + rows
+            label = labels[:rows]
+
+            # 이 스트립에 걸친 ROI 만 라벨 채우기
+            label.fill(0)
+            active = []
+            for index, (x, y, w, h) in enumerate(rois):
+                r0, r1 = max(y, top), min(y + h, bottom)
+                if r0 < r1 and w > 0:
+                    label[r0 - top:r1 - top, x:x + w] = index + 1
+                    active.append((index, r0 - top, r1 - top, x, x + w))
+            if not active:
+                continue
+
+            context.begin_strip(strip, label, active)
+            counts += np.bincount(context.flat_labels, minlength=label_count)
+            self._run_strip(context, stages)
+
+        results = []
+        for index, roi in enumerate(rois):
+            pixels = int(counts[index + 1])
+            result = {"roi": list(roi), "total_pixels": pixels}
+            for stage in stages:
+                result.update(stage.result(index + 1, pixels))
+            results.append(result)
+        return results
+
+
+@lru_cache(maxsize=None)
+def _cached_pipeline(stages: Tuple[str, ...]) -> AnalysisPipeline:
+    return AnalysisPipeline(stages)
+
+
+def resolve_pipeline(stages: Iterable[str]) -> AnalysisPipeline:
+    """
+    분석 단계 목록 → 실행 계획 (같은 목록은 프로세스에서 한 번만 풀이)
+
+    Args:
+        stages: 켤 단계 이름 (기본 항목 단계는 목록에 없어도 항상 포함)
+
+    Returns:
+        pipeline: 실행 계획 (알 수 없는 단계면 ValueError)
+    """
+    names = list(CORE_STAGES) + [name for name in stages if name not in CORE_STAGES]
+    return _cached_pipeline(tuple(names))
+
+
+def analyze_in_strips(img: np.ndarray, lower_green: np.ndarray, upper_green: np.ndarray,
+                      tile_pixels: int = DEFAULT_TILE_PIXELS, overlay: bool = False,
+                      index_engine: Optional[VegetationIndexEngine] = None) -> Dict:
+    """
+    이미지를 가로 스트립 단위로 분석 (기본 단계 + 선택 단계)
+
+    Args:
+        img: BGR 이미지 (overlay=True 이면 녹색 오버레이가 제자리에 합성됨)
+        lower_green: HSV 녹색 하한
+        upper_green: HSV 녹색 상한
+        tile_pixels: 스트립당 최대 픽셀 수
+        overlay: 녹색 영역 오버레이를 img 에 직접 그릴지 여부
+        index_engine: 식생 지수 엔진 (지정 시 같은 스트립 순회에서 함께 누적)
+
+    Returns:
+        strip_result: 밝기 누적 통계, 채널 평균, 녹색 픽셀 수, 식생 지수 요약 등
+    """
+    stages = (["vegetation_indices"] if index_engine is not None else []) + (["overlay"] if overlay else [])
+    params = {"lower_green": lower_green, "upper_green": upper_green, "index_engine": index_engine}
+    return resolve_pipeline(stages).analyze(img, params, tile_pixels)
+
+
+def analyze_rois_in_strips(img: np.ndarray, rois: List[Tuple[int, int, int, int]],
+                           lower_green: np.ndarray, upper_green: np.ndarray,
+                           tile_pixels: int = DEFAULT_TILE_PIXELS,
+                           index_engine: Optional[VegetationIndexEngine] = None) -> List[Dict]:
+    """
+    여러 관심 영역(ROI)을 한 번의 스트립 순회로 분석 (기본 단계 + 선택 단계)
+
+    Args:
+        img: BGR 이미지
+        rois: 픽셀 단위 (x, y, w, h) 목록
+        lower_green: HSV 녹색 하한
+        upper_green: HSV 녹색 상한
+        tile_pixels: 스트립당 최대 픽셀 수
+        index_engine: 식생 지수 엔진 (지정 시 라벨별로 함께 누적)
+
+    Returns:
+        roi_results: ROI 별 밝기 누적 통계, 채널 평균, 녹색 픽셀 수, 식생 지수 요약
+    """
+    stages = ["vegetation_indices"] if index_engine is not None else []
+    params = {"lower_green": lower_green, "upper_green": upper_green, "index_engine": index_engine}
+    return resolve_pipeline(stages).analyze_rois(img, rois, params, tile_pixels)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+식물 성장 타임랩스 (MJPEG AVI)
+- 타임라인의 촬영을 디코딩 → 크기 조정 → JPEG 인코딩으로 흘려 보내며, 진행 중인 프레임 수는 작은 창으로 제한
+  (전체 이력을 메모리에 올리지 않음, 디코딩은 스레드 병렬로 인코더보다 앞서 진행)
+- 인코딩한 프레임은 식물별·크기별 캐시 파일에 이어 붙임 → 다시 만들 때는 새 촬영만 인코딩
+- 출력 AVI 는 헤더 + 캐시 프레임 구간 복사(sendfile) + 인덱스로 구성 (프레임 재인코딩 없음)
+- 인덱스(JSON)가 확정 지점: 중단되어도 인덱스에 기록된 프레임까지만 유효, 주기적으로 중간 확정
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from event_logging import elapsed_ms, get_logger, log_event
+from frame_stack import decode_capture
+
+TIMELAPSE_VERSION = 1
+
+# 기본 프레임 크기 (너비, 높이)
+DEFAULT_TIMELAPSE_SIZE = (1280, 720)
+
+# 캐시 중간 확정 간격 (프레임 수)
+COMMIT_EVERY = 200
+
+# AVI 1.0 RIFF 크기 상한 (32비트)
+AVI_MAX_BYTES = 0xFFFFFFFF
+
+_AVIF_HASINDEX = 0x10
+_AVIIF_KEYFRAME = 0x10
+
+
+def _capture_key(capture: Dict) -> Tuple[str, str]:
+    return capture["capture_time"], capture["path"]
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, count: int):
+    """파일 구간 복사 (커널 안에서 sendfile, 지원하지 않으면 읽어서 쓰기)"""
+    while count > 0:
+        try:
+            sent = os.sendfile(dst_fd, src_fd, offset, count)
+        except (AttributeError, OSError):
+            sent = os.write(dst_fd, os.pread(src_fd, min(count, 1024 * 1024), offset))
+        if sent == 0:
+            raise IOError("타임랩스 프레임 캐시가 예상보다 짧습니다")
+        offset += sent
+        count -= sent
+
+
+def write_mjpeg_avi(output: Path, data_path: Path, frames: List[Dict], size: Tuple[int, int], fps: float) -> int:
+    """
+    캐시된 JPEG 프레임으로 MJPEG AVI 작성
+
+    Args:
+        output: 출력 파일
+        data_path: 프레임 캐시 파일 (JPEG 연속)
+        frames: 출력 순서대로 {"offset", "length"}
+        size: 프레임 크기 (너비, 높이)
+        fps: 초당 프레임 수
+
+    Returns:
+        size_bytes: 출력 파일 크기
+    """
+    width, height = size
+    lengths = [frame["length"] for frame in frames]
+    max_frame = max(lengths)
+    movi_bytes = 4 + sum(8 + length + (length & 1) for length in lengths)
+    idx_bytes = 16 * len(frames)
+
+    avih = struct.pack("<14I", int(round(1e6 / fps)), int(max_frame * fps), 0, _AVIF_HASINDEX,
+                       len(frames), 0, 1, max_frame, width, height, 0, 0, 0, 0)
+    strh = struct.pack("<4s4sIHH8I4h", b"vids", b"MJPG", 0, 0, 0, 0, 1000, int(round(fps * 1000)), 0,
+                       len(frames), max_frame, 0xFFFFFFFF, 0, 0, 0, width, height)
+    strf = struct.pack("<IiiHH4sIiiII", 40, width, height, 1, 24, b"MJPG", width * height * 3, 0, 0, 0, 0)
+    strl = b"strl" + b"strh" + struct.pack("<I", len(strh)) + strh + b"strf" + struct.pack("<I", len(strf)) + strf
+    hdrl = (b"hdrl" + b"avih" + struct.pack("<I", len(avih)) + avih +
+            b"LIST" + struct.pack("<I", len(strl)) + strl)
+    riff_bytes = 4 + (8 + len(hdrl)) + (8 + movi_bytes) + (8 + idx_bytes)
+    if riff_bytes > AVI_MAX_BYTES:
+        raise ValueError(f"타임랩스가 AVI 크기 상한(4GB)을 넘습니다 ({riff_bytes / 1024 ** 3:.1f}GB) - "
+                         f"구간이나 크기를 줄이세요")
+
+    index = bytearray()
+    with open(output, 'wb', buffering=0) as out, open(data_path, 'rb') as src:
+        out.write(b"RIFF" + struct.pack("<I", riff_bytes) + b"AVI " +
+                  b"LIST" + struct.pack("<I", len(hdrl)) + hdrl +
+                  b"LIST" + struct.pack("<I", movi_bytes) + b"movi")
+        position = 4  # idx1 오프셋은 "movi" 태그 기준
+        for frame in frames:
+            length = frame["length"]
+            out.write(b"00dc" + struct.pack("<I", length))
+            _copy_range(src.fileno(), out.fileno(), frame["offset"], length)
+            if length & 1:
+                out.write(b"\0")
+            index += b"00dc" + struct.pack("<III", _AVIIF_KEYFRAME, position, length)
+            position += 8 + length + (length & 1)
+        out.write(b"idx1" + struct.pack("<I", idx_bytes) + bytes(index))
+    return 8 + riff_bytes
+
+
+class TimelapseBuilder:
+    """식물별 타임랩스 프레임 캐시 (timelapse_dir/<식물 ID>/<너비>x<높이>_q<품질>.json 인덱스 + .frames)"""
+
+    def __init__(self, system, timelapse_dir: Path, quality: int = 85, workers: int = None):
+        """
+        빌더 초기화
+
+        Args:
+            system: PlantMonitoringSystem (타임라인 조회와 이미지 읽기에 사용)
+            timelapse_dir: 캐시·출력 디렉토리
+            quality: 프레임 JPEG 품질
+            workers: 병렬 디코딩 스레드 수 (기본: CPU 수)
+        """
+        self.system = system
+        self.timelapse_dir = Path(timelapse_dir)
+        self.quality = int(quality)
+        self.workers = workers or os.cpu_count() or 1
+        self.logger = get_logger("timelapse")
+        self._lock = threading.Lock()
+
+    def _index_path(self, plant_id: str, size: Tuple[int, int]) -> Path:
+        return self.timelapse_dir / plant_id / f"{size[0]}x{size[1]}_q{self.quality}.json"
+
+    def _read_index(self, path: Path) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return index if index.get("version") == TIMELAPSE_VERSION else None
+
+    def _write_index(self, path: Path, index: Dict):
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _scan(self, plant_id: str, start: Optional[datetime], end: Optional[datetime]) -> List[Dict]:
+        """start~end 구간 촬영 목록 (시간순)"""
+        days = 36500
+        if start:
+            days = (datetime.now() - start).days + 1
+        start_key = start.isoformat() if start else ""
+        end_key = end.isoformat() if end else None
+        return [
+            {"capture_time": m["capture_time"], "path": m["path"], "roi": m.get("roi"),
+             "image_properties": m.get("image_properties")}
+            for m in self.system.get_plant_timeline(plant_id, days=days)
+            if m["capture_time"] >= start_key and (end_key is None or m["capture_time"] <= end_key)
+        ]
+
+    def _encode(self, capture: Dict, size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """촬영 하나를 프레임 JPEG 로 (디코딩·크기 조정·인코딩 모두 GIL 을 놓음)"""
+        frame = decode_capture(self.system, capture, size)
+        if frame is None:
+            return None
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return encoded if ok else None
+
+    def _extend(self, index_path: Path, index: Dict, new: List[Dict]) -> int:
+        """
+        새 촬영을 인코딩해 캐시 끝에 이어 붙임 (진행 중 프레임은 스레드 수 × 2 로 제한)
+
+        Returns:
+            failed: 읽지 못한 촬영 수 (인덱스에 넣지 않음 → 다음에 다시 시도)
+        """
+        size = tuple(index["size"])
+        data_path = index_path.with_suffix(".frames")
+        window = self.workers * 2
+        failed = 0
+        uncommitted = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor, open(data_path, 'ab') as f:
+            # 마지막 확정 이후에 쓰다 만 부분 제거
+            f.truncate(index["data_bytes"])
+            position = index["data_bytes"]
+            pending = deque()
+
+            def write_next():
+                nonlocal position, failed, uncommitted
+                capture, future = pending.popleft()
+                encoded = future.result()
+                if encoded is None:
+                    failed += 1
+                    return
+                f.write(encoded)
+                index["frames"].append({"capture_time": capture["capture_time"], "path": capture["path"],
+                                        "offset": position, "length": int(encoded.size)})
+                position += int(encoded.size)
+                uncommitted += 1
+                if uncommitted >= COMMIT_EVERY:
+                    commit()
+
+            def commit():
+                nonlocal uncommitted
+                f.flush()
+                os.fsync(f.fileno())
+                index["data_bytes"] = position
+                self._write_index(index_path, index)
+                uncommitted = 0
+
+            for capture in new:
+                pending.append((capture, executor.submit(self._encode, capture, size)))
+                if len(pending) >= window:
+                    write_next()
+            while pending:
+                write_next()
+            commit()
+
+        index["frames"].sort(key=_capture_key)
+        self._write_index(index_path, index)
+        return failed
+
+    def build(self, plant_id: str, start: datetime = None, end: datetime = None, fps: float = 12.0,
+              size: Tuple[int, int] = DEFAULT_TIMELAPSE_SIZE, output: Path = None) -> Optional[Dict]:
+        """
+        타임랩스 생성 (캐시에 없는 촬영만 인코딩)
+
+        Args:
+            plant_id: 식물 ID
+            start: 시작 시각 (없으면 전체 이력)
+            end: 끝 시각 (포함, 없으면 최신까지)
+            fps: 초당 프레임 수
+            size: 프레임 크기 (너비, 높이), 공유 뷰 식물은 ROI 를 이 크기로 맞춤
+            output: 출력 AVI 경로 (없으면 캐시 디렉토리에 구간 이름으로)
+
+        Returns:
+            summary: 출력 경로, 프레임 수, 새로 인코딩한 수, 실패 수, 크기 (구간에 촬영이 없으면 None)
+        """
+        if fps <= 0:
+            raise ValueError(f"잘못된 fps: {fps}")
+        started = time.perf_counter()
+        size = (int(size[0]), int(size[1]))
+        index_path = self._index_path(plant_id, size)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            index = self._read_index(index_path) or {
+                "version": TIMELAPSE_VERSION, "plant_id": plant_id, "size": list(size),
+                "quality": self.quality, "data_bytes": 0, "frames": []
+            }
+            captures = self._scan(plant_id, start, end)
+            known = {_capture_key(frame) for frame in index["frames"]}
+            new = [capture for capture in captures if _capture_key(capture) not in known]
+            failed = self._extend(index_path, index, new) if new else 0
+
+            wanted = {_capture_key(capture) for capture in captures}
+            frames = [frame for frame in index["frames"] if _capture_key(frame) in wanted]
+            if not frames:
+                log_event(self.logger, "timelapse.empty", f"⚠️ 타임랩스 구간에 촬영이 없습니다: {plant_id}",
+                          logging.WARNING, plant_id=plant_id, failed=failed)
+                return None
+
+            if output is None:
+                first = frames[0]["capture_time"][:10].replace("-", "")
+                last = frames[-1]["capture_time"][:10].replace("-", "")
+                output = index_path.parent / f"{plant_id}_{first}_{last}_{size[0]}x{size[1]}_{fps:g}fps.avi"
+            output = Path(output)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = output.with_name(output.name + ".tmp")
+            size_bytes = write_mjpeg_avi(temp_path, index_path.with_suffix(".frames"), frames, size, fps)
+            os.replace(temp_path, output)
+
+        summary = {
+            "output": str(output),
+            "frames": len(frames),
+            "added": len(new) - failed,
+            "failed": failed,
+            "size": list(size),
+            "fps": fps,
+            "duration_seconds": round(len(frames) / fps, 1),
+            "bytes": size_bytes,
+        }
+        log_event(self.logger, "timelapse.done",
+                  f"🎬 타임랩스 생성: {plant_id} {len(frames)}프레임 (새 인코딩 {summary['added']}장, "
+                  f"{summary['duration_seconds']}초, {size_bytes / 1024 / 1024:.1f}MB) → {output}",
+                  logging.WARNING if failed else logging.INFO,
+                  plant_id=plant_id, workers=self.workers, duration_ms=elapsed_ms(started), **summary)
+        return summary
+
+
+def main():
+    """메인 함수 - 명령줄 타임랩스 생성"""
+    from plant_monitoring_system import PlantMonitoringSystem
+
+    parser = argparse.ArgumentParser(description="식물 타임라인으로 성장 타임랩스(MJPEG AVI) 생성")
+    parser.add_argument("plant", help="식물 ID")
+    parser.add_argument("--base-path", default="/home/pi/plant_monitoring", help="데이터 저장 기본 경로")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="시작 시각 (예: 2025-01-01)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="끝 시각 (포함, 예: 2025-06-30T23:59)")
+    parser.add_argument("--fps", type=float, help="초당 프레임 수 (기본: 설정의 timelapse.fps)")
+    parser.add_argument("--size", help="프레임 크기 WxH (기본: 설정의 timelapse.width x height)")
+    parser.add_argument("--output", help="출력 AVI 경로")
+    parser.add_argument("--quiet", action="store_true", help="콘솔에는 경고 이상만 출력 (로그 파일은 그대로 기록)")
+    args = parser.parse_args()
+
+    system = PlantMonitoringSystem(args.base_path, quiet=args.quiet)
+    size = tuple(int(v) for v in args.size.lower().split("x")) if args.size else None
+    summary = system.build_timelapse(args.plant, args.start, args.end, fps=args.fps, size=size, output=args.output)
+    if summary:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+확장 식생 지수 (ExG, ExGR, VARI, GLI)
+- 모든 지수는 "BGR 선형 결합 / BGR 선형 결합" 꼴 → 밝기와 무관하고 색도(색상·채도)만의 함수
+- 스트립 분석이 이미 만든 HSV 버퍼에서 색상×채도 2차원 히스토그램 하나만 누적
+  (픽셀당 추가 작업은 히스토그램 한 번, 지수 개수와 무관)
+- 지수 값은 180×256 색도 격자에서 한 번만 계산한 표로 평균·백분위수·식생 비율을 구함
+- 히스토그램은 정수 개수라 스트립·ROI 부분 결과를 정확히 병합
+- 해상도: OpenCV 8비트 HSV 양자화 (색상 2°, 채도 1/255) → 지수 오차 약 ±0.01
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# 지수 이름 → (분자 BGR 계수, 분모 BGR 계수, 값 범위)
+# 정규화 색좌표 r,g,b = R/(R+G+B) 기준 (ExG = 2g - r - b, ExGR = ExG - (1.4r - g))
+INDEX_DEFINITIONS = {
+    "exg": ((-1.0, 2.0, -1.0), (1.0, 1.0, 1.0), (-1.0, 2.0)),
+    "exgr": ((-1.0, 3.0, -2.4), (1.0, 1.0, 1.0), (-2.4, 3.0)),
+    "vari": ((0.0, 1.0, -1.0), (-1.0, 1.0, 1.0), (-1.0, 1.0)),  # 분모가 0 근처면 범위로 자름
+    "gli": ((-1.0, 2.0, -1.0), (1.0, 2.0, 1.0), (-1.0, 1.0)),
+}
+
+DEFAULT_INDICES = ["exg", "exgr", "vari", "gli"]
+
+# 지수 값이 이 임계값을 넘는 픽셀을 식생으로 간주
+DEFAULT_THRESHOLDS = {"exg": 0.1, "exgr": 0.0, "vari": 0.05, "gli": 0.05}
+
+DEFAULT_PERCENTILES = [10, 50, 90]
+
+# OpenCV 8비트 HSV 범위 (색상 0~179, 채도 0~255)
+HUE_BINS = 180
+SAT_BINS = 256
+
+
+def validate_indices(names: Iterable[str]) -> List[str]:
+    """지수 이름 검증 (알 수 없는 이름이면 ValueError)"""
+    names = list(names)
+    unknown = [name for name in names if name not in INDEX_DEFINITIONS]
+    if unknown:
+        raise ValueError(f"알 수 없는 식생 지수: {', '.join(unknown)} "
+                         f"(가능: {', '.join(INDEX_DEFINITIONS)})")
+    return names
+
+
+@lru_cache(maxsize=1)
+def chromaticity_grid() -> np.ndarray:
+    """
+    색상×채도 격자의 BGR 색도 (명도 1 기준 HSV → BGR 역변환)
+
+    Returns:
+        grid: (HUE_BINS * SAT_BINS, 3) 배열, 행 순서는 calcHist 결과와 같음
+            (채도 0 이면 회색 = 검은 픽셀 포함)
+    """
+    hue = np.repeat(np.arange(HUE_BINS) * 2.0, SAT_BINS)  # 도 단위
+    chroma = np.tile(np.arange(SAT_BINS) / 255.0, HUE_BINS)
+    sector = hue / 60.0
+    x = chroma * (1.0 - np.abs(sector % 2.0 - 1.0))
+    low = 1.0 - chroma
+
+    # 구간별 (R, G, B) = (C, X, 0), (X, C, 0), (0, C, X), (0, X, C), (X, 0, C), (C, 0, X)
+    index = np.minimum(sector.astype(int), 5)
+    zero = np.zeros_like(chroma)
+    r = np.choose(index, [chroma, x, zero, zero, x, chroma]) + low
+    g = np.choose(index, [x, chroma, chroma, x, zero, zero]) + low
+    b = np.choose(index, [zero, zero, x, chroma, chroma, x]) + low
+    total = r + g + b
+    return np.stack([b / total, g / total, r / total], axis=1)
+
+
+@lru_cache(maxsize=None)
+def index_table(name: str, threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    격자별 지수 값 표 (지수·임계값마다 한 번만 계산)
+
+    Returns:
+        (values, order, sorted_values, above): 격자별 값, 정렬 순서, 정렬된 값, 임계값 초과 여부
+    """
+    numerator, denominator, (low, high) = INDEX_DEFINITIONS[name]
+    grid = chromaticity_grid()
+    num = grid @ np.array(numerator)
+    den = grid @ np.array(denominator)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(den != 0, num / np.where(den != 0, den, 1.0), np.sign(num) * np.inf)
+    values = np.clip(values, low, high)
+    order = np.argsort(values, kind="stable")
+    return values, order, values[order], values > threshold
+
+
+class VegetationIndexEngine:
+    """설정된 식생 지수를 HSV 색도 히스토그램으로 누적·요약"""
+
+    def __init__(self, names: Iterable[str] = DEFAULT_INDICES, thresholds: Dict[str, float] = None,
+                 percentiles: Iterable[float] = DEFAULT_PERCENTILES):
+        """
+        엔진 초기화 (격자별 지수 값 표는 프로세스에서 한 번만 계산)
+
+        Args:
+            names: 계산할 지수 이름 목록
+            thresholds: 지수별 식생 판정 임계값 (없으면 기본값)
+            percentiles: 보고할 백분위수 (0~100)
+        """
+        self.names = validate_indices(names)
+        merged = dict(DEFAULT_THRESHOLDS)
+        merged.update(thresholds or {})
+        self.thresholds = {name: float(merged[name]) for name in self.names}
+        self.percentiles = [float(p) for p in percentiles]
+
+        self._tables = {name: index_table(name, self.thresholds[name]) for name in self.names}
+
+        self._mask = np.empty(0, dtype=np.uint8)  # ROI 마스크 작업 버퍼 (필요 시 확장)
+        self.begin()
+
+    def begin(self, labels: int = 1):
+        """
+        누적값 초기화 (이미지 하나 분석 시작)
+
+        Args:
+            labels: 라벨 수 (전체 이미지는 1, ROI 분석은 ROI 수 + 1)
+        """
+        self._histograms = np.zeros((labels, HUE_BINS * SAT_BINS), dtype=np.int64)
+
+    def _histogram(self, hsv: np.ndarray, mask: np.ndarray = None) -> np.ndarray:
+        hist = cv2.calcHist([hsv], [0, 1], mask, [HUE_BINS, SAT_BINS], [0, HUE_BINS, 0, SAT_BINS])
+        return hist.ravel().astype(np.int64)  # 스트립 하나의 개수는 float32 로도 정확
+
+    def add(self, hsv: np.ndarray, labels: Optional[np.ndarray] = None,
+            regions: Sequence[Tuple[int, int, int, int, int]] = ()):
+        """
+        HSV 스트립 누적
+
+        Args:
+            hsv: 스트립의 HSV 버퍼 (uint8)
+            labels: 픽셀별 라벨 (ROI 분석 시, 라벨 = ROI 순번 + 1)
+            regions: 이 스트립에 걸친 ROI (순번, 시작 행, 끝 행, 시작 열, 끝 열)
+        """
+        if labels is None:
+            self._histograms[0] += self._histogram(hsv)
+            return
+
+        for index, r0, r1, x0, x1 in regions:
+            # 겹친 영역은 라벨이 같은 픽셀만 (연속 작업 버퍼 앞부분을 마스크로 사용)
+            size = (r1 - r0) * (x1 - x0)
+            if self._mask.size < size:
+                self._mask = np.empty(size, dtype=np.uint8)
+            mask = self._mask[:size].reshape(r1 - r0, x1 - x0)
+            cv2.compare(labels[r0:r1, x0:x1], index + 1, cv2.CMP_EQ, dst=mask)
+            self._histograms[index + 1] += self._histogram(hsv[r0:r1, x0:x1], mask)
+
+    def summary(self, label: int = 0) -> Dict[str, Dict]:
+        """
+        라벨 하나의 지수별 요약
+
+        Args:
+            label: 라벨 (전체 이미지는 0)
+
+        Returns:
+            summary: 지수 이름 → 평균, 백분위수, 임계값, 식생 비율(%)
+        """
+        histogram = self._histograms[label]
+        count = int(histogram.sum())
+        results = {}
+        for name in self.names:
+            values, order, sorted_values, above = self._tables[name]
+            if not count:
+                results[name] = {"mean": None, "percentiles": {}, "threshold": self.thresholds[name],
+                                 "coverage_percent": 0.0}
+                continue
+
+            # 백분위수: 히스토그램을 펼친 표본에 대한 np.percentile(linear) 과 같은 보간
+            cumulative = np.cumsum(histogram[order])
+            percentiles = {}
+            for p in self.percentiles:
+                position = p / 100 * (count - 1)
+                below = int(position)
+                lower = sorted_values[np.searchsorted(cumulative, below, side="right")]
+                upper = sorted_values[np.searchsorted(cumulative, min(below + 1, count - 1), side="right")]
+                percentiles[f"p{p:g}"] = float(lower + (upper - lower) * (position - below))
+
+            results[name] = {
+                "mean": float(histogram @ values) / count,
+                "percentiles": percentiles,
+                "threshold": self.thresholds[name],
+                "coverage_percent": float(histogram[above].sum()) / count * 100,
+            }
+        return results
@@ -5,92 +5,205 @@ Plant Analysis SDK - 실시간 웹 인터페이스
 """
 
 from flask import Flask, render_template_string, Response, jsonify, request
+import argparse
 import cv2
 import json
+import logging
 import threading
 import time
 from datetime import datetime
 import os
+import re
 import base64
-from pathlib import Path
+
+import numpy as np
+import schedule
+
+from plant_monitoring_system import PlantMonitoringSystem
+from tiled_analysis import analyze_in_strips
+from automated_monitoring import AutomatedPlantMonitor
+from camera_broker import CameraClient, ensure_broker
+from async_server import MJPEG_HEADERS, SSE_HEADERS, AsyncWebServer, SharedFrameSource, mjpeg_stream
+from async_server import Response as AsyncResponse
+from event_bus import default_bus, publish, sse_astream, sse_stream
+from event_logging import get_logger, log_event
+from image_serving import evaluate, locate_image, wsgi_body
 
 app = Flask(__name__)
 
-# 글로벌 카메라 객체
-camera = None
-camera_lock = threading.Lock()
+# 촬영·분석·색인은 스케줄러와 같은 모니터링 시스템을 사용
+monitoring_system = PlantMonitoringSystem()
+logger = get_logger("web")
+
+# 웹에서 제어하는 자동 모니터링 (첫 시작 요청 시 생성)
+auto_monitor = None
+auto_monitor_lock = threading.Lock()
+
+# 웹 요청에서 받은 식물 ID 형식 (경로 구성요소로 쓰이므로 이 문자만 허용)
+PLANT_ID_PATTERN = re.compile(r"[a-z0-9_-]+")
 
 class PlantCamera:
-    """라즈베리파이 카메라 스트리밍 클래스"""
+    """카메라 브로커 미리보기 스트리밍 클래스 (장치는 브로커가 소유)"""
     
     def __init__(self):
         self.camera = None
         self.init_camera()
         
     def init_camera(self):
-        """카메라 초기화"""
+        """카메라 브로커 연결 (실행 중이 아니면 자식 프로세스로 시작)"""
         try:
-            # 라즈베리파이 카메라 시도
-            self.camera = cv2.VideoCapture(0)
-            if not self.camera.isOpened():
-                print("❌ 카메라 초기화 실패")
+            if not ensure_broker(monitoring_system.base_path, monitoring_system.config["camera_settings"],
+                                 monitoring_system.broker_socket):
+                log_event(logger, "camera.init_failed", "❌ 카메라 초기화 실패", logging.ERROR,
+                          socket=str(monitoring_system.broker_socket))
                 return False
-                
-            # 카메라 설정
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.camera.set(cv2.CAP_PROP_FPS, 15)
             
-            print("✅ 카메라 초기화 성공")
+            self.camera = CameraClient(monitoring_system.broker_socket)
+            log_event(logger, "camera.ready", "✅ 카메라 초기화 성공",
+                      socket=str(monitoring_system.broker_socket))
             return True
         except Exception as e:
-            print(f"❌ 카메라 오류: {e}")
+            log_event(logger, "camera.error", f"❌ 카메라 오류: {e}", logging.ERROR, error=str(e))
             return False
     
     def get_frame(self):
-        """프레임 가져오기"""
-        if not self.camera or not self.camera.isOpened():
+        """프레임 가져오기 (최신 미리보기 프레임 복사본)"""
+        if not self.camera:
             return None
-            
-        ret, frame = self.camera.read()
-        if ret:
-            return frame
-        return None
+        
+        _, frame = self.camera.read_latest()
+        return frame
+    
+    def next_jpeg(self, seq: int = 0):
+        """seq 이후의 새 미리보기 프레임을 JPEG 로 (없으면 (seq, None))"""
+        if not self.camera:
+            time.sleep(0.1)
+            return seq, None
+        
+        # 새 프레임을 공유 메모리에서 복사 없이 바로 인코딩
+        new_seq, frame = self.camera.wait_frame(seq, copy=False)
+        if frame is None:
+            return seq, None
+        _, buffer = cv2.imencode('.jpg', frame)
+        if not self.camera.is_current(new_seq):
+            return new_seq, None  # 인코딩 중 슬롯이 덮어써짐
+        return new_seq, buffer.tobytes()
     
     def generate_stream(self):
         """MJPEG 스트림 생성"""
+        seq = 0
         while True:
-            frame = self.get_frame()
-            if frame is not None:
-                # JPEG 인코딩
-                _, buffer = cv2.imencode('.jpg', frame)
-                frame_bytes = buffer.tobytes()
+            seq, frame_bytes = self.next_jpeg(seq)
+            if frame_bytes is None:
+                continue
+            
+            # MJPEG 형식으로 전송
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+
+class AnalysisOverlayStream:
+    """저속 실시간 녹색 영역 오버레이 스트림 (한 번 분석한 프레임을 모든 시청자가 공유)"""
+    
+    def __init__(self, camera: PlantCamera):
+        self.camera = camera
+        self.condition = threading.Condition()
+        self.frame_bytes = None
+        self.seq = 0
+        self.coverage = 0.0
+        self.viewers = 0
+        self.thread = None
+    
+    def _ensure_running(self):
+        """시청자가 있으면 분석 스레드 시작 (시청자가 없으면 스레드가 스스로 종료)"""
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="overlay-analysis", daemon=True)
+                self.thread.start()
+    
+    def _run(self):
+        while True:
+            with self.condition:
+                if self.viewers == 0:
+                    self.thread = None
+                    return
+            
+            settings = monitoring_system.config["analysis_settings"]
+            interval = 1.0 / max(settings["live_overlay_fps"], 0.1)
+            started = time.monotonic()
+            try:
+                self._analyze_once(settings)
+            except Exception as e:
+                log_event(logger, "stream.analysis_error", f"❌ 실시간 분석 오류: {e}", logging.ERROR,
+                          error=str(e))
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    
+    def _analyze_once(self, settings):
+        """최신 미리보기 프레임을 축소해 녹색 마스크 오버레이와 비율을 그림"""
+        client = self.camera.camera
+        if not client:
+            return
+        
+        # 공유 메모리 뷰에서 바로 축소 (원본 크기 복사 없음)
+        seq, view = client.read_latest(copy=False)
+        if view is None:
+            return
+        height, width = view.shape[:2]
+        target_width = min(settings["live_overlay_width"], width)
+        target_height = max(1, round(height * target_width / width))
+        small = cv2.resize(view, (target_width, target_height), interpolation=cv2.INTER_AREA)
+        if not client.is_current(seq):
+            return  # 축소 중 슬롯이 덮어써짐
+        
+        result = analyze_in_strips(small, np.array(settings["green_hsv_lower"]),
+                                   np.array(settings["green_hsv_upper"]), overlay=True)
+        coverage = result["green_pixels"] / result["total_pixels"] * 100
+        
+        label = f"Green {coverage:.1f}%"
+        cv2.putText(small, label, (8, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 3, cv2.LINE_AA)
+        cv2.putText(small, label, (8, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
+        _, buffer = cv2.imencode('.jpg', small)
+        
+        with self.condition:
+            self.frame_bytes = buffer.tobytes()
+            self.coverage = coverage
+            self.seq += 1
+            self.condition.notify_all()
+    
+    def add_viewer(self):
+        """시청자 등록 (첫 시청자면 분석 스레드 시작)"""
+        with self.condition:
+            self.viewers += 1
+        self._ensure_running()
+    
+    def remove_viewer(self):
+        with self.condition:
+            self.viewers -= 1
+    
+    def wait_frame(self, seq: int = 0, timeout: float = 5.0):
+        """seq 이후의 새 분석 프레임 (시간 초과면 (seq, None))"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.seq != seq, timeout=timeout):
+                return seq, None
+            return self.seq, self.frame_bytes
+    
+    def generate_stream(self):
+        """MJPEG 스트림 생성 (새 분석 프레임이 나올 때만 전송)"""
+        self.add_viewer()
+        last_seq = 0
+        try:
+            while True:
+                last_seq, frame_bytes = self.wait_frame(last_seq)
+                if frame_bytes is None:
+                    continue
                 
-                # MJPEG 형식으로 전송
                 yield (b'--frame\r\n'
                        b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            else:
-                time.sleep(0.1)
-    
-    def capture_image(self, filename=None):
-        """이미지 촬영"""
-        frame = self.get_frame()
-        if frame is not None:
-            if filename is None:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"capture_{timestamp}.jpg"
-            
-            # 저장 경로
-            save_path = Path.home() / "plant_monitoring" / "data" / filename
-            save_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 이미지 저장
-            cv2.imwrite(str(save_path), frame)
-            return str(save_path)
-        return None
+        finally:
+            self.remove_viewer()
 
 # 글로벌 카메라 인스턴스
 plant_camera = PlantCamera()
+analysis_stream = AnalysisOverlayStream(plant_camera)
 
 # HTML 템플릿 (실시간 스트리밍 포함)
 HTML_TEMPLATE = """
@@ -202,10 +315,11 @@ HTML_TEMPLATE = """
         <div class="dashboard">
             <div class="camera-section">
                 <h2>📷 실시간 카메라</h2>
-                <img src="/video_feed" class="camera-stream" alt="실시간 카메라 스트림">
+                <img src="/video_feed" id="cameraStream" class="camera-stream" alt="실시간 카메라 스트림">
                 <div style="margin-top: 15px;">
                     <button class="btn btn-success" onclick="captureImage()">📸 이미지 촬영</button>
                     <button class="btn" onclick="toggleFullscreen()">🔍 전체화면</button>
+                    <button class="btn" id="overlayButton" onclick="toggleOverlay()">🌿 녹색 분석 보기</button>
                 </div>
                 <div id="captureResult"></div>
             </div>
@@ -237,7 +351,6 @@ HTML_TEMPLATE = """
                 <h3>📊 최근 활동</h3>
                 <div id="recentActivity" style="font-size: 0.9em;">
                     <p>✅ 시스템 정상 작동 중</p>
-                    <p>📷 마지막 촬영: 방금 전</p>
                 </div>
             </div>
         </div>
@@ -296,6 +409,15 @@ HTML_TEMPLATE = """
             });
         }
 
+        // 녹색 분석 오버레이 스트림 전환 (저속 분석 프레임)
+        function toggleOverlay() {
+            const img = document.getElementById('cameraStream');
+            const button = document.getElementById('overlayButton');
+            const showOverlay = !img.src.endsWith('/video_feed/analysis');
+            img.src = showOverlay ? '/video_feed/analysis' : '/video_feed';
+            button.textContent = showOverlay ? '📷 원본 보기' : '🌿 녹색 분석 보기';
+        }
+
         // 전체화면 토글
         function toggleFullscreen() {
             const img = document.querySelector('.camera-stream');
@@ -306,13 +428,57 @@ HTML_TEMPLATE = """
 
         // 모니터링 제어
         function startMonitoring() {
-            alert('자동 모니터링이 시작되었습니다!');
+            const interval = parseInt(document.getElementById('intervalSelect').value);
+            fetch('/api/monitoring/start', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({interval_minutes: interval})
+            })
+            .then(response => response.json())
+            .then(data => alert(data.success ? '자동 모니터링이 시작되었습니다!' : `❌ ${data.error}`));
         }
 
         function stopMonitoring() {
-            alert('모니터링이 정지되었습니다.');
+            fetch('/api/monitoring/stop', {method: 'POST'})
+            .then(response => response.json())
+            .then(data => alert(data.success ? '모니터링이 정지되었습니다.' : `❌ ${data.error}`));
+        }
+
+        // 실시간 이벤트 (서버가 촬영·분석·스케줄 이벤트를 푸시)
+        function addActivity(text) {
+            const list = document.getElementById('recentActivity');
+            const item = document.createElement('p');
+            item.textContent = `${new Date().toLocaleTimeString('ko-KR')} ${text}`;
+            list.insertBefore(item, list.firstChild);
+            while (list.children.length > 8) {
+                list.removeChild(list.lastChild);
+            }
         }
 
+        const events = new EventSource('/events');
+        events.addEventListener('stats', e => {
+            const stats = JSON.parse(e.data);
+            document.getElementById('totalCaptures').textContent = stats.total_images;
+            const disk = stats.disk_usage;
+            document.getElementById('storage').textContent =
+                `${disk.used_gb}/${disk.total_gb}GB (${disk.usage_percent.toFixed(1)}%)`;
+        });
+        events.addEventListener('capture', e => {
+            const capture = JSON.parse(e.data);
+            addActivity(`📷 촬영: ${capture.plant_name} - ${capture.filename}`);
+        });
+        events.addEventListener('analysis', e => {
+            const result = JSON.parse(e.data);
+            addActivity(`🌿 분석: 녹색 ${result.green_coverage_percent.toFixed(1)}% ` +
+                        `(${result.plant_detected ? '식물 감지' : '미감지'})`);
+        });
+        events.addEventListener('schedule', e => {
+            const status = JSON.parse(e.data);
+            addActivity(status.is_running
+                ? `🤖 자동 모니터링 실행 중 (${status.interval_minutes}분 간격, 다음: ${status.next_scheduled})`
+                : '⏹️ 자동 모니터링 정지');
+        });
+
         // 초기 로드
         updateTime();
     </script>
@@ -335,24 +501,37 @@ def video_feed():
     return Response(plant_camera.generate_stream(),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/video_feed/analysis')
+def video_feed_analysis():
+    """저속 녹색 영역 오버레이 스트림"""
+    return Response(analysis_stream.generate_stream(),
+                   mimetype='multipart/x-mixed-replace; boundary=frame')
+
 @app.route('/api/capture', methods=['POST'])
 def api_capture():
     """이미지 촬영 API"""
     try:
         data = request.get_json() or {}
-        plant_name = data.get('plant_name', 'unnamed')
+        plant_name = (data.get('plant_name') or 'unnamed').strip()
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{plant_name}_{timestamp}.jpg"
+        # 식물 이름이 있으면 등록된 해당 식물로 분류, 없으면 일반 촬영 (촬영 요청으로 등록하지 않음)
+        plant_id = None
+        if plant_name and plant_name != 'unnamed':
+            plant_id = plant_name.lower().replace(' ', '_')
+            if not PLANT_ID_PATTERN.fullmatch(plant_id):
+                return jsonify({'success': False, 'error': f'잘못된 식물 ID: {plant_id}'}), 400
+            if plant_id not in monitoring_system.config["plants"]:
+                return jsonify({'success': False, 'error': f'등록되지 않은 식물: {plant_id}'}), 404
         
-        saved_path = plant_camera.capture_image(filename)
+        # 브로커 경유 고해상도 촬영 → raw_images 저장, 메타데이터 색인, 자동 분석
+        metadata = monitoring_system.capture_image(plant_id, "웹 촬영")
         
-        if saved_path:
+        if metadata:
             return jsonify({
                 'success': True,
-                'filename': filename,
-                'path': saved_path,
-                'timestamp': timestamp
+                'filename': metadata['filename'],
+                'path': metadata['absolute_path'],
+                'timestamp': metadata['timestamp']
             })
         else:
             return jsonify({
@@ -365,6 +544,104 @@ def api_capture():
             'error': str(e)
         })
 
+@app.route('/events')
+def events():
+    """실시간 이벤트 스트림 (Server-Sent Events)"""
+    last_event_id = request.headers.get('Last-Event-ID')
+    
+    def stream():
+        # 새 연결에는 현재 통계를 먼저 보낸 뒤 버스 구독
+        stats = default_bus.recent(1, "stats")
+        if not stats:
+            stats = [publish("stats", monitoring_system.get_system_stats())]
+        yield stats[-1].sse
+        yield from sse_stream(default_bus, last_event_id)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/monitoring/start', methods=['POST'])
+def api_monitoring_start():
+    """자동 모니터링 시작 API"""
+    global auto_monitor
+    try:
+        data = request.get_json() or {}
+        with auto_monitor_lock:
+            if auto_monitor is None:
+                auto_monitor = AutomatedPlantMonitor(monitoring_system=monitoring_system)
+            interval = data.get('interval_minutes')
+            if interval and int(interval) != auto_monitor.auto_config["interval_minutes"]:
+                auto_monitor.auto_config["interval_minutes"] = int(interval)
+                if auto_monitor.is_running:
+                    auto_monitor.stop_monitoring()
+                schedule.clear()  # 새 간격으로 다시 등록되도록 기존 작업 제거
+            auto_monitor.start_monitoring()
+        return jsonify({'success': True, 'status': auto_monitor.get_monitoring_status()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/monitoring/stop', methods=['POST'])
+def api_monitoring_stop():
+    """자동 모니터링 중지 API"""
+    with auto_monitor_lock:
+        if auto_monitor is None or not auto_monitor.is_running:
+            return jsonify({'success': False, 'error': '모니터링이 실행되고 있지 않습니다'})
+        auto_monitor.stop_monitoring()
+    return jsonify({'success': True})
+
+@app.route('/api/growth')
+def api_growth_all():
+    """전체 식물 성장 통계 API"""
+    plants = {}
+    for plant_id in monitoring_system.config['plants']:
+        plants[plant_id] = monitoring_system.get_growth_stats(plant_id)
+    return jsonify({'success': True, 'plants': plants})
+
+@app.route('/api/growth/<plant_id>')
+def api_growth(plant_id):
+    """식물 성장 통계 API (EWMA, 24h/7d/30d 구간 통계, 활성 알림)"""
+    if plant_id not in monitoring_system.config['plants']:
+        return jsonify({'success': False, 'error': f'등록되지 않은 식물: {plant_id}'}), 404
+    return jsonify({'success': True, 'growth': monitoring_system.get_growth_stats(plant_id)})
+
+@app.route('/api/metrics/<plant_id>')
+def api_metrics(plant_id):
+    """식물 지표 장기 조회 API (?metric=&start=&end=&points=, 점 수에 맞춰 시간별·일별·주별 롤업 선택)"""
+    if plant_id not in monitoring_system.config['plants']:
+        return jsonify({'success': False, 'error': f'등록되지 않은 식물: {plant_id}'}), 404
+    try:
+        start = request.args.get('start', type=datetime.fromisoformat)
+        end = request.args.get('end', type=datetime.fromisoformat)
+        result = monitoring_system.query_metrics(plant_id, request.args.get('metric', 'green_coverage'), start, end,
+                                                 request.args.get('points', 500, type=int))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'metrics': result})
+
+@app.route('/api/timeline/<plant_id>')
+def api_timeline(plant_id):
+    """식물 타임라인 API (팩 파일로 압축된 촬영 포함)"""
+    if plant_id not in monitoring_system.config['plants']:
+        return jsonify({'success': False, 'error': f'등록되지 않은 식물: {plant_id}'}), 404
+    days = request.args.get('days', 30, type=int)
+    return jsonify({'success': True, 'timeline': monitoring_system.get_plant_timeline(plant_id, days)})
+
+@app.route('/images/<path:relative>')
+def serve_image(relative):
+    """저장된 이미지 제공 (로컬 파일 또는 팩 파일 영역을 그대로 전송, Range·조건부 요청 지원)"""
+    try:
+        image = locate_image(monitoring_system, relative)
+    except ValueError:
+        return jsonify({'success': False, 'error': '잘못된 이미지 경로'}), 400
+    if image is None:
+        return jsonify({'success': False, 'error': '이미지를 찾을 수 없습니다'}), 404
+    
+    status, headers, span = evaluate(image, request.headers, request.method)
+    if span is None:
+        return Response(status=status, headers=headers)
+    return Response(wsgi_body(request.environ, image, span), status=status, headers=headers,
+                    direct_passthrough=True)
+
 @app.route('/api/status')
 def api_status():
     """시스템 상태 API"""
@@ -375,11 +652,72 @@ def api_status():
         'uptime': 'Active'
     })
 
+def create_async_server(wsgi_workers: int = 4) -> AsyncWebServer:
+    """
+    비동기 서버 모드 (같은 라우트)
+    
+    스트림(/video_feed, /video_feed/analysis, /events)과 이미지(/images/)는 코루틴으로 처리하고,
+    나머지 API 와 대시보드는 Flask 앱을 작은 스레드 풀에서 그대로 호출한다.
+    """
+    server = AsyncWebServer(app, wsgi_workers=wsgi_workers)
+    preview_source = SharedFrameSource(plant_camera.next_jpeg, name="preview-source")
+    overlay_source = SharedFrameSource(analysis_stream.wait_frame, on_start=analysis_stream.add_viewer,
+                                       on_stop=analysis_stream.remove_viewer, name="overlay-source")
+    
+    async def video_feed(request):
+        return AsyncResponse(200, MJPEG_HEADERS, stream=mjpeg_stream(preview_source))
+    
+    async def video_feed_analysis(request):
+        return AsyncResponse(200, MJPEG_HEADERS, stream=mjpeg_stream(overlay_source))
+    
+    async def events(request):
+        stats = default_bus.recent(1, "stats")
+        if not stats:
+            stats = [publish("stats", await server.run_blocking(monitoring_system.get_system_stats))]
+        
+        async def stream():
+            yield stats[-1].sse
+            async for chunk in sse_astream(default_bus, request.headers.get('Last-Event-ID')):
+                yield chunk
+        
+        return AsyncResponse(200, SSE_HEADERS, stream=stream())
+    
+    async def images(request):
+        try:
+            image = await server.run_blocking(locate_image, monitoring_system, request.path[len('/images/'):])
+        except ValueError:
+            return AsyncResponse(400, {'Content-Type': 'application/json'},
+                                 json.dumps({'success': False, 'error': '잘못된 이미지 경로'}).encode('utf-8'))
+        if image is None:
+            return AsyncResponse(404, {'Content-Type': 'application/json'},
+                                 json.dumps({'success': False, 'error': '이미지를 찾을 수 없습니다'}).encode('utf-8'))
+        status, headers, span = evaluate(image, request.headers, request.method)
+        if span is None:
+            return AsyncResponse(status, headers)
+        return AsyncResponse(status, headers, file=(image.path, image.offset + span[0], span[1] - span[0]))
+    
+    server.route('/video_feed', video_feed)
+    server.route('/video_feed/analysis', video_feed_analysis)
+    server.route('/events', events)
+    server.route('/images/', images, prefix=True)
+    return server
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="식물 모니터링 실시간 웹 인터페이스")
+    parser.add_argument("--host", default="0.0.0.0", help="접속 주소")
+    parser.add_argument("--port", type=int, default=5000, help="포트")
+    parser.add_argument("--async", dest="async_mode", action="store_true",
+                        help="비동기 서버 모드 (스트림 시청자가 많을 때, 연결마다 스레드를 쓰지 않음)")
+    parser.add_argument("--wsgi-workers", type=int, default=4, help="비동기 모드에서 API 요청을 처리할 스레드 수")
+    args = parser.parse_args()
+    
     print("🌱 Plant Analysis SDK 실시간 웹 인터페이스 시작")
     print("📱 브라우저에서 접속하세요:")
-    print("   로컬: http://localhost:5000")
-    print("   네트워크: http://[라즈베리파이IP]:5000")
+    print(f"   로컬: http://localhost:{args.port}")
+    print(f"   네트워크: http://[라즈베리파이IP]:{args.port}")
     print("📷 실시간 카메라 스트리밍 지원!")
     
-    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
\ No newline at end of file
+    if args.async_mode:
+        create_async_server(args.wsgi_workers).run(host=args.host, port=args.port)
+    else:
+        app.run(host=args.host, port=args.port, debug=False, threaded=True)